@@ -23,6 +23,8 @@ import sys
 import random
 import string
 
+from image_bridge import ImageBridge
+
 class DICOMViewerApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -74,6 +76,7 @@ class DICOMViewerApp(QMainWindow):
         self.brightness = 0
         self.contrast = 1.0
         self.frame_rate = 15  # Default frame rate
+        self.image_bridge = ImageBridge()  # Reused display buffers
 
 
     def setup_ui(self):
@@ -334,13 +337,15 @@ class DICOMViewerApp(QMainWindow):
             image_data = self.pixel_array[self.current_frame] if self.image_type == "M2D" else self.pixel_array
             
             # Normalize pixel values
-            image_data = self.normalize_pixel_data(image_data)
+            image_data = self.image_bridge.window_to_uint8("frame", image_data, 0, np.max(image_data))
 
-            # Apply brightness and contrast
-            adjusted_image = np.clip(
-                image_data * self.contrast + self.brightness * 255,
-                0, 255
-            ).astype(np.uint8)
+            # Apply brightness and contrast in reused float32/uint8 buffers
+            scratch = self.image_bridge.buffer("adjust_scratch", image_data.shape, np.float32)
+            np.multiply(image_data, self.contrast, out=scratch)
+            scratch += self.brightness * 255
+            np.clip(scratch, 0, 255, out=scratch)
+            adjusted_image = self.image_bridge.buffer("adjusted", image_data.shape)
+            np.copyto(adjusted_image, scratch, casting="unsafe")
 
             # Zoom and update the image view
             height, width = adjusted_image.shape
@@ -479,8 +484,11 @@ class DICOMViewerApp(QMainWindow):
             else:  # 2D
                 image_data = self.pixel_array  # Use the full 2D image
 
-            # Normalize the pixel data
-            normalized_data = self.normalize_pixel_data(image_data)
+            # Normalize the pixel data (grayscale frames go into a reused buffer)
+            if image_data.ndim == 2:
+                normalized_data = self.image_bridge.window_to_uint8("frame", image_data, 0, np.max(image_data))
+            else:
+                normalized_data = self.normalize_pixel_data(image_data)
 
             # Convert and display the image
             if normalized_data.ndim == 3 and normalized_data.shape[-1] == 3:  # RGB
@@ -607,19 +615,16 @@ class DICOMViewerApp(QMainWindow):
         for i in range(num_slices):
             slice_data = self.pixel_array[i]
             
-            # Normalize the slice
-            normalized_slice = self.normalize_pixel_data(slice_data)
-            
-            # Convert numpy array to QImage
-            height, width = normalized_slice.shape
-            bytes_per_line = width
-            q_img = QImage(normalized_slice.data, width, height, bytes_per_line, QImage.Format_Grayscale8)
+            # Normalize the slice into the same 8-bit buffer for every slice
+            normalized_slice = self.image_bridge.window_to_uint8("3d_slice", slice_data, 0, np.max(slice_data))
             
-            # Convert QImage to QPixmap
-            pixmap = QPixmap.fromImage(q_img)
+            # Wrap the buffer as a QImage (no copy) and scale it to a reasonable size;
+            # the scaled image is a new image, so the buffer can be reused by the next slice
+            q_img = self.image_bridge.to_qimage(normalized_slice)
+            scaled_img = q_img.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
             
-            # Scale pixmap to a reasonable size
-            scaled_pixmap = pixmap.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            # Only the thumbnail is converted to a QPixmap
+            scaled_pixmap = QPixmap.fromImage(scaled_img)
             
             # Create a label to display the slice
             label = QLabel()
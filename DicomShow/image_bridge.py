@@ -0,0 +1,70 @@
+"""Numpy <-> Qt image bridge for DicomShow
+
+QImage(ndarray.data, ...) does not copy the pixels, but the QImage does not
+keep the array alive either: if the array is freed while the image is in use
+Qt reads released memory. ImageBridge wraps contiguous arrays as QImages
+without copying and ties the array's lifetime to the QImage. It also hands
+out reusable output buffers, so converting frame after frame to 8 bits for
+display does not allocate a new array every time.
+"""
+import numpy as np
+from PyQt5.QtGui import QImage
+
+
+class ImageBridge:
+    # (dtype, channels) -> QImage format
+    FORMATS = {
+        (np.dtype(np.uint8), 1): QImage.Format_Grayscale8,
+        (np.dtype(np.uint16), 1): QImage.Format_Grayscale16,
+        (np.dtype(np.uint8), 3): QImage.Format_RGB888,
+        (np.dtype(np.uint8), 4): QImage.Format_RGBA8888,
+    }
+
+    def __init__(self):
+        self._buffers = {}  # Key -> reusable output array
+
+    def buffer(self, key, shape, dtype=np.uint8):
+        """Output array for key, reused while the shape and dtype stay the same"""
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        array = self._buffers.get(key)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = np.empty(shape, dtype=dtype)
+            self._buffers[key] = array
+        return array
+
+    @staticmethod
+    def to_qimage(array):
+        """Wrap a (rows, columns[, channels]) array as a QImage without copying
+
+        The QImage keeps a reference to the array, so the pixels stay valid as
+        long as the QImage lives. Rows may be padded but pixels within a row
+        must be contiguous; other arrays are copied once.
+        """
+        channels = 1 if array.ndim == 2 else array.shape[2]
+        image_format = ImageBridge.FORMATS.get((array.dtype, channels))
+        if image_format is None:
+            raise ValueError(f"No QImage format for {array.dtype} images with {channels} channel(s)")
+        if array.strides[-1] != array.itemsize or (array.ndim == 3 and array.strides[1] != array.itemsize * channels):
+            array = np.ascontiguousarray(array)
+
+        height, width = array.shape[:2]
+        image = QImage(array.data, width, height, array.strides[0], image_format)
+        image.ndarray = array  # Keeps the buffer alive for as long as the QImage
+        return image
+
+    def window_to_uint8(self, key, image, lo=None, hi=None):
+        """Map image linearly from [lo, hi] (image min/max by default) to 0-255 in a reused buffer"""
+        lo = float(image.min()) if lo is None else float(lo)
+        hi = float(image.max()) if hi is None else float(hi)
+        if hi <= lo:
+            hi = lo + 1
+
+        # Float32 scratch and uint8 output are both reused between frames
+        scratch = self.buffer((key, "scratch"), image.shape, np.float32)
+        np.subtract(image, lo, out=scratch, casting="unsafe")
+        np.multiply(scratch, 255.0 / (hi - lo), out=scratch)
+        np.clip(scratch, 0, 255, out=scratch)
+        output = self.buffer(key, image.shape, np.uint8)
+        np.copyto(output, scratch, casting="unsafe")
+        return output
@@ -1,6 +1,13 @@
 import sys
+import os
+import csv
+import threading
+import time
+import json
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import cv2
-from skimage import exposure
 import numpy as np
 from PIL import Image
 import pydicom
@@ -8,38 +15,116 @@ from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QFileDialog,
     QLabel, QSlider, QGridLayout, QComboBox, QSpinBox, QFrame, QScrollArea
 )
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRectF, QTimer
+from PyQt5.QtGui import QImage, QPainter
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle
 from scipy import ndimage
 
+from image_bridge import ImageBridge
+
 
 class NoiseGenerator:
     @staticmethod
-    def add_gaussian_noise(image, mean=0, sigma=25):
+    def _clip(noisy_image, image, value_range):
+        """Clip to value_range; uint8 images stay uint8, anything else becomes float32"""
+        if image.dtype == np.uint8:
+            return np.clip(noisy_image, 0, 255).astype(np.uint8)
+        return np.clip(noisy_image, *value_range, out=noisy_image).astype(np.float32, copy=False)
+
+    @staticmethod
+    def add_gaussian_noise(image, mean=0, sigma=25, value_range=(0, 255), rng=None):
         """Add Gaussian noise to image"""
-        noise = np.random.normal(mean, sigma, image.shape)
-        noisy_image = image + noise
-        return np.clip(noisy_image, 0, 255).astype(np.uint8)
+        rng = np.random.default_rng() if rng is None else rng
+        noisy_image = rng.standard_normal(image.shape, dtype=np.float32)
+        noisy_image *= np.float32(sigma)
+        noisy_image += np.float32(mean)
+        noisy_image += image
+        return NoiseGenerator._clip(noisy_image, image, value_range)
     
     @staticmethod
-    def add_salt_and_pepper(image, prob=0.05):
+    def add_salt_and_pepper(image, prob=0.05, value_range=(0, 255), rng=None):
         """Add salt and pepper noise"""
+        rng = np.random.default_rng() if rng is None else rng
         noisy_image = np.copy(image)
+        # One uniform field decides both: low values become salt, high values pepper
+        field = rng.random(image.shape, dtype=np.float32)
         # Salt
-        salt_mask = np.random.random(image.shape) < prob/2
-        noisy_image[salt_mask] = 255
+        noisy_image[field < prob/2] = value_range[1]
         # Pepper
-        pepper_mask = np.random.random(image.shape) < prob/2
-        noisy_image[pepper_mask] = 0
+        noisy_image[field > 1 - prob/2] = value_range[0]
         return noisy_image
         
     @staticmethod
-    def add_poisson_noise(image, scale=1.0):
+    def add_poisson_noise(image, scale=1.0, value_range=(0, 255), rng=None):
         """Add Poisson noise"""
-        noisy_image = np.random.poisson(image * scale) / scale
-        return np.clip(noisy_image, 0, 255).astype(np.uint8)
+        rng = np.random.default_rng() if rng is None else rng
+        noisy_image = rng.poisson(np.maximum(image, 0) * scale).astype(np.float32)
+        noisy_image /= np.float32(scale)
+        return NoiseGenerator._clip(noisy_image, image, value_range)
+
+class NoiseEngine:
+    """Seeded noise realizations, cached so that they stay stable while later stages change
+
+    Every (seed, noise type, strength, slice) gets its own np.random.Generator,
+    so a realization is reproducible and does not depend on what was generated
+    before it. Strength is the GUI value (1-100) in 8-bit units.
+    """
+    NOISE_TYPES = ("Gaussian", "Salt & Pepper", "Poisson")
+
+    def __init__(self, cache_size=32):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # Key -> noisy image
+        self._lock = threading.Lock()  # Background stack jobs share the cache
+
+    @staticmethod
+    def generator(seed, noise_type, strength, slice_index=0):
+        """Independent generator for one noise realization"""
+        return np.random.default_rng([int(seed), NoiseEngine.NOISE_TYPES.index(noise_type),
+                                      int(round(strength * 1000)), int(slice_index)])
+
+    @staticmethod
+    def add_noise(image, noise_type, strength, value_range=(0, 255), rng=None):
+        """Add noise_type at GUI strength, scaled to the image's value range"""
+        intensity_scale = (value_range[1] - value_range[0]) / 255.0
+        if noise_type == "Gaussian":
+            return NoiseGenerator.add_gaussian_noise(image, sigma=strength * intensity_scale,
+                                                     value_range=value_range, rng=rng)
+        if noise_type == "Salt & Pepper":
+            return NoiseGenerator.add_salt_and_pepper(image, prob=strength/500,
+                                                      value_range=value_range, rng=rng)
+        if noise_type == "Poisson":
+            return NoiseGenerator.add_poisson_noise(image, scale=strength/25 / intensity_scale,
+                                                    value_range=value_range, rng=rng)
+        return image
+
+    def apply(self, image, noise_type, strength, seed=0, value_range=(0, 255), slice_index=0, cache_key=None):
+        """Noisy version of image; cached under cache_key (the identity of the image) when given"""
+        if noise_type not in self.NOISE_TYPES:
+            return image
+
+        key = None
+        if cache_key is not None:
+            key = (cache_key, image.shape, noise_type, strength, seed, value_range)
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    return cached
+
+        noisy_image = self.add_noise(image, noise_type, strength, value_range,
+                                     self.generator(seed, noise_type, strength, slice_index))
+        if key is not None:
+            with self._lock:
+                self._cache[key] = noisy_image
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return noisy_image
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
 
 class Denoiser:
     @staticmethod
@@ -50,12 +135,29 @@ class Denoiser:
     @staticmethod
     def bilateral_filter(image, d=9, sigma_color=75, sigma_space=75):
         """Apply bilateral filter"""
+        if image.dtype not in (np.uint8, np.float32):
+            image = image.astype(np.float32)  # The only depths cv2.bilateralFilter takes
         return cv2.bilateralFilter(image, d, sigma_color, sigma_space)
     
     @staticmethod
     def nlm_filter(image, h=10, window_size=7, search_size=21):
-        """Apply Non-local Means denoising"""
-        return cv2.fastNlMeansDenoising(image, None, h, window_size, search_size)
+        """Apply Non-local Means denoising (h is in the image's intensity units)"""
+        if image.dtype == np.uint8:
+            return cv2.fastNlMeansDenoising(image, None, h, window_size, search_size)
+        if image.dtype == np.uint16:
+            return cv2.fastNlMeansDenoising(image, h=[float(h)], templateWindowSize=window_size,
+                                            searchWindowSize=search_size, normType=cv2.NORM_L1)
+
+        # OpenCV's NLM only takes 8/16-bit input: run it on a 16-bit quantization
+        # of the image (h scaled with it) and map the result back
+        lo, hi = float(image.min()), float(image.max())
+        if hi <= lo:
+            return image.astype(np.float32)
+        scale = 65535.0 / (hi - lo)
+        quantized = ((image - lo) * scale).astype(np.uint16)
+        denoised = cv2.fastNlMeansDenoising(quantized, h=[h * scale], templateWindowSize=window_size,
+                                            searchWindowSize=search_size, normType=cv2.NORM_L1)
+        return denoised.astype(np.float32) / np.float32(scale) + np.float32(lo)
 
 class ContrastEnhancement:
     @staticmethod
@@ -64,11 +166,32 @@ class ContrastEnhancement:
         if image is None or not isinstance(image, np.ndarray):
             return None
         
-        # Ensure image is in uint8 format
-        if image.dtype != np.uint8:
-            image = ((image - image.min()) * (255.0 / (image.max() - image.min()))).astype(np.uint8)
-            
-        return cv2.equalizeHist(image)
+        if image.dtype == np.uint8:
+            return cv2.equalizeHist(image)
+
+        # Deeper images are equalized through their cumulative histogram and keep their intensity range
+        lo, hi = float(image.min()), float(image.max())
+        if hi <= lo:
+            return image.astype(np.float32)
+        if image.dtype == np.uint16:
+            # One histogram bin per gray level, applied as a lookup table
+            cdf = np.cumsum(np.bincount(image.ravel(), minlength=65536)) / float(image.size)
+            return (lo + cdf * (hi - lo)).astype(np.float32)[image]
+        hist, edges = np.histogram(image, bins=4096, range=(lo, hi))
+        cdf = np.cumsum(hist) / float(image.size)
+        return np.interp(image, edges[1:], lo + cdf * (hi - lo)).astype(np.float32)
+
+    # CLAHE objects keep internal buffers, so each thread gets its own cache
+    _clahe_objects = threading.local()
+
+    @staticmethod
+    def clahe(clip_limit=2.0, tile_grid_size=(8, 8)):
+        """CLAHE object for a parameter set, created once per thread"""
+        cache = ContrastEnhancement._clahe_objects.__dict__
+        key = (float(clip_limit), tuple(tile_grid_size))
+        if key not in cache:
+            cache[key] = cv2.createCLAHE(clipLimit=key[0], tileGridSize=key[1])
+        return cache[key]
 
     @staticmethod
     def apply_clahe(image, clip_limit=2.0, tile_grid_size=(8, 8)):
@@ -76,12 +199,27 @@ class ContrastEnhancement:
         if image is None or not isinstance(image, np.ndarray):
             return None
             
-        # Ensure image is in uint8 format
-        if image.dtype != np.uint8:
-            image = ((image - image.min()) * (255.0 / (image.max() - image.min()))).astype(np.uint8)
-            
-        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
-        return clahe.apply(image)
+        clahe = ContrastEnhancement.clahe(clip_limit, tile_grid_size)
+        if image.dtype in (np.uint8, np.uint16):
+            # OpenCV's CLAHE runs on 8 and 16-bit images directly
+            return clahe.apply(image)
+
+        # Other images are quantized to 16 bits and mapped back to their intensity range
+        lo, hi = float(image.min()), float(image.max())
+        if hi <= lo:
+            return image.astype(np.float32)
+        scale = 65535.0 / (hi - lo)
+        quantized = ((image - lo) * scale).astype(np.uint16)
+        return clahe.apply(quantized).astype(np.float32) / np.float32(scale) + np.float32(lo)
+
+    @staticmethod
+    def adaptive_gamma(mean_brightness):
+        """Gamma for a normalized mean brightness"""
+        # If image is dark (low mean), use gamma < 1 to brighten
+        # If image is bright (high mean), use gamma > 1 to darken
+        if mean_brightness < 0.5:
+            return 0.5 + mean_brightness  # gamma will be between 0.5 and 1.0
+        return 1.0 + (mean_brightness - 0.5)  # gamma will be between 1.0 and 1.5
 
     @staticmethod
     def apply_adaptive_gamma(image):
@@ -89,34 +227,727 @@ class ContrastEnhancement:
         if image is None or not isinstance(image, np.ndarray):
             return None
             
-        # Normalize image to 0-1 range
-        img_norm = (image - image.min()) / (image.max() - image.min())
+        lo, hi = float(image.min()), float(image.max())
+        if hi <= lo:
+            return image.copy() if image.dtype == np.uint8 else image.astype(np.float32)
         
-        # Calculate mean brightness
-        mean_brightness = np.mean(img_norm)
+        # Mean brightness of the image normalized to 0-1
+        gamma = ContrastEnhancement.adaptive_gamma((float(np.mean(image, dtype=np.float64)) - lo) / (hi - lo))
         
-        # Adjust gamma based on mean brightness
-        # If image is dark (low mean), use gamma < 1 to brighten
-        # If image is bright (high mean), use gamma > 1 to darken
-        if mean_brightness < 0.5:
-            gamma = 0.5 + mean_brightness  # gamma will be between 0.5 and 1.0
+        if image.dtype in (np.uint8, np.uint16):
+            # Lookup table with one entry per gray level
+            levels = np.arange(256 if image.dtype == np.uint8 else 65536, dtype=np.float32)
+            lut = np.clip((levels - lo) / (hi - lo), 0, 1) ** gamma
+            if image.dtype == np.uint8:
+                return cv2.LUT(image, (lut * 255).astype(np.uint8))
+            return (lo + lut * (hi - lo)).astype(np.uint16)[image]
+
+        # Float images have no finite set of levels: evaluate the curve in float32,
+        # in place, keeping the original intensity range
+        enhanced = (image - np.float32(lo)) * np.float32(1.0 / (hi - lo))
+        cv2.pow(enhanced, gamma, enhanced)
+        enhanced *= np.float32(hi - lo)
+        enhanced += np.float32(lo)
+        return enhanced
+
+    @staticmethod
+    def enhance(image, method, clip_limit=2.0, grid_size=8):
+        """Apply the contrast method named on the GUI ("None" returns image)"""
+        if method == "Histogram Equalization":
+            return ContrastEnhancement.apply_histogram_equalization(image)
+        if method == "CLAHE":
+            return ContrastEnhancement.apply_clahe(image, clip_limit=clip_limit,
+                                                   tile_grid_size=(grid_size, grid_size))
+        if method == "Adaptive Gamma":
+            return ContrastEnhancement.apply_adaptive_gamma(image)
+        return image
+
+class WindowLevel:
+    """Map image intensities to 8-bit display values with a window (lookup table for integer images)
+
+    This is the only place the processing path converts to 8 bits.
+    """
+    def __init__(self):
+        self._lut_cache = {}  # (dtype, lo, hi) -> uint8 lookup table
+
+    def lookup_table(self, dtype, lo, hi):
+        key = (dtype.str, lo, hi)
+        lut = self._lut_cache.get(key)
+        if lut is None:
+            if dtype == np.uint8:
+                values = np.arange(256, dtype=np.float64)
+            else:
+                # Indexed by the raw 16-bit pattern, so int16 entries are laid out in two's complement order
+                values = np.arange(65536, dtype=np.uint16).view(dtype).astype(np.float64)
+            lut = np.clip((values - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+            if len(self._lut_cache) > 16:
+                self._lut_cache.clear()
+            self._lut_cache[key] = lut
+        return lut
+
+    def apply(self, image, window=None, out=None, scratch=None):
+        """Return the uint8 display image for the (lo, hi) window (image min/max by default)
+
+        out (uint8) and, for float images, scratch (float32) are optional
+        buffers of the image's shape that are written instead of allocating.
+        """
+        if window is None:
+            lo, hi = float(image.min()), float(image.max())
         else:
-            gamma = 1.0 + (mean_brightness - 0.5)  # gamma will be between 1.0 and 1.5
+            lo, hi = float(window[0]), float(window[1])
+        if hi <= lo:
+            hi = lo + 1
+
+        if image.dtype == np.uint8:
+            return cv2.LUT(image, self.lookup_table(image.dtype, lo, hi), dst=out)
+        if image.dtype in (np.uint16, np.int16):
+            return np.take(self.lookup_table(image.dtype, lo, hi), image.view(np.uint16), out=out)
+
+        alpha = 255.0 / (hi - lo)
+        return cv2.convertScaleAbs(np.clip(image, lo, hi, out=scratch), dst=out, alpha=alpha, beta=-lo * alpha)
+
+class ProcessingPipeline:
+    """Noise, denoising, filtering, contrast and zoom stages as a pure function of (image, params)
+
+    Keeping the pipeline free of widget state lets the GUI, the per-slice cache
+    and background stack jobs share exactly the same processing.
+    """
+    INTERPOLATION_METHODS = {
+        "Nearest": cv2.INTER_NEAREST,
+        "Bilinear": cv2.INTER_LINEAR,
+        "Cubic": cv2.INTER_CUBIC
+    }
+
+    @staticmethod
+    def params_key(params):
+        """Hashable key of a parameter dict"""
+        return tuple(sorted(params.items()))
+
+    @staticmethod
+    def butterworth_filter(image, filter_type, cutoff, order):
+        """Apply a Butterworth lowpass/highpass filter in the frequency domain"""
+        if image is None or not isinstance(image, np.ndarray):
+            return None
             
-        # Apply gamma correction
-        enhanced = exposure.adjust_gamma(img_norm, gamma)
+        if image.size == 0 or len(image.shape) < 2:
+            return None
+            
+        # Convert image to float type for FFT
+        image_float = image.astype(float)
+        
+        try:
+            # Apply FFT
+            f_transform = np.fft.fft2(image_float)
+            f_shift = np.fft.fftshift(f_transform)
+            
+            rows, cols = image_float.shape
+            
+            # Create frequency grid
+            u = np.linspace(-0.5, 0.5, cols)
+            v = np.linspace(-0.5, 0.5, rows)
+            U, V = np.meshgrid(u, v)
+            D = np.sqrt(U**2 + V**2)
+            
+            # Create filter mask based on type
+            if filter_type == "Lowpass":
+                mask = 1 / (1 + (D / cutoff)**(2 * order))
+            elif filter_type == "Highpass":
+                mask = 1 - 1 / (1 + (D / cutoff)**(2 * order))
+            else:  # No Filter
+                return image
+            
+            # Apply filter
+            f_shift_filtered = f_shift * mask
+            f_ishift = np.fft.ifftshift(f_shift_filtered)
+            img_back = np.fft.ifft2(f_ishift)
+
+            # No rescaling here: the display window takes care of the output range
+            return np.abs(img_back).astype(np.float32)
+            
+        except Exception as e:
+            print(f"Error in apply_filter: {str(e)}")
+            return image  # Return original image if filtering fails
+
+    @staticmethod
+    def run(image, params, noise_engine=None, slice_index=0, cache_key=None, timings=None):
+        """Run all stages on a 2D image, returns (processed_image, {stage name: stage output})
+
+        Noise comes from noise_engine (seeded with params["noise_seed"] and
+        slice_index); with a cache_key identifying the image, the same noise
+        realization is reused when only later stages change.
+
+        Every stage works in the image's own intensity units
+        (params["value_range"]), so 12/16-bit data keeps its precision; the
+        conversion to 8 bits happens once, at display time (WindowLevel).
+        uint8 and uint16 images keep their type as long as the stages can
+        (OpenCV's 8/16-bit paths are the fast ones); other types, and stages
+        that produce fractional values, work on float32.
+
+        If a timings dict is given, the time of every stage (ms) is stored in it.
+        """
+        stages = {}
+        clock = [time.perf_counter()]
+
+        def mark(stage):
+            now = time.perf_counter()
+            if timings is not None:
+                timings[stage] = (now - clock[0]) * 1000
+            clock[0] = now
+
+        # First apply resolution scaling
+        scale = max(1, params["scale"])
+        base_image = image[::scale, ::scale]
+        
+        # Make sure base_image is valid
+        if not isinstance(base_image, np.ndarray) or base_image.size == 0 or len(base_image.shape) < 2:
+            raise ValueError("Invalid image after scaling")
+        if base_image.dtype not in (np.uint8, np.uint16):
+            base_image = base_image.astype(np.float32)
+        mark("scale")
+
+        # Noise and denoising parameters are given in 8-bit units
+        value_range = params["value_range"]
+        intensity_scale = (value_range[1] - value_range[0]) / 255.0
+        
+        # Apply noise if selected
+        noise_engine = noise_engine if noise_engine is not None else NoiseEngine(cache_size=0)
+        base_image = noise_engine.apply(base_image, params["noise_type"], params["noise_strength"],
+                                        params["noise_seed"], value_range, slice_index,
+                                        cache_key=None if cache_key is None else (cache_key, scale))
+        stages["Noisy Image"] = base_image
+        mark("noise")
         
-        # Convert back to uint8
-        return (enhanced * 255).astype(np.uint8)
+        # Apply denoising if selected
+        denoise_method = params["denoise_method"]
+        if denoise_method == "Median":
+            base_image = Denoiser.median_filter(base_image)
+        elif denoise_method == "Bilateral":
+            base_image = Denoiser.bilateral_filter(base_image, sigma_color=75 * intensity_scale)
+        elif denoise_method == "Non-local Means":
+            base_image = Denoiser.nlm_filter(base_image, h=10 * intensity_scale)
+        stages["Denoised Image"] = base_image
+        mark("denoise")
+        
+        # Apply filter to base image if needed
+        if params["filter_type"] != "No Filter":
+            filtered_image = ProcessingPipeline.butterworth_filter(
+                base_image, params["filter_type"], params["cutoff"], params["order"])
+            if filtered_image is not None:
+                base_image = filtered_image
+        stages["Filtered Image"] = base_image
+        mark("filter")
+        
+        # Apply contrast enhancement
+        base_image = ContrastEnhancement.enhance(base_image, params["contrast_method"],
+                                                 params["clahe_clip"], params["clahe_grid"])
+        stages["Enhanced Image"] = base_image
+        mark("contrast")
+
+        # Zoom is not applied here: zoom_region upsamples only the visible part
+        return base_image, stages
+
+    @staticmethod
+    def zoom_region(image, zoom_factor, interpolation, region, margin=4):
+        """Upsample only the part of image that covers region (x0, y0, x1, y1 in zoomed pixels)
+
+        A margin of source pixels around the region keeps the interpolation
+        kernel support, so the crop is identical to the same area of the fully
+        zoomed image. Returns (zoomed crop, imshow extent in zoomed pixels).
+        """
+        h, w = image.shape[:2]
+        x0, y0, x1, y1 = region
+        sx0 = int(np.clip(np.floor(x0 / zoom_factor) - margin, 0, w - 1))
+        sy0 = int(np.clip(np.floor(y0 / zoom_factor) - margin, 0, h - 1))
+        sx1 = int(np.clip(np.ceil(x1 / zoom_factor) + margin, sx0 + 1, w))
+        sy1 = int(np.clip(np.ceil(y1 / zoom_factor) + margin, sy0 + 1, h))
+        crop = image[sy0:sy1, sx0:sx1]
+
+        if zoom_factor > 1:
+            interpolation_method = ProcessingPipeline.INTERPOLATION_METHODS.get(interpolation, cv2.INTER_LINEAR)
+            # OpenCV resizes float32 directly, no 8-bit round trip
+            crop = cv2.resize(crop, (crop.shape[1] * zoom_factor, crop.shape[0] * zoom_factor),
+                              interpolation=interpolation_method)
+
+        left, top = sx0 * zoom_factor, sy0 * zoom_factor
+        extent = (left - 0.5, left + crop.shape[1] - 0.5, top + crop.shape[0] - 0.5, top - 0.5)
+        return crop, extent
+
+class ImagePyramid:
+    """Lazily built multi-resolution pyramid, each level half the size of the previous one"""
+    def __init__(self, image, min_size=32):
+        if image.dtype not in (np.uint8, np.uint16, np.int16, np.float32, np.float64):
+            image = image.astype(np.float32)  # Types cv2.pyrDown cannot handle
+        self.levels = [image]
+        self.min_size = min_size
+
+    def level(self, index):
+        """Return pyramid level index (clamped to the coarsest level), building it on demand"""
+        while len(self.levels) <= index and min(self.levels[-1].shape[:2]) >= 2 * self.min_size:
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+        return self.levels[min(index, len(self.levels) - 1)]
+
+    def level_for(self, display_pixels):
+        """Coarsest level that still has at least display_pixels across the image width"""
+        width = self.levels[0].shape[1]
+        index = 0
+        while width / 2 ** (index + 1) >= display_pixels:
+            index += 1
+        return self.level(index)
+
+class SliceCache:
+    """Least-recently-used cache of pipeline results keyed by (slice index, params key)
+
+    Entries are (processed image, stage images or None); the cache is bounded
+    both by entry count and by the total size of the arrays it holds.
+    """
+    def __init__(self, capacity=64, max_bytes=512 * 1024 ** 2):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def entry_size(value):
+        processed_image, stages = value
+        arrays = {id(processed_image): processed_image}
+        arrays.update((id(stage), stage) for stage in (stages or {}).values() if stage is not None)
+        return sum(array.nbytes for array in arrays.values())
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+        return None
+
+    def put(self, key, value):
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+        size = self.entry_size(value)
+        self._entries[key] = (value, size)
+        self.nbytes += size
+        while self._entries and (len(self._entries) > self.capacity or self.nbytes > self.max_bytes):
+            if next(iter(self._entries)) == key and len(self._entries) == 1:
+                break  # Always keep the newest entry
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+class IntegralImage:
+    """Summed-area tables of an image and of its square for O(1) box statistics"""
+    def __init__(self, image):
+        image = np.asarray(image, dtype=np.float64)
+        if image.ndim > 2:
+            image = image.mean(axis=2)
+        self.shape = image.shape
+        h, w = self.shape
+
+        # Tables are padded with a leading row/column of zeros so that the sum of
+        # image[y0:y1, x0:x1] is table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+        self.sum_table = np.zeros((h + 1, w + 1), dtype=np.float64)
+        self.sq_table = np.zeros((h + 1, w + 1), dtype=np.float64)
+        np.cumsum(np.cumsum(image, axis=0), axis=1, out=self.sum_table[1:, 1:])
+        np.cumsum(np.cumsum(image * image, axis=0), axis=1, out=self.sq_table[1:, 1:])
+
+    def clip_boxes(self, x0, y0, x1, y1):
+        """Clip box corners (arrays) to the image bounds"""
+        h, w = self.shape
+        x0 = np.clip(x0, 0, w)
+        x1 = np.clip(x1, 0, w)
+        y0 = np.clip(y0, 0, h)
+        y1 = np.clip(y1, 0, h)
+        return x0, y0, np.maximum(x1, x0), np.maximum(y1, y0)
+
+    def box_sums(self, x0, y0, x1, y1):
+        """Return (count, sum, sum of squares) for every box [y0:y1, x0:x1]"""
+        x0, y0, x1, y1 = self.clip_boxes(x0, y0, x1, y1)
+        counts = ((x1 - x0) * (y1 - y0)).astype(np.float64)
+        sums = (self.sum_table[y1, x1] - self.sum_table[y0, x1]
+                - self.sum_table[y1, x0] + self.sum_table[y0, x0])
+        sq_sums = (self.sq_table[y1, x1] - self.sq_table[y0, x1]
+                   - self.sq_table[y1, x0] + self.sq_table[y0, x0])
+        return counts, sums, sq_sums
+
+    def window_stats(self, window):
+        """Local mean and std over a window x window neighbourhood of every pixel
+
+        Cost does not depend on the window size; borders use the part of the
+        window that lies inside the image.
+        """
+        h, w = self.shape
+        half = window // 2
+        rows = np.arange(h)
+        cols = np.arange(w)
+        y0, y1 = (rows - half)[:, None], (rows + half + 1)[:, None]
+        x0, x1 = (cols - half)[None, :], (cols + half + 1)[None, :]
+        mean, std = self.mean_std(*self.box_sums(x0, y0, x1, y1))
+        return mean.astype(np.float32), std.astype(np.float32)
+
+    @staticmethod
+    def mean_std(counts, sums, sq_sums):
+        """Convert box sums to mean and (population) standard deviation"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / counts
+            var = sq_sums / counts - mean * mean
+        return mean, np.sqrt(np.maximum(var, 0))
+
+class ROIMeasurementEngine:
+    """Store ROIs as coordinate arrays and measure them on many images at once"""
+    KINDS = ("signal", "signal2", "noise")
+    TABLE_COLUMNS = ["image", "roi", "kind", "x", "y", "width", "height", "mean", "std", "snr", "cnr"]
+
+    def __init__(self):
+        self.boxes = np.empty((0, 4), dtype=np.int32)  # x, y, width, height
+        self.kinds = np.empty(0, dtype=np.int8)  # Index into KINDS
+        self._integral_cache = {}  # Image name -> (image, IntegralImage)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def add_roi(self, x, y, width, height, kind):
+        """Add a single ROI of the given kind"""
+        self.add_rois([(x, y, width, height)], kind)
+
+    def add_rois(self, boxes, kind):
+        """Add an (N, 4) array of x, y, width, height boxes of the given kind"""
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.boxes = np.concatenate([self.boxes, boxes])
+        self.kinds = np.concatenate([self.kinds,
+                                     np.full(len(boxes), self.KINDS.index(kind), dtype=np.int8)])
+
+    def clear(self):
+        """Remove all ROIs"""
+        self.boxes = np.empty((0, 4), dtype=np.int32)
+        self.kinds = np.empty(0, dtype=np.int8)
+
+    def count(self, kind):
+        return int(np.count_nonzero(self.kinds == self.KINDS.index(kind)))
+
+    def integral_image(self, name, image):
+        """Return the (cached) integral image for a named image"""
+        cached = self._integral_cache.get(name)
+        if cached is None or cached[0] is not image:
+            cached = (image, IntegralImage(image))
+            self._integral_cache[name] = cached
+        return cached[1]
+
+    def measure(self, images):
+        """Measure every ROI on every image in a {name: image} dict
+
+        Returns {name: (counts, sums, sq_sums)} with one entry per ROI.
+        """
+        x0, y0 = self.boxes[:, 0], self.boxes[:, 1]
+        x1, y1 = x0 + self.boxes[:, 2], y0 + self.boxes[:, 3]
+        results = {}
+        for name, image in images.items():
+            if image is None:
+                continue
+            results[name] = self.integral_image(name, image).box_sums(x0, y0, x1, y1)
+        return results
+
+    def _kind_mask(self, kind):
+        return self.kinds == self.KINDS.index(kind)
+
+    def _noise_std(self, counts, sums, sq_sums):
+        """Pooled standard deviation over all noise ROIs"""
+        mask = self._kind_mask("noise")
+        _, std = IntegralImage.mean_std(counts[mask].sum(), sums[mask].sum(), sq_sums[mask].sum())
+        return float(std)
+
+    def _ratios(self, counts, sums, sq_sums):
+        """Per-ROI SNR (signal ROIs) and CNR (signal/signal2 pairs in order of selection)"""
+        means, _ = IntegralImage.mean_std(counts, sums, sq_sums)
+        noise_std = self._noise_std(counts, sums, sq_sums)
+        snr = np.full(len(self), np.nan)
+        cnr = np.full(len(self), np.nan)
+        if noise_std == 0 or np.isnan(noise_std):
+            return snr, cnr
+
+        signal_idx = np.flatnonzero(self._kind_mask("signal"))
+        signal2_idx = np.flatnonzero(self._kind_mask("signal2"))
+        snr[signal_idx] = means[signal_idx] / noise_std
+        pairs = min(len(signal_idx), len(signal2_idx))
+        cnr[signal_idx[:pairs]] = np.abs(means[signal_idx[:pairs]] - means[signal2_idx[:pairs]]) / noise_std
+        return snr, cnr
+
+    def snr(self, images):
+        """Return {name: array of SNR values, one per signal ROI}"""
+        mask = self._kind_mask("signal")
+        return {name: self._ratios(*sums)[0][mask] for name, sums in self.measure(images).items()}
+
+    def cnr(self, images):
+        """Return {name: array of CNR values, one per signal/signal2 pair}"""
+        pairs = min(self.count("signal"), self.count("signal2"))
+        mask = self._kind_mask("signal")
+        return {name: self._ratios(*sums)[1][mask][:pairs] for name, sums in self.measure(images).items()}
+
+    def table(self, images):
+        """Return the full measurement table as a list of rows (see TABLE_COLUMNS)"""
+        rows = []
+        for name, sums in self.measure(images).items():
+            means, stds = IntegralImage.mean_std(*sums)
+            snr, cnr = self._ratios(*sums)
+            for i, (x, y, width, height) in enumerate(self.boxes.tolist()):
+                rows.append([name, i, self.KINDS[self.kinds[i]], x, y, width, height,
+                             means[i], stds[i], snr[i], cnr[i]])
+        return rows
+
+    def export_csv(self, file_path, images):
+        """Write the measurement table to a CSV file"""
+        with open(file_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.TABLE_COLUMNS)
+            writer.writerows(self.table(images))
+
+    def load_csv(self, file_path):
+        """Append ROIs from a CSV file with kind, x, y, width, height columns
+
+        Returns the number of ROIs added; nothing is added if the file is invalid.
+        """
+        seen = set()
+        rois = []
+        with open(file_path, newline="") as f:
+            for row in csv.DictReader(f):
+                # Tables written by export_csv repeat every ROI once per image
+                if row.get("roi") is not None:
+                    if row["roi"] in seen:
+                        continue
+                    seen.add(row["roi"])
+                kind = row.get("kind") or "signal"
+                if kind not in self.KINDS:
+                    raise ValueError(f"Unknown ROI kind: {kind}")
+                rois.append(((int(row["x"]), int(row["y"]), int(row["width"]), int(row["height"])), kind))
+        for box, kind in rois:
+            self.add_roi(*box, kind)
+        return len(rois)
+
+class ImageStatistics:
+    """Histogram and image statistics derived from a single bincount pass"""
+    FLOAT_BINS = 4096  # Resolution of the histogram used for floating point images
+    DISPLAY_BINS = 256
+
+    def __init__(self, hist, bin_values, integer_valued=True, values=None, edges=None):
+        self.hist = hist
+        self.bin_values = bin_values
+        self.integer_valued = integer_valued
+        self._values = values  # Flattened pixels of float images, for exact percentiles
+        self._edges = edges
+        self._cdf = np.cumsum(hist)
+        self.count = int(self._cdf[-1])
+
+        occupied = np.flatnonzero(hist)
+        self.min = float(bin_values[occupied[0]])
+        self.max = float(bin_values[occupied[-1]])
+        self.mean = float(hist @ bin_values) / self.count
+        self.std = float(np.sqrt(max(float(hist @ (bin_values * bin_values)) / self.count - self.mean ** 2, 0)))
+
+    @classmethod
+    def from_image(cls, image):
+        """Build the statistics of an image
+
+        Unsigned and 8/16-bit signed integer images are counted with
+        np.bincount directly on a flattened (unsigned) view, no copy for
+        contiguous images; wider signed images are shifted to start at zero
+        first, which copies them. Float images use a FLOAT_BINS-bin histogram
+        between their min and max for the histogram and to locate
+        percentiles, and their exact pixel values for mean, std and the
+        percentile values themselves.
+        """
+        image = np.asarray(image)
+        if image.dtype == np.bool_:
+            image = image.view(np.uint8)
+
+        if image.dtype.kind == 'u' and image.dtype.itemsize <= 4:
+            hist = np.bincount(image.ravel())
+            return cls(hist, np.arange(len(hist), dtype=np.float64))
+
+        if image.dtype.kind == 'i' and image.dtype.itemsize <= 2:
+            # Counted as unsigned, where negative values land in the upper half,
+            # then rotated so that bin 0 holds the smallest representable value
+            bits = 8 * image.dtype.itemsize
+            unsigned = image.view(np.dtype(f'u{image.dtype.itemsize}'))
+            hist = np.roll(np.bincount(unsigned.ravel(), minlength=1 << bits), 1 << (bits - 1))
+            occupied = np.flatnonzero(hist)
+            hist = hist[occupied[0]:occupied[-1] + 1]
+            offset = int(occupied[0]) - (1 << (bits - 1))
+            return cls(hist, np.arange(len(hist), dtype=np.float64) + offset)
+
+        if image.dtype.kind == 'i':
+            offset = int(image.min())
+            hist = np.bincount(image.ravel().astype(np.int64) - offset)
+            return cls(hist, np.arange(len(hist), dtype=np.float64) + offset)
+
+        values = image.ravel()
+        if values.dtype not in (np.float32, np.float64):
+            values = values.astype(np.float32)
+        lo, hi = float(np.nanmin(values)), float(np.nanmax(values))
+        finite = None
+        if np.isnan(values).any():
+            finite = (~np.isnan(values)).astype(np.uint8).reshape(-1, 1)
+        if hi <= lo:
+            count = len(values) if finite is None else int(np.count_nonzero(finite))
+            return cls(np.array([count]), np.array([lo]), integer_valued=False)
+        hist, edges = np.histogram(values, bins=cls.FLOAT_BINS, range=(lo, hi))
+        stats = cls(hist, (edges[:-1] + edges[1:]) / 2, integer_valued=False, values=values, edges=edges)
+        stats.min, stats.max = lo, hi  # Exact, rather than the outermost bin centres
+        # One float64-accumulated pass over the pixels (NaNs masked out)
+        mean, std = cv2.meanStdDev(values.reshape(-1, 1), mask=finite)
+        stats.mean, stats.std = float(mean[0, 0]), float(std[0, 0])
+        return stats
+
+    def value_at_rank(self, rank):
+        """Value of the pixel at the given (0-based) rank in sorted order"""
+        index = np.searchsorted(self._cdf, rank, side='right')
+        if self._values is None:
+            return self.bin_values[index]
+        # Float images: the exact value among the pixels of the bin holding that rank
+        # (bins hold edges[i] <= v < edges[i + 1], the last one includes the maximum)
+        low, high = self._edges[index], self._edges[index + 1]
+        upper = self._values <= high if index == len(self.hist) - 1 else self._values < high
+        in_bin = self._values[(self._values >= low) & upper]
+        below = int(self._cdf[index - 1]) if index else 0
+        return float(np.partition(in_bin, rank - below)[rank - below])
+
+    def percentile(self, q):
+        """Percentile with linear interpolation between ranks (matches np.percentile)"""
+        rank = q / 100.0 * (self.count - 1)
+        lo, hi = int(np.floor(rank)), int(np.ceil(rank))
+        v_lo = self.value_at_rank(lo)
+        v_hi = v_lo if hi == lo else self.value_at_rank(hi)
+        return float(v_lo + (v_hi - v_lo) * (rank - lo))
+
+    @property
+    def median(self):
+        return self.percentile(50)
+
+    def display_histogram(self):
+        """Aggregate the histogram into DISPLAY_BINS bins, returns (counts, edges)"""
+        if self.integer_valued:
+            # One bin per grey level for 8-bit data, wider bins for deeper images
+            lo, hi = min(0.0, self.min), max(float(self.DISPLAY_BINS), self.max + 1)
+        else:
+            lo, hi = self.min, self.max if self.max > self.min else self.min + 1
+        edges = np.linspace(lo, hi, self.DISPLAY_BINS + 1)
+        index = ((self.bin_values - lo) * (self.DISPLAY_BINS / (hi - lo))).astype(np.int64)
+        index = np.clip(index, 0, self.DISPLAY_BINS - 1)
+        counts = np.bincount(index, weights=self.hist, minlength=self.DISPLAY_BINS)
+        return counts, edges
+
+class StatisticsCache:
+    """Cache ImageStatistics per named pipeline stage until the stage output changes"""
+    def __init__(self):
+        self._entries = {}  # Stage name -> (image, ImageStatistics)
+
+    def get(self, name, image):
+        cached = self._entries.get(name)
+        if cached is None or cached[0] is not image:
+            cached = (image, ImageStatistics.from_image(image))
+            self._entries[name] = cached
+        return cached[1]
+
+    def clear(self):
+        self._entries.clear()
+
+class SessionRecorder:
+    """Record a session's control changes and processing timings so it can be replayed
+
+    A session is a list of events with a time "t" in seconds since the start:
+    "start" (image identity and every control value), "load" (new image
+    identity) and "control" (name, new value, and the process_image runs it
+    caused with their per-stage timings). Sessions are saved as JSON and
+    replayed headlessly by replay_session.py.
+    """
+    VERSION = 1
+
+    def __init__(self):
+        self.recording = False
+        self.events = []
+        self.start_time = None
+        self.pending_runs = []  # process_image runs not yet attributed to a control change
+
+    @staticmethod
+    def image_identity(volume, source=None):
+        """Source path, shape, dtype and SHA-1 of the pixel data"""
+        data = np.ascontiguousarray(volume)
+        return {"source": source, "shape": list(data.shape), "dtype": data.dtype.str,
+                "sha1": hashlib.sha1(data.data).hexdigest()}
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def start(self, image_identity, controls):
+        self.recording = True
+        self.start_time = time.perf_counter()
+        self.pending_runs = []
+        self.events = [{"t": 0.0, "type": "start", "image": image_identity, "controls": controls}]
+
+    def stop(self):
+        self.recording = False
+
+    def take_runs(self):
+        """Pending runs and the time (s) the action that caused them started"""
+        runs, self.pending_runs = self.pending_runs, []
+        # Handlers run before the recorder hears of a change, so it started with its first run
+        return runs, runs[0]["t"] if runs else self.elapsed()
+
+    def record_load(self, image_identity):
+        """A new image was loaded and shown"""
+        if self.recording:
+            runs, t = self.take_runs()
+            self.events.append({"t": t, "type": "load", "image": image_identity,
+                                "elapsed_ms": (self.elapsed() - t) * 1000, "runs": runs})
+
+    def record_run(self, start, cached, stage_ms, render_ms, total_ms):
+        """Timings of one process_image run; start is its time.perf_counter() at the beginning"""
+        if self.recording:
+            self.pending_runs.append({"t": start - self.start_time, "cached": cached, "stage_ms": stage_ms,
+                                      "render_ms": render_ms, "total_ms": total_ms})
+
+    def record_control(self, name, value):
+        """A control changed; its handlers already ran, so the pending runs are its runs"""
+        if not self.recording:
+            return
+        runs, t = self.take_runs()
+        self.events.append({"t": t, "type": "control", "name": name, "value": value,
+                            "elapsed_ms": (self.elapsed() - t) * 1000, "runs": runs})
+
+    def save(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump({"version": self.VERSION, "events": self.events}, f, indent=1)
+
+    @staticmethod
+    def load(file_path):
+        """Events of a saved session"""
+        with open(file_path) as f:
+            session = json.load(f)
+        if session.get("version") != SessionRecorder.VERSION:
+            raise ValueError(f"Unsupported session version: {session.get('version')}")
+        return session["events"]
 
 class DraggableCanvas(FigureCanvas):
+    """Figure canvas that pans by blitting a snapshot of the last render
+
+    While dragging, the axes region of the last Agg render is repainted shifted
+    by the mouse displacement, so no matplotlib redraw happens until the button
+    is released and the new axis limits are rendered once.
+    """
     def __init__(self, figure):
         super().__init__(figure)
         self.setParent(None)
 
         # Initialize drag parameters
         self.is_dragging = False
-        self.last_mouse_pos = None  # Last known position of the mouse
+        self.press_pos = None  # Mouse position (display pixels) where the drag started
+        self.pan_offset = QPoint(0, 0)  # Current drag displacement in widget pixels
+        self.pan_snapshot = None  # QImage of the figure when the drag started
+        self.image_bridge = ImageBridge()  # Snapshot buffer, reused between drags
+        self.pan_axes_rect = None  # Axes area in widget pixels
         self.original_xlim = None
         self.original_ylim = None
 
@@ -128,45 +959,86 @@ class DraggableCanvas(FigureCanvas):
     def on_mouse_press(self, event):
         if event.inaxes and event.button == 1:  # Left click
             self.is_dragging = True
-            self.last_mouse_pos = (event.x, event.y)
+            self.press_pos = (event.x, event.y)
+            self.pan_offset = QPoint(0, 0)
             self.setCursor(Qt.ClosedHandCursor)
 
             # Store the original axis limits
             ax = self.figure.axes[0]
             self.original_xlim = ax.get_xlim()
             self.original_ylim = ax.get_ylim()
+            self.take_pan_snapshot(ax)
+
+    def take_pan_snapshot(self, ax):
+        """Copy the current render and locate the axes in widget coordinates"""
+        try:
+            buffer = self.buffer_rgba()
+        except AttributeError:  # Nothing rendered yet
+            self.pan_snapshot = None
+            return
+        height, width = buffer.shape[:2]
+        self.pan_snapshot = self.image_bridge.copy_to_qimage("pan_snapshot", buffer, width, height,
+                                                             QImage.Format_RGBA8888)
+
+        # Matplotlib display coordinates are physical pixels with the origin at the bottom left
+        ratio = self.device_pixel_ratio
+        bbox = ax.bbox
+        self.pan_axes_rect = QRectF(bbox.x0 / ratio, (self.figure.bbox.height - bbox.y1) / ratio,
+                                    bbox.width / ratio, bbox.height / ratio)
 
     def on_mouse_release(self, event):
         if self.is_dragging:
             self.is_dragging = False
-            self.last_mouse_pos = None
             self.setCursor(Qt.ArrowCursor)
 
+            # Apply the total displacement to the axis limits and render once
+            if self.press_pos is not None and event.x is not None:
+                ax = self.figure.axes[0]
+                inverse = ax.transData.inverted()
+                start = inverse.transform(self.press_pos)
+                end = inverse.transform((event.x, event.y))
+                dx_data, dy_data = start - end
+                ax.set_xlim(self.original_xlim[0] + dx_data, self.original_xlim[1] + dx_data)
+                ax.set_ylim(self.original_ylim[0] + dy_data, self.original_ylim[1] + dy_data)
+
+            self.press_pos = None
+            self.pan_snapshot = None
+            self.draw_idle()
+
     def on_mouse_move(self, event):
-        if self.is_dragging and event.inaxes:
-            if self.last_mouse_pos is None:
+        if self.is_dragging and event.x is not None:
+            if self.press_pos is None:
                 return
 
-            # Calculate pixel displacement
-            dx_pixels = event.x - self.last_mouse_pos[0]
-            dy_pixels = event.y - self.last_mouse_pos[1]
+            # Convert display displacement (physical pixels, y up) to widget pixels (y down)
+            ratio = self.device_pixel_ratio
+            self.pan_offset = QPoint(int((event.x - self.press_pos[0]) / ratio),
+                                     int((self.press_pos[1] - event.y) / ratio))
 
-            # Update last mouse position
-            self.last_mouse_pos = (event.x, event.y)
+            # Repaint from the snapshot, no matplotlib render
+            if self.pan_snapshot is not None:
+                self.update()
 
-            # Convert pixel displacement to data coordinates
-            ax = self.figure.axes[0]
-            x_range = ax.get_xlim()[1] - ax.get_xlim()[0]
-            y_range = ax.get_ylim()[1] - ax.get_ylim()[0]
-            dx_data = -dx_pixels * (x_range / self.width())  # Negative for left-to-right drag
-            dy_data = -dy_pixels * (y_range / self.height())  # Positive for bottom-to-top drag
+    def paintEvent(self, event):
+        if not self.is_dragging or self.pan_snapshot is None:
+            super().paintEvent(event)
+            return
 
-            # Adjust axis limits incrementally
-            ax.set_xlim(ax.get_xlim()[0] + dx_data, ax.get_xlim()[1] + dx_data)
-            ax.set_ylim(ax.get_ylim()[0] + dy_data, ax.get_ylim()[1] + dy_data)
+        ratio = self.device_pixel_ratio
+        painter = QPainter(self)
+        try:
+            snapshot = self.pan_snapshot
+            snapshot.setDevicePixelRatio(ratio)
+            painter.drawImage(QPointF(0, 0), snapshot)
 
-            # Redraw the canvas
-            self.draw_idle()
+            # Shift only the axes contents, clipped to the axes area
+            rect = self.pan_axes_rect
+            source = QRectF(rect.left() * ratio, rect.top() * ratio, rect.width() * ratio, rect.height() * ratio)
+            painter.setClipRect(rect)
+            painter.fillRect(rect, Qt.white)
+            painter.drawImage(rect.translated(QPointF(self.pan_offset)), snapshot, source)
+        finally:
+            painter.end()
 
 
 class HistogramWindow(QMainWindow):
@@ -192,43 +1064,38 @@ class HistogramWindow(QMainWindow):
         self.stats_label = QLabel()
         layout.addWidget(self.stats_label)
 
-    def plot_histogram(self, image, title):
-        """Plot histogram of the given image"""
-        self.ax.clear()
-        
-        # Calculate histogram
-        hist, bins = np.histogram(image.flatten(), bins=256, range=(0, 255))
-        
-        # Plot histogram
-        self.ax.bar(bins[:-1], hist, width=1, color='blue', alpha=0.7)
-        self.ax.set_title(f'Histogram - {title}')
+        # Axes decorations are static; the histogram artist is created once and updated in place
         self.ax.set_xlabel('Pixel Value')
         self.ax.set_ylabel('Frequency')
-        
-        # Set reasonable y-axis limits
-        max_freq = hist.max()
-        self.ax.set_ylim(0, max_freq * 1.1)
-        
-        # Add grid
         self.ax.grid(True, alpha=0.3)
-        
-        # Calculate and display statistics
-        mean_val = np.mean(image)
-        median_val = np.median(image)
-        std_val = np.std(image)
-        min_val = np.min(image)
-        max_val = np.max(image)
-        
+        self.hist_artist = None
+
+    def plot_histogram(self, image, title, stats=None):
+        """Plot histogram of the given image (or of precomputed ImageStatistics)"""
+        if stats is None:
+            stats = ImageStatistics.from_image(image)
+
+        counts, edges = stats.display_histogram()
+        if self.hist_artist is None:
+            self.hist_artist = self.ax.stairs(counts, edges, fill=True, color='blue', alpha=0.7)
+        else:
+            self.hist_artist.set_data(counts, edges)
+        self.ax.set_title(f'Histogram - {title}')
+
+        # Set reasonable axis limits
+        self.ax.set_xlim(edges[0], edges[-1])
+        self.ax.set_ylim(0, max(counts.max(), 1) * 1.1)
+
         stats_text = (f"Statistics:\n"
-                     f"Mean: {mean_val:.2f}\n"
-                     f"Median: {median_val:.2f}\n"
-                     f"Std Dev: {std_val:.2f}\n"
-                     f"Min: {min_val:.2f}\n"
-                     f"Max: {max_val:.2f}")
+                     f"Mean: {stats.mean:.2f}\n"
+                     f"Median: {stats.median:.2f}\n"
+                     f"Std Dev: {stats.std:.2f}\n"
+                     f"Min: {stats.min:.2f}\n"
+                     f"Max: {stats.max:.2f}")
         self.stats_label.setText(stats_text)
-        
+
         # Refresh canvas
-        self.canvas.draw()
+        self.canvas.draw_idle()
         
 
 class MedicalImageApp(QMainWindow):
@@ -256,8 +1123,41 @@ class MedicalImageApp(QMainWindow):
         self.status_label.setAlignment(Qt.AlignCenter)
         self.control_layout.addWidget(self.status_label)
 
+        # Slice navigation for multi-frame images and volumes (hidden for single images)
+        self.slice_frame = QFrame()
+        self.slice_frame.setFrameStyle(QFrame.StyledPanel)
+        slice_layout = QVBoxLayout(self.slice_frame)
+        self.slice_label = QLabel("Slice: 1 / 1")
+        self.slice_label.setAlignment(Qt.AlignCenter)
+        self.slice_slider = QSlider(Qt.Horizontal)
+        self.slice_slider.setRange(0, 0)
+        self.process_stack_button = QPushButton("Process Whole Stack")
+        slice_layout.addWidget(self.slice_label)
+        slice_layout.addWidget(self.slice_slider)
+        slice_layout.addWidget(self.process_stack_button)
+        self.slice_frame.setVisible(False)
+        self.control_layout.addWidget(self.slice_frame)
+
+        self.volume = None  # (slices, rows, columns) stack; single images have one slice
+        self.image_id = 0  # Incremented on every load, identifies the image in caches
+        self.value_range = (0, 255)  # Nominal intensity range of the loaded data
+        self.display_window = None  # (lo, hi) display window of the main viewport, None for min/max
+        self.window_level = WindowLevel()
+        self.image_bridge = ImageBridge()  # Reused 8-bit display buffers, one per viewport
+        self.current_slice = 0
+        self.slice_cache = SliceCache()  # (slice, params) -> (processed image, stage images)
+        self.stack_executor = None  # Background job processing the whole stack
+        self.stack_jobs = {}
+        self.stack_job_total = 0
+        self.stack_timer = QTimer(self)  # Polls background results on the GUI thread
+        self.stack_timer.timeout.connect(self.collect_stack_results)
+        self.slice_slider.valueChanged.connect(self.show_slice)
+        self.process_stack_button.clicked.connect(self.process_stack)
+
         # Create histogram window
         self.histogram_window = HistogramWindow()
+        self.statistics_cache = StatisticsCache()  # Histogram statistics per image / pipeline stage
+        self.stage_images = {}  # Latest output of each processing stage
         
         # Add Show Histogram button
         self.show_histogram_button = QPushButton("Show Histogram")
@@ -277,7 +1177,8 @@ class MedicalImageApp(QMainWindow):
 
         # Add histogram type selector
         self.histogram_type = QComboBox()
-        self.histogram_type.addItems(["Main Viewport", "Viewport 1", "Viewport 2"])
+        self.histogram_type.addItems(["Main Viewport", "Viewport 1", "Viewport 2",
+                                      "Noisy Image", "Denoised Image", "Filtered Image", "Enhanced Image"])
         self.histogram_type.setStyleSheet("""
             QComboBox {
                 min-height: 15px;
@@ -315,10 +1216,15 @@ class MedicalImageApp(QMainWindow):
         self.calculate_snr_button = QPushButton("Calculate SNR")
         self.calculate_cnr_button = QPushButton("Calculate CNR")
         self.reset_button = QPushButton("Reset")
+        self.load_rois_button = QPushButton("Load ROI Set")
+        self.export_rois_button = QPushButton("Export ROI Table")
+        self.record_session_button = QPushButton("Record Session")
+        self.record_session_button.setCheckable(True)
 
         for button in [self.load_button, self.select_signal_button,
                        self.select_noise_button, self.calculate_snr_button,
-                       self.reset_button, self.select_signal2_button, self.calculate_cnr_button]:
+                       self.reset_button, self.select_signal2_button, self.calculate_cnr_button,
+                       self.load_rois_button, self.export_rois_button, self.record_session_button]:
             button.setStyleSheet(button_style)
             self.control_layout.addWidget(button)
 
@@ -332,6 +1238,8 @@ class MedicalImageApp(QMainWindow):
         self.cid = None  # Connection ID for ROI selection
         self.signal2_roi = None  # Signal 2 ROI
         self.signal2_roi_rect = None  # Signal 2 Rectangle drawn on the image
+        self.roi_engine = ROIMeasurementEngine()  # All ROIs, measured with integral images
+        self.loaded_roi_rects = []  # Rectangles of ROIs loaded from a file
 
         # FOV and Resolution section
         fov_frame = QFrame()
@@ -426,6 +1334,9 @@ class MedicalImageApp(QMainWindow):
         self.calculate_snr_button.clicked.connect(self.calculate_snr)
         self.calculate_cnr_button.clicked.connect(self.calculate_cnr)
         self.reset_button.clicked.connect(self.reset)
+        self.load_rois_button.clicked.connect(self.load_roi_set)
+        self.export_rois_button.clicked.connect(self.export_roi_table)
+        self.record_session_button.toggled.connect(self.toggle_session_recording)
         self.resolution_dropdown.currentIndexChanged.connect(self.update_resolution)
         self.pixel_count_spinbox.valueChanged.connect(self.update_pixel_count)
 
@@ -438,6 +1349,7 @@ class MedicalImageApp(QMainWindow):
         self.current_roi_type = None
         self.roi_rect = None
         self.axes = [fig.add_subplot(111) for fig in self.figures]
+        self.image_artists = {}  # Axes -> persistent AxesImage
         self.ax_main = self.axes[0]
         self.cid = None
 
@@ -512,8 +1424,87 @@ class MedicalImageApp(QMainWindow):
 
         self.setup_noise_controls()
 
+        self.setup_noise_map_controls()
+
         # Add viewport-specific image storage
         self.viewport_images = {1: None, 2: None}  # Store processed images for each viewport
+        self.viewport_zoom = {1: (1, "Bilinear"), 2: (1, "Bilinear")}  # Zoom factor and interpolation
+        self.viewport_windows = {1: None, 2: None}  # Display window of each processed image
+        self.viewport_rendered = {1: None, 2: None}  # Zoomed-pixel extent currently rendered
+        self.main_pyramid = None  # Multi-resolution pyramid of original_image for the main viewport
+
+        # Re-render the visible part of a zoomed viewport after it is panned
+        self.viewport_render_timers = {}
+        for index in (1, 2):
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda index=index: self.render_viewport(index))
+            self.viewport_render_timers[index] = timer
+            self.axes[index].callbacks.connect('xlim_changed', lambda ax, index=index: self.viewport_limits_changed(index))
+            self.axes[index].callbacks.connect('ylim_changed', lambda ax, index=index: self.viewport_limits_changed(index))
+
+        # Session recording; connected last, so a change is recorded after its handlers ran
+        self.session_recorder = SessionRecorder()
+        self.image_source = None  # Path of the loaded image
+        for name, control in self.session_controls().items():
+            signal = control.currentIndexChanged if isinstance(control, QComboBox) else control.valueChanged
+            signal.connect(lambda _, name=name, control=control:
+                           self.session_recorder.record_control(name, self.control_value(control)))
+
+    def session_controls(self):
+        """Controls recorded in a session, in the order they are restored on replay"""
+        return {
+            "resolution": self.resolution_dropdown,
+            "pixel_count": self.pixel_count_spinbox,
+            "viewport": self.viewport_selector,
+            "zoom": self.zoom_slider,
+            "interpolation": self.interpolation_dropdown,
+            "filter_type": self.filter_type,
+            "cutoff": self.cutoff_slider,
+            "filter_order": self.filter_order_spin,
+            "noise_type": self.noise_type,
+            "denoise_method": self.denoise_method,
+            "noise_strength": self.noise_strength,
+            "noise_seed": self.noise_seed,
+            "noise_map_mode": self.noise_map_mode,
+            "noise_map_window": self.noise_map_window,
+            "contrast_method": self.contrast_method,
+            "clahe_clip": self.clahe_clip,
+            "clahe_grid": self.clahe_grid,
+            "slice": self.slice_slider,
+            "histogram_type": self.histogram_type,
+        }
+
+    @staticmethod
+    def control_value(control):
+        return control.currentText() if isinstance(control, QComboBox) else control.value()
+
+    @staticmethod
+    def set_control_value(control, value):
+        """Set a control as the user would, so its handlers run"""
+        if isinstance(control, QComboBox):
+            control.setCurrentText(value)
+        else:
+            control.setValue(value)
+
+    def toggle_session_recording(self, checked):
+        """Start recording a session, or stop and save it as JSON"""
+        if checked:
+            identity = None
+            if self.volume is not None:
+                identity = SessionRecorder.image_identity(self.volume, self.image_source)
+            controls = {name: self.control_value(control) for name, control in self.session_controls().items()}
+            self.session_recorder.start(identity, controls)
+            self.record_session_button.setText("Stop Recording")
+            self.status_label.setText("Recording session")
+            return
+
+        self.session_recorder.stop()
+        self.record_session_button.setText("Record Session")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Session", "", "JSON Files (*.json)")
+        if file_path:
+            self.session_recorder.save(file_path)
+            self.status_label.setText(f"Session saved: {file_path}")
 
     def setup_noise_controls(self):
         noise_frame = QFrame()
@@ -532,12 +1523,20 @@ class MedicalImageApp(QMainWindow):
         self.noise_strength = QSlider(Qt.Horizontal)
         self.noise_strength.setRange(1, 100)
         self.noise_strength.setValue(25)
+
+        # Seed of the noise realization (same seed, same noise)
+        self.noise_seed = QSpinBox()
+        self.noise_seed.setRange(0, 99999)
+        self.noise_seed.setValue(0)
+        self.noise_engine = NoiseEngine()
         
         # Add widgets to layout
         noise_layout.addWidget(QLabel("Noise Type:"))
         noise_layout.addWidget(self.noise_type)
         noise_layout.addWidget(QLabel("Noise Strength:"))
         noise_layout.addWidget(self.noise_strength)
+        noise_layout.addWidget(QLabel("Noise Seed:"))
+        noise_layout.addWidget(self.noise_seed)
         noise_layout.addWidget(QLabel("Denoising Method:"))
         noise_layout.addWidget(self.denoise_method)
         
@@ -547,7 +1546,73 @@ class MedicalImageApp(QMainWindow):
         self.noise_type.currentIndexChanged.connect(self.process_image)
         self.denoise_method.currentIndexChanged.connect(self.process_image)
         self.noise_strength.valueChanged.connect(self.process_image)
+        self.noise_seed.valueChanged.connect(self.process_image)
     
+    def setup_noise_map_controls(self):
+        noise_map_frame = QFrame()
+        noise_map_frame.setFrameStyle(QFrame.StyledPanel)
+        noise_map_layout = QVBoxLayout(noise_map_frame)
+
+        # Overlay type selector
+        self.noise_map_mode = QComboBox()
+        self.noise_map_mode.addItems(["Off", "Local Std", "Local SNR"])
+
+        # Sliding window size (odd values only)
+        self.noise_map_window = QSpinBox()
+        self.noise_map_window.setRange(3, 101)
+        self.noise_map_window.setSingleStep(2)
+        self.noise_map_window.setValue(15)
+
+        noise_map_layout.addWidget(QLabel("Noise Map:"))
+        noise_map_layout.addWidget(self.noise_map_mode)
+        noise_map_layout.addWidget(QLabel("Noise Map Window:"))
+        noise_map_layout.addWidget(self.noise_map_window)
+
+        self.control_layout.addWidget(noise_map_frame)
+
+        self.noise_map_overlay = None  # Overlay artist in the target viewport
+
+        # Connect signals
+        self.noise_map_mode.currentIndexChanged.connect(self.process_image)
+        self.noise_map_window.valueChanged.connect(self.process_image)
+
+    def draw_noise_map(self, image, ax, zoom_factor=1):
+        """Overlay the local std / local SNR map of image on ax and report a whole-image SNR estimate"""
+        mode = self.noise_map_mode.currentText()
+        overlay_artist = self.noise_map_overlay
+        if overlay_artist is not None and (mode == "Off" or overlay_artist.axes is not ax):
+            overlay_artist.remove()
+            overlay_artist = self.noise_map_overlay = None
+        if mode == "Off" or image is None:
+            return
+
+        window = self.noise_map_window.value() | 1  # Keep the window odd so it is centred
+        local_mean, local_std = IntegralImage(image).window_stats(window)
+
+        # The median local std is a robust estimate of the noise level when most
+        # windows fall in homogeneous regions
+        noise_level = float(np.median(local_std))
+        global_snr = float(local_mean.mean()) / noise_level if noise_level > 0 else 0
+
+        if mode == "Local SNR":
+            with np.errstate(invalid='ignore', divide='ignore'):
+                overlay = np.where(local_std > 0, local_mean / local_std, 0)
+        else:
+            overlay = local_std
+
+        # The overlay is computed at processing resolution and stretched over the zoomed viewport
+        h, w = overlay.shape
+        extent = (-0.5, w * zoom_factor - 0.5, h * zoom_factor - 0.5, -0.5)
+        if overlay_artist is None:
+            self.noise_map_overlay = ax.imshow(overlay, cmap='jet', alpha=0.4, extent=extent)
+        else:
+            overlay_artist.set_data(overlay)
+            overlay_artist.set_extent(extent)
+            overlay_artist.set_clim(overlay.min(), overlay.max())
+        self.status_label.setText(f"Noise map ({window}x{window}):\n"
+                                  f"Noise std: {noise_level:.2f}\n"
+                                  f"SNR estimate: {global_snr:.2f}")
+
     def setup_contrast_controls(self):
         # Create contrast enhancement frame
         contrast_frame = QFrame()
@@ -587,40 +1652,10 @@ class MedicalImageApp(QMainWindow):
         self.clahe_grid.valueChanged.connect(self.apply_contrast_enhancement)
 
     def apply_contrast_enhancement(self):
+        """Enhancement is a pipeline stage: reprocess (which also updates the histogram)"""
         if self.original_image is None:
             return
-            
-        ###################################
-        # Add noise reduction before enhancement
-        denoised_image = cv2.GaussianBlur(self.original_image, (3,3), 0)
-        
-        # Get base image (after any filtering)
-        if self.current_filter_type != "No Filter":
-            base_image = self.apply_filter(self.original_image)
-        else:
-            base_image = self.original_image.copy()
-        
-        # Apply selected contrast enhancement
-        method = self.contrast_method.currentText()
-        if method == "Histogram Equalization":
-            self.adjusted_image = ContrastEnhancement.apply_histogram_equalization(base_image)
-        elif method == "CLAHE":
-            clip_limit = self.clahe_clip.value() / 10.0  # Convert to 0.1-5.0 range
-            grid_size = self.clahe_grid.value()
-            self.adjusted_image = ContrastEnhancement.apply_clahe(base_image, 
-                                                                clip_limit=clip_limit,
-                                                                tile_grid_size=(grid_size, grid_size))
-        elif method == "Adaptive Gamma":
-            self.adjusted_image = ContrastEnhancement.apply_adaptive_gamma(base_image)
-        else:  # None
-            self.adjusted_image = base_image
-            
-        # Update display
         self.process_image()
-        
-        # Update histogram if visible
-        if self.histogram_window.isVisible():
-            self.update_histogram()
 
 
     def show_histogram(self):
@@ -630,22 +1665,23 @@ class MedicalImageApp(QMainWindow):
         self.histogram_window.raise_()  # Bring window to front
     
     def update_histogram(self):
-        """Update the histogram display based on selected viewport"""
-        viewport_selection = self.histogram_type.currentText()
+        """Update the histogram display based on selected viewport or pipeline stage"""
+        selection = self.histogram_type.currentText()
         
-        if viewport_selection == "Main Viewport" and self.original_image is not None:
+        if selection == "Main Viewport":
             image_for_histogram = self.original_image
-            title = "Main Viewport"
-        elif viewport_selection == "Viewport 1" and self.viewport_images[1] is not None:
+        elif selection == "Viewport 1":
             image_for_histogram = self.viewport_images[1]
-            title = "Viewport 1"
-        elif viewport_selection == "Viewport 2" and self.viewport_images[2] is not None:
+        elif selection == "Viewport 2":
             image_for_histogram = self.viewport_images[2]
-            title = "Viewport 2"
         else:
+            image_for_histogram = self.stage_images.get(selection)
+
+        if image_for_histogram is None or image_for_histogram.size == 0:
             return
 
-        self.histogram_window.plot_histogram(image_for_histogram, title)
+        stats = self.statistics_cache.get(selection, image_for_histogram)
+        self.histogram_window.plot_histogram(image_for_histogram, selection, stats)
     
     def update_filter_params(self):
         """Update filter parameters and reprocess image"""
@@ -656,56 +1692,33 @@ class MedicalImageApp(QMainWindow):
         
     def apply_filter(self, image):
         """Apply filter to an image and return the result"""
-        if image is None or not isinstance(image, np.ndarray):
-            return None
-            
-        if image.size == 0 or len(image.shape) < 2:
-            return None
-            
-        # Convert image to float type for FFT
-        image_float = image.astype(float)
-        
-        try:
-            # Apply FFT
-            f_transform = np.fft.fft2(image_float)
-            f_shift = np.fft.fftshift(f_transform)
-            
-            rows, cols = image_float.shape
-            
-            # Create frequency grid
-            u = np.linspace(-0.5, 0.5, cols)
-            v = np.linspace(-0.5, 0.5, rows)
-            U, V = np.meshgrid(u, v)
-            D = np.sqrt(U**2 + V**2)
-            
-            # Create filter mask based on type
-            if self.current_filter_type == "Lowpass":
-                mask = 1 / (1 + (D / self.current_cutoff)**(2 * self.current_order))
-            elif self.current_filter_type == "Highpass":
-                mask = 1 - 1 / (1 + (D / self.current_cutoff)**(2 * self.current_order))
-            else:  # No Filter
-                return image
-            
-            # Apply filter
-            f_shift_filtered = f_shift * mask
-            f_ishift = np.fft.ifftshift(f_shift_filtered)
-            img_back = np.fft.ifft2(f_ishift)
-            filtered_image = np.abs(img_back)
-            
-            # Normalize the filtered image
-            min_val = filtered_image.min()
-            max_val = filtered_image.max()
-            
-            if max_val > min_val:  # Avoid division by zero
-                filtered_image = ((filtered_image - min_val) * (255.0 / (max_val - min_val))).astype(np.uint8)
-            else:
-                filtered_image = np.zeros_like(filtered_image, dtype=np.uint8)
-            
-            return filtered_image
-            
-        except Exception as e:
-            print(f"Error in apply_filter: {str(e)}")
-            return image  # Return original image if filtering fails
+        return ProcessingPipeline.butterworth_filter(image, self.current_filter_type,
+                                                     self.current_cutoff, self.current_order)
+
+    def pipeline_params(self):
+        """Current control values as a ProcessingPipeline parameter dict
+
+        Only processing parameters belong here: the dict is the slice cache key,
+        so display settings (display_params) must not be part of it.
+        """
+        return {
+            "scale": int(self.resolution_dropdown.currentText()),
+            "noise_type": self.noise_type.currentText(),
+            "noise_strength": self.noise_strength.value(),
+            "noise_seed": self.noise_seed.value(),
+            "denoise_method": self.denoise_method.currentText(),
+            "filter_type": self.current_filter_type,
+            "cutoff": self.current_cutoff,
+            "order": self.current_order,
+            "contrast_method": self.contrast_method.currentText(),
+            "clahe_clip": self.clahe_clip.value() / 10.0,  # Convert to 0.1-5.0 range
+            "clahe_grid": self.clahe_grid.value(),
+            "value_range": self.value_range,
+        }
+
+    def display_params(self):
+        """Zoom factor and interpolation of the display step (applied after the pipeline)"""
+        return self.zoom_slider.value(), self.interpolation_dropdown.currentText()
     
     def process_image(self):
         """Process image with current zoom, FOV, filter, and contrast enhancement settings"""
@@ -713,101 +1726,34 @@ class MedicalImageApp(QMainWindow):
             return
 
         try:
-            # First apply resolution scaling
-            scale = max(1, int(self.resolution_dropdown.currentText()))
-            base_image = self.original_image[::scale, ::scale]
-            
-            # Make sure base_image is valid
-            if not isinstance(base_image, np.ndarray) or base_image.size == 0 or len(base_image.shape) < 2:
-                print("Error: Invalid image after scaling")
-                return
-            
-            # Apply noise if selected
-            noise_type = self.noise_type.currentText()
-            strength = self.noise_strength.value()
-            
-            if noise_type == "Gaussian":
-                base_image = NoiseGenerator.add_gaussian_noise(base_image, sigma=strength)
-            elif noise_type == "Salt & Pepper":
-                base_image = NoiseGenerator.add_salt_and_pepper(base_image, prob=strength/500)
-            elif noise_type == "Poisson":
-                base_image = NoiseGenerator.add_poisson_noise(base_image, scale=strength/25)
-            
-            # Apply denoising if selected
-            denoise_method = self.denoise_method.currentText()
-            if denoise_method == "Median":
-                base_image = Denoiser.median_filter(base_image)
-            elif denoise_method == "Bilateral":
-                base_image = Denoiser.bilateral_filter(base_image)
-            elif denoise_method == "Non-local Means":
-                base_image = Denoiser.nlm_filter(base_image)
-            
-            # Apply filter to base image if needed
-            if self.current_filter_type != "No Filter":
-                filtered_image = self.apply_filter(base_image)
-                if filtered_image is not None:
-                    base_image = filtered_image
-            
-            # Apply contrast enhancement
-            method = self.contrast_method.currentText()
-            processed_image = base_image.copy()
-            
-            if method == "Histogram Equalization":
-                base_image = ContrastEnhancement.apply_histogram_equalization(base_image)
-            elif method == "CLAHE":
-                clip_limit = self.clahe_clip.value() / 10.0  # Convert to 0.1-5.0 range
-                grid_size = self.clahe_grid.value()
-                base_image = ContrastEnhancement.apply_clahe(base_image, 
-                                                        clip_limit=clip_limit,
-                                                        tile_grid_size=(grid_size, grid_size))
-            elif method == "Adaptive Gamma":
-                base_image = ContrastEnhancement.apply_adaptive_gamma(base_image)
-            
-            # Apply zoom if needed
-            zoom_factor = self.zoom_slider.value()
-            if zoom_factor > 1:
-                # Map interpolation methods
-                interpolation_methods = {
-                    "Nearest": Image.Resampling.NEAREST,
-                    "Bilinear": Image.Resampling.BILINEAR,
-                    "Cubic": Image.Resampling.BICUBIC
-                }
-                interpolation_method = interpolation_methods.get(
-                    self.interpolation_dropdown.currentText(),
-                    Image.Resampling.BILINEAR
-                )
-
-                # Ensure image is in uint8 format for PIL
-                if base_image.dtype != np.uint8:
-                    min_val = base_image.min()
-                    max_val = base_image.max()
-                    if max_val > min_val:
-                        base_image = ((base_image - min_val) * (255.0 / (max_val - min_val))).astype(np.uint8)
-                    else:
-                        base_image = np.zeros_like(base_image, dtype=np.uint8)
-                
-                # Apply zoom
-                processed_image = np.array(Image.fromarray(base_image).resize(
-                    (base_image.shape[1] * zoom_factor, base_image.shape[0] * zoom_factor),
-                    interpolation_method
-                ))
-            else:
-                processed_image = base_image
-
-            # Store the processed image for the current viewport
-            target_viewport = self.viewport_selector.currentIndex() + 1
-            self.viewport_images[target_viewport] = processed_image
-            
-            # Display in selected viewport
+            run_start = time.perf_counter()
+            stage_ms = {}
+
+            # Only the visible slice is processed; results are cached per slice and parameter set
+            params = self.pipeline_params()
+            key = (self.current_slice, ProcessingPipeline.params_key(params))
+            cached = self.slice_cache.get(key)
+            cache_hit = cached is not None
+            if cached is None:
+                cached = ProcessingPipeline.run(self.original_image, params, self.noise_engine,
+                                                self.current_slice, cache_key=(self.image_id, self.current_slice),
+                                                timings=stage_ms)
+                self.slice_cache.put(key, cached)
+            render_start = time.perf_counter()
+            processed_image, stages = cached
+            self.stage_images = stages or {}  # Background results do not keep stage images
+
+            # Store the processed (un-zoomed) image for the current viewport
             target_index = self.viewport_selector.currentIndex() + 1
+            zoom_factor, interpolation = self.display_params()
+            self.viewport_images[target_index] = processed_image
+            self.viewport_zoom[target_index] = (zoom_factor, interpolation)
+            self.viewport_windows[target_index] = (float(processed_image.min()), float(processed_image.max()))
             ax = self.axes[target_index]
             canvas = self.canvases[target_index]
             
-            # Display the processed image
-            self.display_image(processed_image, ax, canvas)
-            
-            # Apply FOV settings
-            h, w = processed_image.shape
+            # Apply FOV settings in zoomed pixels
+            h, w = processed_image.shape[0] * zoom_factor, processed_image.shape[1] * zoom_factor
             pixel_size = self.pixel_count_spinbox.value()
             
             # Calculate the centered FOV region
@@ -816,56 +1762,233 @@ class MedicalImageApp(QMainWindow):
             x_end = min(w, x_start + pixel_size)
             y_end = min(h, y_start + pixel_size)
             
+            # Only the visible region (plus a margin) is upsampled and displayed
+            self.viewport_rendered[target_index] = None
+            self.render_viewport(target_index, (x_start, y_start, x_end, y_end))
+            self.draw_noise_map(processed_image, ax, zoom_factor)
+            
             # Set the axis limits for the zoomed view
             ax.set_xlim(x_start, x_end)
             ax.set_ylim(y_end, y_start)  # Inverted for correct orientation
             
-            canvas.draw()
+            canvas.draw_idle()
 
-            # Update histogram if it's visible
-            if (self.histogram_window.isVisible() and 
-                self.histogram_type.currentText() == "Adjusted Image" and
-                self.adjusted_image is not None):
+            # Update histogram if it's visible; unchanged stages reuse their cached statistics
+            if self.histogram_window.isVisible():
                 self.update_histogram()
+
+            end = time.perf_counter()
+            self.session_recorder.record_run(run_start, cache_hit, stage_ms,
+                                             (end - render_start) * 1000, (end - run_start) * 1000)
             
         except Exception as e:
             print(f"Error in process_image: {str(e)}")
     
+    def viewport_limits_changed(self, index):
+        """Schedule a re-render when a viewport is panned outside the region it has rendered"""
+        rendered = self.viewport_rendered[index]
+        if rendered is None:
+            return
+        x0, x1 = sorted(self.axes[index].get_xlim())
+        y0, y1 = sorted(self.axes[index].get_ylim())
+        left, right, bottom, top = rendered
+        if x0 < left or x1 > right or y0 < top or y1 > bottom:
+            self.viewport_render_timers[index].start(0)
+
+    def render_viewport(self, index, region=None):
+        """Zoom and display the part of a viewport's processed image inside region (default: current view)"""
+        image = self.viewport_images[index]
+        if image is None:
+            return
+        ax = self.axes[index]
+        if region is None:
+            x0, x1 = sorted(ax.get_xlim())
+            y0, y1 = sorted(ax.get_ylim())
+            region = (x0, y0, x1, y1)
+
+        zoom_factor, interpolation = self.viewport_zoom[index]
+        crop, extent = ProcessingPipeline.zoom_region(image, zoom_factor, interpolation, region)
+        self.viewport_rendered[index] = extent
+        self.display_image(crop, ax, self.canvases[index], self.viewport_windows[index], extent)
+
     def apply_zoom(self):
         """Trigger image processing when zoom changes"""
         self.process_image()
   
     def load_image(self):
-        """Load an image file (DICOM or common image formats)."""
+        """Load an image file (DICOM or common image formats), single images or stacks."""
         file_path, _ = QFileDialog.getOpenFileName(self, "Load Image File", "",
-                                                   "Image Files (*.dcm *.png *.jpg *.jpeg *.bmp *.tiff);;All Files (*)")
+                                                   "Image Files (*.dcm *.png *.jpg *.jpeg *.bmp *.tiff *.tif);;All Files (*)")
         if file_path:
-            if file_path.lower().endswith('.dcm'):
-                dataset = pydicom.dcmread(file_path)
-                self.original_image = dataset.pixel_array
-            else:
-                image = Image.open(file_path).convert('L')
-                self.original_image = np.array(image)
+            self.load_image_file(file_path)
+
+    def load_image_file(self, file_path):
+        """Read a DICOM or common image file (single image or stack) and show it"""
+        if file_path.lower().endswith('.dcm'):
+            dataset = pydicom.dcmread(file_path)
+            pixel_array = dataset.pixel_array
+            # Multi-frame DICOMs and volumes are (frames, rows, columns)
+            is_stack = pixel_array.ndim == 3 and getattr(dataset, 'SamplesPerPixel', 1) == 1
+            volume = pixel_array if is_stack else pixel_array[np.newaxis]
+            value_range, display_window = self.dicom_intensity_range(dataset, pixel_array)
+        else:
+            image = Image.open(file_path)
+            frames = []
+            for index in range(getattr(image, 'n_frames', 1)):  # Multi-page TIFFs
+                image.seek(index)
+                frames.append(np.array(image.convert('L')))
+            volume = np.stack(frames)
+            value_range, display_window = (0, 255), None
+        self.set_volume(volume, value_range, display_window, source=file_path)
+
+    def set_volume(self, volume, value_range=(0, 255), display_window=None, source=None):
+        """Show a (slices, rows, columns) stack, starting at its middle slice"""
+        self.volume = volume
+        self.value_range, self.display_window = value_range, display_window
+        self.image_source = source
+
+        self.cancel_stack_processing()
+        self.image_id += 1
+        self.noise_engine.clear()
+        self.slice_cache.clear()
+        self.slice_cache.capacity = max(64, len(self.volume))
+
+        num_slices = len(self.volume)
+        self.slice_slider.blockSignals(True)
+        self.slice_slider.setRange(0, num_slices - 1)
+        self.slice_slider.setValue(num_slices // 2)
+        self.slice_slider.blockSignals(False)
+        self.slice_frame.setVisible(num_slices > 1)
+        self.show_slice(num_slices // 2)
+
+        if self.session_recorder.recording:
+            self.session_recorder.record_load(SessionRecorder.image_identity(volume, source))
+
+    def display_main_image(self):
+        """Show the whole current slice in the main viewport from the coarsest sufficient pyramid level"""
+        self.main_pyramid = ImagePyramid(self.original_image)
+        canvas = self.canvases[0]
+        level = self.main_pyramid.level_for(canvas.width() * canvas.device_pixel_ratio)
+        h, w = self.original_image.shape[:2]
+
+        # Each level pixel covers w / level width original pixels; the extent keeps original coordinates
+        self.display_image(level, self.ax_main, canvas, self.display_window,
+                           extent=(-0.5, w - 0.5, h - 0.5, -0.5))
+        self.ax_main.set_xlim(0, w)
+        self.ax_main.set_ylim(h, 0)
 
-            self.image = self.original_image.copy()
-            self.display_image(self.image, self.ax_main, self.canvases[0])
-            
-            # Update histogram if window is visible
-            if self.histogram_window.isVisible():
-                self.update_histogram()
+    @staticmethod
+    def dicom_intensity_range(dataset, pixel_array):
+        """Nominal value range from BitsStored and the default display window of a DICOM dataset"""
+        bits = int(getattr(dataset, 'BitsStored', pixel_array.dtype.itemsize * 8))
+        if getattr(dataset, 'PixelRepresentation', 0) == 1:
+            value_range = (-(2 ** (bits - 1)), 2 ** (bits - 1) - 1)
+        else:
+            value_range = (0, 2 ** bits - 1)
+
+        window = None
+        center, width = dataset.get('WindowCenter'), dataset.get('WindowWidth')
+        if center is not None and width is not None:
+            # Both may be multi-valued; the first pair is the default window
+            center = float(center[0] if isinstance(center, pydicom.multival.MultiValue) else center)
+            width = float(width[0] if isinstance(width, pydicom.multival.MultiValue) else width)
+            window = (center - width / 2, center + width / 2)
+        return value_range, window
+
+    def show_slice(self, index):
+        """Make slice index of the loaded stack the current image"""
+        if self.volume is None:
+            return
+        self.current_slice = index
+        self.slice_label.setText(f"Slice: {index + 1} / {len(self.volume)}")
+        self.original_image = self.volume[index]
+        self.image = self.original_image.copy()
+        self.display_main_image()
+        if self.viewport_images[1] is not None or self.viewport_images[2] is not None:
+            self.process_image()
+
+        # Update histogram if window is visible
+        if self.histogram_window.isVisible():
+            self.update_histogram()
+
+    def process_stack(self):
+        """Process every slice of the stack in the background with the current parameters"""
+        if self.volume is None or len(self.volume) < 2:
+            return
+        self.cancel_stack_processing()
+
+        params = self.pipeline_params()
+        params_key = ProcessingPipeline.params_key(params)
+        volume = self.volume
+
+        # Numpy/OpenCV release the GIL, so a thread pool keeps all cores busy
+        self.stack_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        self.stack_jobs = {}
+        for index in range(len(volume)):
+            if (index, params_key) not in self.slice_cache:
+                self.stack_jobs[(index, params_key)] = self.stack_executor.submit(
+                    ProcessingPipeline.run, volume[index], params, self.noise_engine, index)
+        self.stack_job_total = len(self.stack_jobs)
+        self.stack_timer.start(200)
+
+    def collect_stack_results(self):
+        """Move finished background results into the slice cache and report progress"""
+        for key, future in list(self.stack_jobs.items()):
+            if future.done():
+                del self.stack_jobs[key]
+                if future.exception() is None:
+                    processed_image, _ = future.result()
+                    # Only the final image is kept for background results to bound memory
+                    self.slice_cache.put(key, (processed_image, None))
+
+        done = self.stack_job_total - len(self.stack_jobs)
+        self.status_label.setText(f"Processing stack: {done} / {self.stack_job_total}")
+        if not self.stack_jobs:
+            self.cancel_stack_processing()
+            self.status_label.setText(f"Stack processed ({self.stack_job_total} slices)")
+
+    def cancel_stack_processing(self):
+        """Stop the background stack job, if any"""
+        self.stack_timer.stop()
+        if self.stack_executor is not None:
+            self.stack_executor.shutdown(wait=False, cancel_futures=True)
+            self.stack_executor = None
+        self.stack_jobs = {}
+
+    def display_image(self, image, ax, canvas, window=None, extent=None):
+        """Display image in a specified viewport with proper aspect ratio.
+
+        Each viewport keeps one image artist whose pixel buffer is replaced in
+        place, so ROI rectangles and overlays stay on the axes between updates.
+        The image is converted to 8 bits here, once, with the (lo, hi) window
+        (image min/max by default). When an extent is given the image is a part
+        (or a pyramid level) of a larger image and the view limits are kept.
+        """
+        if image is None or image.size == 0 or image.shape[0] == 0 or image.shape[1] == 0:
+            return
 
-    def display_image(self, image, ax, canvas):
-        """Display image in a specified viewport with proper aspect ratio."""
-        ax.clear()
-        if image is not None and image.size > 0 and image.shape[0] > 0 and image.shape[1] > 0:
-            ax.imshow(image, cmap='gray')
+        h, w = image.shape[:2]
+        # Matplotlib copies the data in set_data, so the viewport's buffers can be reused every frame
+        out = self.image_bridge.buffer(("display", id(ax)), (h, w))
+        scratch = None
+        if image.dtype.kind == 'f':
+            scratch = self.image_bridge.buffer(("display_scratch", id(ax)), (h, w), np.float32)
+        display = self.window_level.apply(image, window, out, scratch)
+        artist = self.image_artists.get(ax)
+        if artist is None:
+            artist = ax.imshow(display, cmap='gray', vmin=0, vmax=255)
+            self.image_artists[ax] = artist
             ax.axis('on')  # Show axes for better navigation
+        else:
+            artist.set_data(display)
+        artist.set_extent(extent if extent is not None else (-0.5, w - 0.5, h - 0.5, -0.5))
 
+        if extent is None:
             # Reset the view limits to show the full image
-            ax.set_xlim(0, image.shape[1])
-            ax.set_ylim(image.shape[0], 0)  # Inverted for proper image orientation
+            ax.set_xlim(0, w)
+            ax.set_ylim(h, 0)  # Inverted for proper image orientation
 
-            canvas.draw()
+        canvas.draw_idle()
 
     def start_roi_selection(self, roi_type):
         """Start the process to select Signal or Noise ROI."""
@@ -911,16 +2034,12 @@ class MedicalImageApp(QMainWindow):
                 ax.add_patch(rect)
                 self.signal_roi_rects.append(rect)
 
-            # Store ROIs for all viewports
-            self.signal_rois = []
-            self.signal_rois.append(self.image[y:y + height, x:x + width])  # Original image
-            if self.adjusted_image is not None:
-                self.signal_rois.append(self.adjusted_image[y:y + height, x:x + width])  # Adjusted image 1
-                self.signal_rois.append(self.adjusted_image[y:y + height, x:x + width])  # Adjusted image 2
+            # Store ROI coordinates; statistics are computed for all viewports at once
+            self.roi_engine.add_roi(x, y, width, height, "signal")
 
             # Update all canvases
             for canvas in self.canvases:
-                canvas.draw()
+                canvas.draw_idle()
 
             self.current_process_state = "select_signal2"
             self.status_label.setText("Select Signal ROI 2")
@@ -941,16 +2060,12 @@ class MedicalImageApp(QMainWindow):
                 ax.add_patch(rect)
                 self.signal2_roi_rects.append(rect)
 
-            # Store ROIs for all viewports
-            self.signal2_rois = []
-            self.signal2_rois.append(self.image[y:y + height, x:x + width])  # Original image
-            if self.adjusted_image is not None:
-                self.signal2_rois.append(self.adjusted_image[y:y + height, x:x + width])  # Adjusted image 1
-                self.signal2_rois.append(self.adjusted_image[y:y + height, x:x + width])  # Adjusted image 2
+            # Store ROI coordinates; statistics are computed for all viewports at once
+            self.roi_engine.add_roi(x, y, width, height, "signal2")
 
             # Update all canvases
             for canvas in self.canvases:
-                canvas.draw()
+                canvas.draw_idle()
 
             self.current_process_state = "select_noise"
             self.status_label.setText("Select Noise ROI")
@@ -971,16 +2086,12 @@ class MedicalImageApp(QMainWindow):
                 ax.add_patch(rect)
                 self.noise_roi_rects.append(rect)
 
-            # Store ROIs for all viewports
-            self.noise_rois = []
-            self.noise_rois.append(self.image[y:y + height, x:x + width])  # Original image
-            if self.adjusted_image is not None:
-                self.noise_rois.append(self.adjusted_image[y:y + height, x:x + width])  # Adjusted image 1
-                self.noise_rois.append(self.adjusted_image[y:y + height, x:x + width])  # Adjusted image 2
+            # Store ROI coordinates; statistics are computed for all viewports at once
+            self.roi_engine.add_roi(x, y, width, height, "noise")
 
             # Update all canvases
             for canvas in self.canvases:
-                canvas.draw()
+                canvas.draw_idle()
 
             self.current_process_state = "calculate"
             self.status_label.setText("Calculate SNR/CNR")
@@ -988,98 +2099,84 @@ class MedicalImageApp(QMainWindow):
             self.calculate_snr_button.setEnabled(True)
             self.calculate_cnr_button.setEnabled(True)
 
+    def measurement_images(self):
+        """Images the ROIs are measured on, keyed by display name"""
+        return {
+            "Original Image": self.image,
+            "Viewport 1": self.viewport_images[1],
+            "Viewport 2": self.viewport_images[2],
+        }
+
+    @staticmethod
+    def format_ratios(values):
+        """Format one value per ROI (or the mean over many ROIs) for the status label"""
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return "N/A"
+        if len(values) == 1:
+            return f"{values[0]:.2f}"
+        return f"{values.mean():.2f} (mean of {len(values)})"
+
     def calculate_snr(self):
         """Calculate and display the Signal-to-Noise Ratio (SNR) for all images"""
-        if hasattr(self, 'signal_rois') and hasattr(self, 'noise_rois'):
+        if self.roi_engine.count("signal") and self.roi_engine.count("noise"):
             snr_text = "SNR Results:\n"
-            
-            # Calculate SNR for original image
-            signal_mean = np.mean(self.signal_rois[0])
-            noise_std = np.std(self.noise_rois[0])
-            snr = signal_mean / noise_std if noise_std != 0 else 0
-            snr_text += f"Original Image: {snr:.2f}\n"
-            
-            # Calculate SNR for viewport 1
-            if self.viewport_images[1] is not None:
-                # Get ROI coordinates
-                x, y, width, height = self.signal_roi_coords
-                noise_x, noise_y, noise_width, noise_height = self.noise_roi_coords
-                
-                # Extract ROIs from viewport 1's image
-                viewport1_signal = self.viewport_images[1][y:y+height, x:x+width]
-                viewport1_noise = self.viewport_images[1][noise_y:noise_y+noise_height, 
-                                                        noise_x:noise_x+noise_width]
-                
-                signal_mean = np.mean(viewport1_signal)
-                noise_std = np.std(viewport1_noise)
-                snr = signal_mean / noise_std if noise_std != 0 else 0
-                snr_text += f"Viewport 1: {snr:.2f}\n"
-            
-            # Calculate SNR for viewport 2
-            if self.viewport_images[2] is not None:
-                # Extract ROIs from viewport 2's image
-                viewport2_signal = self.viewport_images[2][y:y+height, x:x+width]
-                viewport2_noise = self.viewport_images[2][noise_y:noise_y+noise_height, 
-                                                        noise_x:noise_x+noise_width]
-                
-                signal_mean = np.mean(viewport2_signal)
-                noise_std = np.std(viewport2_noise)
-                snr = signal_mean / noise_std if noise_std != 0 else 0
-                snr_text += f"Viewport 2: {snr:.2f}\n"
-            
+            for name, snr in self.roi_engine.snr(self.measurement_images()).items():
+                snr_text += f"{name}: {self.format_ratios(snr)}\n"
             self.status_label.setText(snr_text)
         else:
             self.status_label.setText("Please select both signal and noise ROIs.")
 
     def calculate_cnr(self):
         """Calculate and display the Contrast-to-Noise Ratio (CNR) for all images"""
-        if hasattr(self, 'signal_rois') and hasattr(self, 'signal2_rois') and hasattr(self, 'noise_rois'):
+        if (self.roi_engine.count("signal") and self.roi_engine.count("signal2")
+                and self.roi_engine.count("noise")):
             cnr_text = "CNR Results:\n"
-            
-            # Calculate CNR for original image
-            signal1_mean = np.mean(self.signal_rois[0])
-            signal2_mean = np.mean(self.signal2_rois[0])
-            noise_std = np.std(self.noise_rois[0])
-            cnr = abs(signal1_mean - signal2_mean) / noise_std if noise_std != 0 else 0
-            cnr_text += f"Original Image: {cnr:.2f}\n"
-            
-            # Calculate CNR for viewport 1
-            if self.viewport_images[1] is not None:
-                # Get ROI coordinates
-                x1, y1, width1, height1 = self.signal_roi_coords
-                x2, y2, width2, height2 = self.signal2_roi_coords
-                noise_x, noise_y, noise_width, noise_height = self.noise_roi_coords
-                
-                # Extract ROIs from viewport 1's image
-                viewport1_signal1 = self.viewport_images[1][y1:y1+height1, x1:x1+width1]
-                viewport1_signal2 = self.viewport_images[1][y2:y2+height2, x2:x2+width2]
-                viewport1_noise = self.viewport_images[1][noise_y:noise_y+noise_height, 
-                                                        noise_x:noise_x+noise_width]
-                
-                signal1_mean = np.mean(viewport1_signal1)
-                signal2_mean = np.mean(viewport1_signal2)
-                noise_std = np.std(viewport1_noise)
-                cnr = abs(signal1_mean - signal2_mean) / noise_std if noise_std != 0 else 0
-                cnr_text += f"Viewport 1: {cnr:.2f}\n"
-            
-            # Calculate CNR for viewport 2
-            if self.viewport_images[2] is not None:
-                # Extract ROIs from viewport 2's image
-                viewport2_signal1 = self.viewport_images[2][y1:y1+height1, x1:x1+width1]
-                viewport2_signal2 = self.viewport_images[2][y2:y2+height2, x2:x2+width2]
-                viewport2_noise = self.viewport_images[2][noise_y:noise_y+noise_height, 
-                                                        noise_x:noise_x+noise_width]
-                
-                signal1_mean = np.mean(viewport2_signal1)
-                signal2_mean = np.mean(viewport2_signal2)
-                noise_std = np.std(viewport2_noise)
-                cnr = abs(signal1_mean - signal2_mean) / noise_std if noise_std != 0 else 0
-                cnr_text += f"Viewport 2: {cnr:.2f}\n"
-            
+            for name, cnr in self.roi_engine.cnr(self.measurement_images()).items():
+                cnr_text += f"{name}: {self.format_ratios(cnr)}\n"
             self.status_label.setText(cnr_text)
         else:
             self.status_label.setText("Please select all required ROIs.")
 
+    def load_roi_set(self):
+        """Load a set of ROIs (kind, x, y, width, height) from a CSV file"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Load ROI Set", "", "CSV Files (*.csv)")
+        if not file_path:
+            return
+        first = len(self.roi_engine)
+        try:
+            self.roi_engine.load_csv(file_path)
+        except (OSError, KeyError, ValueError) as e:
+            self.status_label.setText(f"Failed to load ROIs: {e}")
+            return
+
+        # Outline the ROIs of this file in every viewport (earlier ones are already drawn)
+        colors = {"signal": 'r', "signal2": 'b', "noise": 'g'}
+        for (x, y, width, height), kind in zip(self.roi_engine.boxes[first:].tolist(),
+                                               self.roi_engine.kinds[first:]):
+            for ax in self.axes:
+                rect = Rectangle((x, y), width, height, linewidth=1,
+                                 edgecolor=colors[ROIMeasurementEngine.KINDS[kind]], facecolor='none')
+                ax.add_patch(rect)
+                self.loaded_roi_rects.append(rect)
+        for canvas in self.canvases:
+            canvas.draw_idle()
+
+        self.status_label.setText(f"{len(self.roi_engine) - first} ROIs loaded ({len(self.roi_engine)} in total)")
+        self.current_process_state = "calculate"
+        self.calculate_snr_button.setEnabled(True)
+        self.calculate_cnr_button.setEnabled(True)
+
+    def export_roi_table(self):
+        """Export mean/std/SNR/CNR of every ROI on every image as a CSV table"""
+        if len(self.roi_engine) == 0:
+            self.status_label.setText("No ROIs to export.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export ROI Table", "", "CSV Files (*.csv)")
+        if file_path:
+            self.roi_engine.export_csv(file_path, self.measurement_images())
+            self.status_label.setText(f"ROI table saved: {file_path}")
+
     def adjust_fov(self):
         """Adjust the Field of View (FOV) and display in the selected viewport without cropping."""
         if self.original_image is not None:
@@ -1090,23 +2187,16 @@ class MedicalImageApp(QMainWindow):
             # Apply current zoom if any
             zoom_factor = self.zoom_slider.value()
             if zoom_factor > 1:
-                interpolation_methods = {
-                    "Nearest": Image.Resampling.NEAREST,
-                    "Bilinear": Image.Resampling.BILINEAR,
-                    "Cubic": Image.Resampling.BICUBIC
-                }
-                interpolation_method = interpolation_methods.get(
+                interpolation_method = ProcessingPipeline.INTERPOLATION_METHODS.get(
                     self.interpolation_dropdown.currentText(), 
-                    Image.Resampling.BILINEAR
+                    cv2.INTER_LINEAR
                 )
                 
-                # Convert to uint8 and ensure proper image format
-                base_image_uint8 = ((base_image - base_image.min()) * (255.0 / (base_image.max() - base_image.min()))).astype(np.uint8)
-                
-                self.adjusted_image = np.array(Image.fromarray(base_image_uint8).resize(
+                self.adjusted_image = cv2.resize(
+                    base_image.astype(np.float32),
                     (base_image.shape[1] * zoom_factor, base_image.shape[0] * zoom_factor),
-                    interpolation_method
-                ))
+                    interpolation=interpolation_method
+                )
             else:
                 self.adjusted_image = base_image
 
@@ -1133,7 +2223,7 @@ class MedicalImageApp(QMainWindow):
             ax.set_xlim(x_start, x_end)
             ax.set_ylim(y_end, y_start)  # Inverted for correct orientation
 
-            canvas.draw()
+            canvas.draw_idle()
 
 
 
@@ -1148,9 +2238,7 @@ class MedicalImageApp(QMainWindow):
     def reset(self):
         """Reset all ROIs and calculations across all viewports"""
         # Clear stored ROIs
-        self.signal_rois = []
-        self.signal2_rois = []
-        self.noise_rois = []
+        self.roi_engine.clear()
         
         # Remove rectangles from all viewports
         if hasattr(self, 'signal_roi_rects'):
@@ -1162,6 +2250,9 @@ class MedicalImageApp(QMainWindow):
         if hasattr(self, 'noise_roi_rects'):
             for rect in self.noise_roi_rects:
                 rect.remove()
+        for rect in self.loaded_roi_rects:
+            rect.remove()
+        self.loaded_roi_rects = []
                 
         # Reset coordinates
         self.signal_roi_coords = None
@@ -1179,7 +2270,7 @@ class MedicalImageApp(QMainWindow):
         
         # Update all canvases
         for canvas in self.canvases:
-            canvas.draw()
+            canvas.draw_idle()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""Speed/quality benchmark of MediPixel's denoising and contrast methods
+
+Builds Shepp-Logan phantoms at several sizes, adds seeded noise with the
+viewer's NoiseGenerator at several strengths and runs every denoiser and
+contrast method on them with the parameters the viewer uses. For each run it
+records wall time, throughput (MP/s), peak Python-side memory (tracemalloc)
+and, for the denoisers, PSNR/SSIM against the clean phantom.
+
+    python denoise_benchmark.py --sizes 256 512 1024 --strengths 10 25 50 --csv report.csv
+    python denoise_benchmark.py --json new.json --baseline old.json
+
+With --baseline, methods that got slower than --tolerance (default 20%)
+compared to an earlier --json report are listed and the exit code is 1.
+"""
+import sys
+import csv
+import json
+import time
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+from skimage.data import shepp_logan_phantom
+from skimage.metrics import peak_signal_noise_ratio, structural_similarity
+
+from viewer_module import load_viewer
+
+
+viewer = load_viewer()
+
+VALUE_RANGE = (0, 255)
+
+DENOISERS = {
+    "Median": lambda image: viewer.Denoiser.median_filter(image),
+    "Bilateral": lambda image: viewer.Denoiser.bilateral_filter(image),
+    "Non-local Means": lambda image: viewer.Denoiser.nlm_filter(image),
+}
+
+CONTRAST_METHODS = {
+    "Histogram Equalization": lambda image: viewer.ContrastEnhancement.apply_histogram_equalization(image),
+    "CLAHE": lambda image: viewer.ContrastEnhancement.apply_clahe(image, 2.0, (8, 8)),
+    "Adaptive Gamma": lambda image: viewer.ContrastEnhancement.apply_adaptive_gamma(image),
+}
+
+COLUMNS = ["stage", "method", "size", "noise_type", "strength", "time_ms",
+           "mp_per_s", "peak_mb", "psnr", "ssim"]
+
+
+def make_phantom(size):
+    """Clean float32 Shepp-Logan phantom of size x size pixels in 0-255"""
+    phantom = cv2.resize(shepp_logan_phantom().astype(np.float32), (size, size),
+                         interpolation=cv2.INTER_CUBIC)
+    return np.clip(phantom * 255, *VALUE_RANGE)
+
+
+def time_method(method, image, repeats):
+    """Best wall time (s) over repeats and peak traced memory (bytes) of one run"""
+    method(image)  # Warm up (OpenCV thread pool, lazy initialization)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = method(image)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    method(image)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, output
+
+
+def quality(clean, output):
+    """PSNR (dB) and SSIM of output against the clean phantom"""
+    output = np.asarray(output, dtype=np.float32)
+    data_range = VALUE_RANGE[1] - VALUE_RANGE[0]
+    return (peak_signal_noise_ratio(clean, output, data_range=data_range),
+            structural_similarity(clean, output, data_range=data_range))
+
+
+def run_benchmark(sizes, noise_type, strengths, repeats, seed=0):
+    """Benchmark every method, returns a list of result rows (dicts with COLUMNS)"""
+    rows = []
+    for size in sizes:
+        clean = make_phantom(size)
+        megapixels = clean.size / 1e6
+
+        for strength in strengths:
+            rng = viewer.NoiseEngine.generator(seed, noise_type, strength)
+            noisy = viewer.NoiseEngine.add_noise(clean, noise_type, strength, VALUE_RANGE, rng)
+            psnr, ssim = quality(clean, noisy)
+            rows.append({"stage": "noisy", "method": "None", "size": size, "noise_type": noise_type,
+                         "strength": strength, "time_ms": 0.0, "mp_per_s": "", "peak_mb": 0.0,
+                         "psnr": psnr, "ssim": ssim})
+
+            for name, method in DENOISERS.items():
+                seconds, peak, output = time_method(method, noisy, repeats)
+                psnr, ssim = quality(clean, output)
+                rows.append({"stage": "denoise", "method": name, "size": size, "noise_type": noise_type,
+                             "strength": strength, "time_ms": seconds * 1000,
+                             "mp_per_s": megapixels / seconds, "peak_mb": peak / 2**20,
+                             "psnr": psnr, "ssim": ssim})
+
+        # Contrast methods do not aim at the clean phantom, only their speed is measured
+        for name, method in CONTRAST_METHODS.items():
+            seconds, peak, _ = time_method(method, clean, repeats)
+            rows.append({"stage": "contrast", "method": name, "size": size, "noise_type": "",
+                         "strength": "", "time_ms": seconds * 1000,
+                         "mp_per_s": megapixels / seconds, "peak_mb": peak / 2**20,
+                         "psnr": "", "ssim": ""})
+    return rows
+
+
+def format_value(value, digits):
+    return f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+
+def print_report(rows):
+    header = f"{'stage':<9}{'method':<24}{'size':>6}{'strength':>10}{'ms':>10}{'MP/s':>9}{'peak MB':>9}{'PSNR':>8}{'SSIM':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['stage']:<9}{row['method']:<24}{row['size']:>6}{str(row['strength']):>10}"
+              f"{format_value(row['time_ms'], 2):>10}{format_value(row['mp_per_s'], 1):>9}"
+              f"{format_value(row['peak_mb'], 1):>9}{format_value(row['psnr'], 2):>8}"
+              f"{format_value(row['ssim'], 3):>8}")
+
+
+def find_regressions(rows, baseline_rows, tolerance):
+    """Runs that are more than tolerance (fraction) slower than in the baseline"""
+    key = lambda row: (row["stage"], row["method"], row["size"], str(row["strength"]))
+    baseline = {key(row): row for row in baseline_rows if row["time_ms"]}
+    regressions = []
+    for row in rows:
+        old = baseline.get(key(row))
+        if old and row["time_ms"] > old["time_ms"] * (1 + tolerance):
+            regressions.append((row, old["time_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MediPixel denoising and contrast methods")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--noise-type", default="Gaussian", choices=viewer.NoiseEngine.NOISE_TYPES)
+    parser.add_argument("--strengths", type=int, nargs="+", default=[10, 25, 50],
+                        help="noise strengths as on the GUI slider (1-100)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write the report as CSV")
+    parser.add_argument("--json", help="write the report as JSON (usable as a --baseline later)")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare timings with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.sizes, args.noise_type, args.strengths, args.repeats, args.seed)
+    print_report(rows)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(rows, json.load(f), args.tolerance)
+        for row, old_ms in regressions:
+            strength = f", strength {row['strength']}" if row["strength"] != "" else ""
+            print(f"Regression: {row['method']} ({row['stage']}, {row['size']}px{strength}): "
+                  f"{old_ms:.2f} ms -> {row['time_ms']:.2f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Reusable numpy buffers and Qt snapshot copies for MediPixel
+
+Matplotlib copies image data in set_data, so the viewer gains nothing from
+wrapping arrays as QImages; what it needs is output buffers that are reused
+frame after frame (display windowing) and QImage copies of canvas renders
+that go into a reused buffer (pan snapshots). There is no zero-copy
+QImage path here for that reason; DicomShow, which draws QImages itself,
+has one in its own version of this module.
+"""
+import numpy as np
+from PyQt5.QtGui import QImage
+
+
+class ImageBridge:
+    def __init__(self):
+        self._buffers = {}  # Key -> reusable output array
+
+    def buffer(self, key, shape, dtype=np.uint8):
+        """Output array for key, reused while the shape and dtype stay the same"""
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        array = self._buffers.get(key)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = np.empty(shape, dtype=dtype)
+            self._buffers[key] = array
+        return array
+
+    def copy_to_qimage(self, key, data, width, height, image_format, bytes_per_line=None):
+        """QImage holding a copy of a foreign buffer (e.g. a canvas that is redrawn later)
+
+        The copy goes into the reusable buffer of key, so repeated snapshots of
+        the same size do not allocate.
+        """
+        source = np.frombuffer(data, dtype=np.uint8)
+        bytes_per_line = bytes_per_line or source.size // height
+        array = self.buffer(key, (height, bytes_per_line))
+        np.copyto(array, source[:height * bytes_per_line].reshape(height, bytes_per_line))
+        image = QImage(array.data, width, height, bytes_per_line, image_format)
+        image.ndarray = array
+        return image
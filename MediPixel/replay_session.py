@@ -0,0 +1,175 @@
+"""Replay a recorded MediPixel session headlessly as a benchmark
+
+Sessions are recorded with the "Record Session" button of the viewer. The
+replay loads the session's image, restores the recorded control values and
+then applies every recorded control change in order, as fast as possible.
+The replaying window records its own session, so every change is timed over
+the same span as in the recording (from its first process_image run until
+its handlers return), together with the processing stages of those runs,
+and the report puts the recorded and replayed timings side by side.
+Deferred canvas draws are flushed after every change and reported
+separately.
+
+    python replay_session.py session.json
+    python replay_session.py session.json --image scan.dcm --repeat 3 --json replay.json
+
+If the recorded image file is missing and no --image is given, a random
+image with the recorded shape and dtype is used (timings then depend on
+content only as far as the methods do).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+from viewer_module import load_viewer
+
+
+viewer = load_viewer()
+
+
+def load_session_image(window, identity, image_path=None):
+    """Load the session's image into window; returns a note on how it was obtained"""
+    path = image_path or (identity or {}).get("source")
+    if path and os.path.isfile(path):
+        window.load_image_file(path)
+        if identity and viewer.SessionRecorder.image_identity(window.volume, path)["sha1"] != identity["sha1"]:
+            return f"{path} (contents differ from the recorded image)"
+        return path
+
+    if identity is None:
+        raise ValueError("The session was started without an image; pass one with --image")
+    rng = np.random.default_rng(0)
+    dtype = np.dtype(identity["dtype"])
+    if dtype.kind == 'f':
+        volume = rng.random(identity["shape"]).astype(dtype) * 255
+        value_range = (0, 255)
+    else:
+        info = np.iinfo(dtype)
+        volume = rng.integers(info.min, info.max, identity["shape"], dtype=dtype, endpoint=True)
+        value_range = (int(info.min), int(info.max))
+    window.set_volume(volume, value_range)
+    return f"random {dtype} image {identity['shape']} (recorded image not found)"
+
+
+def settle(app, window):
+    """Run pending timers and deferred draws, so the next change starts from an idle window"""
+    app.processEvents()
+    for canvas in window.canvases:
+        canvas.draw()
+
+
+def replay(session_events, image_path=None):
+    """Replay one session, returns (image note, [per-event result dicts])"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = viewer.MedicalImageApp()
+    window.show()
+
+    start = session_events[0]
+    note = load_session_image(window, start.get("image"), image_path)
+    controls = window.session_controls()
+    for name, value in start["controls"].items():
+        if name in controls:
+            window.set_control_value(controls[name], value)
+    settle(app, window)
+
+    # The replaying window records its own runs, which gives their stage timings
+    window.session_recorder.start(None, start["controls"])
+    results = []
+    recorded = window.session_recorder.events
+    for event in session_events[1:]:
+        count = len(recorded)
+        if event["type"] == "load":
+            load_session_image(window, event["image"], image_path)
+            name, value = "load", event["image"].get("source")
+        elif event["type"] == "control" and event["name"] in controls:
+            name, value = event["name"], event["value"]
+            window.set_control_value(controls[name], value)
+        else:
+            continue
+        begin = time.perf_counter()
+        settle(app, window)
+        draw_ms = (time.perf_counter() - begin) * 1000
+
+        # A change that did not alter the control (same value) records nothing
+        replayed = recorded[-1] if len(recorded) > count else {"elapsed_ms": None, "runs": []}
+        runs = replayed["runs"]
+        results.append({
+            "t": event["t"],
+            "name": name,
+            "value": value,
+            "recorded_ms": event.get("elapsed_ms"),
+            "replay_ms": replayed["elapsed_ms"],
+            "draw_ms": draw_ms,
+            "recorded_stage_ms": merge_stage_ms(event.get("runs", [])),
+            "replay_stage_ms": merge_stage_ms(runs),
+        })
+    window.close()
+    return note, results
+
+
+def merge_stage_ms(runs):
+    """Sum the stage timings of several process_image runs"""
+    total = {}
+    for run in runs:
+        for stage, ms in run["stage_ms"].items():
+            total[stage] = total.get(stage, 0.0) + ms
+        total["render"] = total.get("render", 0.0) + run["render_ms"]
+    return total
+
+
+def format_stages(stage_ms):
+    return " ".join(f"{stage}={ms:.1f}" for stage, ms in stage_ms.items() if ms >= 0.05) or "-"
+
+
+def format_ms(ms):
+    return f"{ms:.1f}" if ms is not None else "-"
+
+
+def print_report(note, results):
+    print(f"Image: {note}")
+    print(f"{'t (s)':>8}  {'control':<18}{'value':<24}{'recorded ms':>12}{'replay ms':>11}{'draw ms':>9}"
+          f"  replay stages (ms)")
+    for result in results:
+        print(f"{result['t']:>8.2f}  {result['name']:<18}{str(result['value'])[:23]:<24}"
+              f"{format_ms(result['recorded_ms']):>12}{format_ms(result['replay_ms']):>11}"
+              f"{result['draw_ms']:>9.1f}  {format_stages(result['replay_stage_ms'])}")
+
+    timed = [result for result in results if result["replay_ms"] is not None]
+    total = sum(result["replay_ms"] for result in timed)
+    draw = sum(result["draw_ms"] for result in results)
+    print(f"\n{len(results)} events replayed in {total:.1f} ms (+ {draw:.1f} ms of deferred draws)")
+    for result in sorted(timed, key=lambda result: result["replay_ms"], reverse=True)[:5]:
+        print(f"  slowest: {result['name']} = {result['value']}: {result['replay_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded MediPixel session as a benchmark")
+    parser.add_argument("session", help="session JSON saved by the viewer")
+    parser.add_argument("--image", help="image file to use instead of the recorded one")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the session this many times")
+    parser.add_argument("--json", help="write the results of every repetition as JSON")
+    args = parser.parse_args()
+
+    events = viewer.SessionRecorder.load(args.session)
+    repetitions = []
+    for index in range(args.repeat):
+        note, results = replay(events, args.image)
+        if args.repeat > 1:
+            print(f"\n=== Repetition {index + 1} ===")
+        print_report(note, results)
+        repetitions.append(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"session": args.session, "repetitions": repetitions}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""ImageStatistics against numpy on skewed and signed data"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from viewer_module import load_viewer
+
+ImageStatistics = load_viewer().ImageStatistics
+
+
+def check(stats, image):
+    values = image[~np.isnan(image)] if image.dtype.kind == 'f' else image
+    values = values.astype(np.float64)
+    assert stats.count == values.size
+    assert stats.min == values.min() and stats.max == values.max()
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-9)
+    assert stats.std == pytest.approx(values.std(), rel=1e-9)
+    for q in (0, 1, 25, 50, 75, 99, 100):
+        assert stats.percentile(q) == pytest.approx(np.percentile(values, q), rel=1e-9)
+
+
+def test_skewed_float():
+    image = np.random.default_rng(0).lognormal(0, 2, (512, 512)).astype(np.float32)
+    check(ImageStatistics.from_image(image), image)
+
+
+def test_float_with_nan():
+    image = np.random.default_rng(1).exponential(5, (256, 256))
+    image[0, :10] = np.nan
+    check(ImageStatistics.from_image(image), image)
+
+
+@pytest.mark.parametrize("dtype", [np.int8, np.int16, np.int32, np.uint16])
+def test_integer(dtype):
+    info = np.iinfo(dtype)
+    image = np.random.default_rng(2).integers(max(info.min, -5000), min(info.max, 3000), (300, 301)).astype(dtype)
+    check(ImageStatistics.from_image(image), image)
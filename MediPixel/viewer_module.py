@@ -0,0 +1,12 @@
+"""Import "Medical Image Viewer.py" from the scripts next to it (its file name is not a module name)"""
+import os
+import importlib.util
+
+
+def load_viewer():
+    """The viewer script as a module"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Medical Image Viewer.py")
+    spec = importlib.util.spec_from_file_location("medical_image_viewer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
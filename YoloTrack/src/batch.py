@@ -0,0 +1,230 @@
+"""Headless batch processing of match videos
+
+    python batch.py batch_config.json
+
+The config is a JSON file:
+
+    {
+        "weights": "yolov4.weights",
+        "cfg": "../dataset/yolov4.cfg",
+        "output_dir": "tracks",
+        "parallel_videos": 2,
+        "workers_per_video": 2,
+        "corners": [[x, y], [x, y], [x, y], [x, y]],
+        "camera_motion": true,
+        "detect_interval": 5,
+        "batch_size": 4,
+        "detector": "opencv",
+        "roi": true,
+        "tiles": [2, 1],
+        "dnn_backend": "opencv",
+        "dnn_target": "cpu",
+        "videos": ["match1.mp4", {"path": "match2.mp4", "corners": [[x, y], ...]}]
+    }
+
+Relative paths are relative to the config file. The pitch corners of a
+video (top-left, top-right, bottom-left, bottom-right, in pixels of its
+first frame) come from its entry, else from a sidecar file next to the
+video (match1.mp4 -> match1.corners.json, holding the list of 4 points),
+else from the config's "corners". No window is opened. "workers_per_video"
+(default pipeline.DEFAULT_WORKERS) inference workers each load their own
+network, so memory grows with parallel_videos x workers_per_video networks
+(about 250 MB each for YOLOv4); the cores are split between all of them.
+"camera_motion"
+(default true) follows the camera with optical flow instead of matching
+every frame against the reference (see camera_motion.py). "detect_interval"
+(default 1, every frame) runs YOLO at least every N frames and propagates
+the players in between; "motion_threshold" and "uncertainty_threshold"
+force earlier detections (see scheduler.py). "batch_size" (default 1) frames
+go through YOLO in one forward pass; "dnn_backend" and "dnn_target" pick the
+OpenCV DNN backend and target (names of detectors.DNN_BACKENDS / DNN_TARGETS).
+"detector": "onnxruntime" runs an ONNX model given as "weights" (no "cfg")
+through ONNX Runtime instead, "int8": true with quantized weights (see
+detectors.py). "roi": true runs YOLO only on the pitch's bounding box in the
+frame, "tiles": [columns, rows] splits it (or the frame) into tiles that each
+go through the network at full resolution.
+
+Tracks go to <output_dir>/<video name>.tracks as TRACK_DTYPE records (see
+track_store.py), streamed to disk while the video is processed.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from yolo import PitchTracker, assign_players, frame_processor_factory
+from player_tracker import PlayerTracker
+from pipeline import DEFAULT_WORKERS, FramePipeline, read_frames, threads_per_worker
+from track_store import TrackWriter
+from scheduler import InferenceScheduler
+from detectors import detector_options
+
+
+def load_config(path):
+    """Read a batch config; paths are resolved relative to the config file"""
+    with open(path) as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    resolve = lambda p: p if os.path.isabs(p) else os.path.join(base, p)
+
+    videos = []
+    for entry in config["videos"]:
+        entry = {"path": entry} if isinstance(entry, str) else dict(entry)
+        entry["path"] = resolve(entry["path"])
+        videos.append(entry)
+    config = {
+        "weights": resolve(config["weights"]),
+        "cfg": resolve(config["cfg"]) if config.get("cfg") else "",
+        "output_dir": resolve(config.get("output_dir", "tracks")),
+        "parallel_videos": config.get("parallel_videos", 1),
+        "workers_per_video": config.get("workers_per_video") or DEFAULT_WORKERS,
+        "corners": config.get("corners"),
+        "camera_motion": config.get("camera_motion", True),
+        "detect_interval": config.get("detect_interval", 1),
+        "motion_threshold": config.get("motion_threshold", 12.0),
+        "uncertainty_threshold": config.get("uncertainty_threshold", 15.0),
+        "batch_size": config.get("batch_size", 1),
+        "dnn_backend": config.get("dnn_backend"),
+        "dnn_target": config.get("dnn_target"),
+        "detector": config.get("detector", "opencv"),
+        "int8": config.get("int8", False),
+        "roi": config.get("roi", False),
+        "tiles": tuple(config.get("tiles", (1, 1))),
+        "videos": videos,
+    }
+    # Rejects detector settings that would be ignored (e.g. int8 with the opencv detector)
+    detector_options(config["detector"], config["weights"], config["cfg"],
+                     config["dnn_backend"], config["dnn_target"], config["int8"])
+    return config
+
+
+def video_corners(video, default=None):
+    """Pitch corners of a video from its config entry, its sidecar file or the default"""
+    if video.get("corners") is not None:
+        return video["corners"]
+    sidecar = os.path.splitext(video["path"])[0] + ".corners.json"
+    if os.path.isfile(sidecar):
+        with open(sidecar) as f:
+            return json.load(f)
+    if default is not None:
+        return default
+    raise ValueError(f"No pitch corners for {video['path']} (config entry, {sidecar} or \"corners\")")
+
+
+def process_video(video, config):
+    """Track the players of one video into its .tracks file; returns a summary dict"""
+    path = video["path"]
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Error opening video file {path}")
+
+    ret, first_frame = cap.read()
+    if not ret:
+        raise ValueError(f"Could not read first frame of {path}")
+    tracker = PitchTracker()
+    if config["camera_motion"]:
+        tracker.enable_motion_tracking()
+    tracker.set_reference(first_frame, video_corners(video, config["corners"]))
+
+    os.makedirs(config["output_dir"], exist_ok=True)
+    output_path = os.path.join(config["output_dir"], os.path.splitext(os.path.basename(path))[0] + ".tracks")
+
+    # The tracks go to disk; only the live tracks of PlayerTracker are kept in memory
+    player_tracker = PlayerTracker()
+    failed_frames = [0]
+    scheduler = None
+    if config["detect_interval"] > 1:
+        scheduler = InferenceScheduler(config["detect_interval"], config["motion_threshold"],
+                                       config["uncertainty_threshold"])
+
+    with TrackWriter(output_path) as writer:
+        def track(frame_index, frame, result):
+            if result is None or not tracker.apply_transform(frame, result[0]):
+                failed_frames[0] += 1
+                if scheduler is not None:
+                    scheduler.propagate(frame_index)  # Asks for a new detection if this frame's was lost
+                return None
+            transform_matrix, centers, confidences = result
+            if scheduler is not None:
+                centers, confidences = scheduler.propagate(frame_index, centers, confidences)
+            # Frame 0 is the reference frame
+            assign_players(tracker, centers, player_tracker, writer, frame_index + 1, confidences)
+            return None
+
+        threads = threads_per_worker(config["workers_per_video"], config["parallel_videos"])
+        options = detector_options(config["detector"], config["weights"], config["cfg"],
+                                   config["dnn_backend"], config["dnn_target"], config["int8"], threads)
+        make_processor = frame_processor_factory(tracker, options, config["roi"], config["tiles"])
+        pipeline = FramePipeline(read_frames(cap), make_processor, track, workers=config["workers_per_video"],
+                                 schedule=scheduler.should_detect if scheduler is not None else None,
+                                 batch_size=config["batch_size"])
+        pipeline.run()
+        records = writer.count
+    cap.release()
+
+    frames = pipeline.stats[3].count
+    return {
+        "video": path,
+        "tracks": output_path,
+        "frames": frames,
+        "failed_frames": failed_frames[0],
+        "records": records,
+        "seconds": pipeline.wall_time,
+        "fps": frames / max(pipeline.wall_time, 1e-9),
+        "report": pipeline.report() + ("\n" + scheduler.report() if scheduler is not None else ""),
+        "errors": [str(e) for e in pipeline.errors],
+    }
+
+
+def run_batch(config):
+    """Process every video, parallel_videos at a time; returns the summaries in config order"""
+    with ProcessPoolExecutor(max_workers=config["parallel_videos"]) as executor:
+        futures = [executor.submit(process_video, video, config) for video in config["videos"]]
+        summaries = []
+        for video, future in zip(config["videos"], futures):
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                print(f"Error processing {video['path']}: {str(e)}")
+                summaries.append({"video": video["path"], "error": str(e)})
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch tracking of match videos")
+    parser.add_argument("config", help="batch config JSON")
+    parser.add_argument("--summary", help="write the per-video summaries as JSON")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    start = time.perf_counter()
+    summaries = run_batch(config)
+    elapsed = time.perf_counter() - start
+
+    total_frames = 0
+    for summary in summaries:
+        if "error" in summary:
+            print(f"{summary['video']}: failed ({summary['error']})")
+            continue
+        total_frames += summary["frames"]
+        print(f"{summary['video']}: {summary['frames']} frames ({summary['failed_frames']} without transform), "
+              f"{summary['records']} track records, {summary['fps']:.1f} fps -> {summary['tracks']}")
+        print(summary["report"])
+        for error in summary["errors"]:
+            print(f"  error: {error}")
+    print(f"Total: {len(summaries)} videos, {total_frames} frames in {elapsed:.1f} s "
+          f"({total_frames / max(elapsed, 1e-9):.1f} fps)")
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summaries, f, indent=1)
+    failed = any("error" in summary or summary["errors"] for summary in summaries)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+"""Benchmarks for the YoloTrack processing stages
+
+    python benchmark.py decode [--frames 200] [--people 22]
+    python benchmark.py homography [--frames 300] [--speed 4]
+    python benchmark.py schedule [--frames 1500] [--people 22]
+    python benchmark.py tracking [--frames 1500] [--people 25]
+    python benchmark.py heatmap [--frames 135000] [--people 25]
+    python benchmark.py inference --weights yolov4.weights [--cfg yolov4.cfg] [--batch-sizes 1 2 4 8]
+    python benchmark.py detectors --model yolov4.onnx [--weights yolov4.weights --cfg yolov4.cfg] [--video match.mp4]
+    python benchmark.py transform [--frames 135000] [--people 25]
+    python benchmark.py roi --weights yolov4.weights [--cfg yolov4.cfg] [--video match.mp4] [--corners x y ...]
+
+decode: per-frame post-processing time of the YOLO outputs, the original
+per-row Python loop against the vectorized decode_detections, on synthetic
+YOLOv4 416x416 outputs (507 + 2028 + 8112 rows of 85 values).
+
+homography: per-frame cost and accuracy of the camera-to-pitch transform,
+ORB matching (through the reference LSH index) of every frame against the
+reference against incremental camera-motion tracking, on a synthetic video
+panning over a textured scene.
+
+schedule: speed/accuracy trade-off of InferenceScheduler, detector runs and
+position error of the propagated players against their true positions, for
+several detection intervals, on synthetic players running and turning.
+
+tracking: per-frame cost and ID switches of the original nearest-previous-
+position ID assignment against PlayerTracker (Kalman prediction + optimal
+assignment), on the same synthetic players with missed and false detections.
+
+heatmap: time to render a player heatmap, the original per-position loop and
+float64 gaussian_filter against HeatmapEngine (cold and cached), plus the
+all-players aggregate, on a synthetic full match (90 minutes at 25 fps).
+
+inference: YOLO frames/sec for each batch size (frames per blobFromImages
+and forward pass, including decoding), with the chosen DNN backend/target.
+
+detectors: latency per frame of every available detector backend (OpenCV on
+the Darknet files and on the ONNX model, ONNX Runtime fp32 and int8) and
+agreement of their detections with the first one (boxes matched at IoU 0.5),
+on frames of a video or on random frames.
+
+transform: camera-to-pitch mapping of the detection centers of every frame,
+one transform_point call per detection against one transform_points call
+per frame, and reprojection of a whole match history to the camera with
+inverse_transform_points.
+
+roi: frames/sec and detections of YOLO on the whole frame against YOLO on
+the pitch's bounding box only (PitchTracker.pitch_region from the pitch
+corners of the first frame), as one crop and as tiles.
+"""
+import time
+import argparse
+
+import cv2
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from scipy.optimize import linear_sum_assignment
+
+from yolo import PitchTracker
+from pipeline import read_frames
+from detectors import (DETECTORS, DNN_BACKENDS, DNN_TARGETS, OpenCVDetector, create_detector, decode_detections,
+                       detect_regions, detector_options, onnxruntime)
+from scheduler import InferenceScheduler
+from player_tracker import PlayerTracker
+from track_store import TrackStore
+from heatmap import HeatmapEngine
+
+
+def synthetic_outputs(rng, people=22, num_classes=80, grids=(13, 26, 52), anchors=3):
+    """YOLO-like outputs: low background scores and a few confident person rows per frame"""
+    outs = []
+    for grid in grids:
+        rows = grid * grid * anchors
+        out = np.empty((rows, 5 + num_classes), dtype=np.float32)
+        out[:, :4] = rng.random((rows, 4), dtype=np.float32) * [1, 1, 0.05, 0.1]
+        out[:, 4:] = rng.random((rows, 1 + num_classes), dtype=np.float32) * 0.05
+        outs.append(out)
+
+    # Each person shows up in a few neighbouring rows of the finest grid, as in real outputs
+    finest = outs[-1]
+    for row in rng.choice(len(finest) - 3, people, replace=False):
+        finest[row:row + 3, 5] = rng.uniform(0.55, 0.99, 3)
+    return outs
+
+
+def decode_detections_loop(outs, frame_size, conf_threshold=0.5, target_class=0,
+                           score_threshold=0.3, nms_threshold=0.4):
+    """Original per-row decode from main, kept as the benchmark baseline"""
+    width, height = frame_size
+    boxes = []
+    confidences = []
+    centers = []
+
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+
+            if confidence > conf_threshold and class_id == target_class:
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                w = int(detection[2] * width)
+                h = int(detection[3] * height)
+                x = int(center_x - w / 2)
+                y = int(center_y - h / 2)
+
+                boxes.append([x, y, w, h])
+                confidences.append(float(confidence))
+                centers.append((center_x, center_y))
+
+    indices = cv2.dnn.NMSBoxes(boxes, confidences, score_threshold, nms_threshold)
+    return [centers[i] for i in np.asarray(indices, dtype=np.int64).reshape(-1)]
+
+
+def benchmark_decode(frames, people, frame_size=(1920, 1080), seed=0):
+    rng = np.random.default_rng(seed)
+    batches = [synthetic_outputs(rng, people) for _ in range(frames)]
+
+    timings = {}
+    results = {}
+    for name, decode in (("loop", lambda outs: decode_detections_loop(outs, frame_size)),
+                         ("vectorized", lambda outs: list(map(tuple, decode_detections(outs, frame_size)[2].tolist())))):
+        decode(batches[0])  # Warm up
+        start = time.perf_counter()
+        results[name] = [decode(outs) for outs in batches]
+        timings[name] = (time.perf_counter() - start) / frames * 1000
+
+    if results["loop"] != results["vectorized"]:
+        print("Warning: the decoders disagree")
+    rows = sum(len(out) for out in batches[0])
+    print(f"{frames} frames, {rows} output rows per frame, ~{people} people")
+    for name, ms in timings.items():
+        print(f"{name:<12}{ms:>9.3f} ms/frame")
+    print(f"speedup     {timings['loop'] / timings['vectorized']:>9.1f}x")
+
+
+def panorama(rng, size=(4000, 720), shapes=1500):
+    """Textured scene to pan over: random shapes on a noisy background"""
+    width, height = size
+    scene = (rng.random((height, width, 3)) * 60 + 60).astype(np.uint8)
+    for _ in range(shapes):
+        color = rng.integers(0, 255, 3).tolist()
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        if rng.random() < 0.5:
+            cv2.rectangle(scene, (x, y), (x + int(rng.integers(5, 40)), y + int(rng.integers(5, 40))), color, -1)
+        else:
+            cv2.circle(scene, (x, y), int(rng.integers(3, 20)), color, -1)
+    return cv2.GaussianBlur(scene, (3, 3), 0)
+
+
+def benchmark_homography(frames, speed, frame_size=(1280, 720), seed=0):
+    rng = np.random.default_rng(seed)
+    scene = panorama(rng, (frame_size[0] + int(frames * speed) + 1, frame_size[1]))
+    offsets = np.arange(frames + 1) * speed
+    video = [scene[:, int(x):int(x) + frame_size[0]].copy() for x in offsets]
+    width, height = frame_size
+    corners = [[100, 100], [width - 100, 100], [100, height - 100], [width - 100, height - 100]]
+
+    def error(tracker, offset):
+        """Pitch-pixel error of the frame center against the known camera offset"""
+        truth = tracker.transform_from_homography(np.array([[1, 0, offset], [0, 1, 0], [0, 0, 1]], float))
+        center = np.float32([[[width / 2, height / 2]]])
+        mapped = cv2.perspectiveTransform(center, tracker.transform_matrix)
+        return float(np.linalg.norm(mapped - cv2.perspectiveTransform(center, truth)))
+
+    for name, incremental in (("ORB every frame", False), ("camera motion", True)):
+        tracker = PitchTracker()
+        if incremental:
+            tracker.enable_motion_tracking()
+        tracker.set_reference(video[0], corners)
+        failures = 0
+        errors = []
+        seconds = 0.0
+        for frame, offset in zip(video[1:], offsets[1:]):
+            start = time.perf_counter()
+            success = tracker.update_transform(frame)
+            seconds += time.perf_counter() - start
+            if success:
+                errors.append(error(tracker, offset))
+            else:
+                failures += 1
+        ms = seconds / frames * 1000
+        extra = f", {tracker.motion_tracker.anchors} ORB anchors, {len(tracker.motion_tracker.keyframes)} keyframes" \
+            if incremental else ""
+        print(f"{name:<16}{ms:>8.2f} ms/frame  error mean {np.mean(errors):.2f} max {np.max(errors):.2f} px, "
+              f"{failures} failures{extra}")
+
+
+def player_paths(rng, frames, people, frame_size=(1280, 720), max_speed=6.0):
+    """Player centers (frames, people, 2) with smoothly changing velocities, bouncing off the frame edges"""
+    size = np.array(frame_size, dtype=float)
+    positions = np.empty((frames, people, 2))
+    position = rng.random((people, 2)) * size
+    velocity = rng.normal(0, max_speed / 3, (people, 2))
+    for i in range(frames):
+        velocity = np.clip(velocity + rng.normal(0, 0.3, (people, 2)), -max_speed, max_speed)
+        position = position + velocity
+        outside = (position < 0) | (position > size)
+        velocity[outside] *= -1
+        position = np.clip(position, 0, size)
+        positions[i] = position
+    return positions
+
+
+def benchmark_schedule(frames, people, intervals=(1, 2, 3, 5, 8, 12), seed=0):
+    rng = np.random.default_rng(seed)
+    truth = player_paths(rng, frames, people)
+    noise = rng.normal(0, 1.0, truth.shape)  # Detector jitter
+    frame = np.zeros((720, 1280), dtype=np.uint8)  # Static camera: only the players' motion matters
+
+    print(f"{frames} frames, {people} players")
+    for interval in intervals:
+        scheduler = InferenceScheduler(interval)
+        errors = []
+        for index in range(frames):
+            detections = None
+            if scheduler.should_detect(index, frame):
+                detections = np.rint(truth[index] + noise[index]).astype(np.int32)
+            centers, _ = scheduler.propagate(index, detections, np.ones(people, np.float32))
+            # Error of each true player to the nearest reported center
+            distances = np.linalg.norm(truth[index][:, np.newaxis] - centers[np.newaxis], axis=2)
+            errors.append(distances.min(axis=1))
+        errors = np.concatenate(errors)
+        runs = sum(scheduler.reasons.values())
+        print(f"interval {interval:>3}: detector on {runs:>5} frames ({runs / frames:>4.0%}, "
+              f"{frames / runs:>4.1f}x fewer)  error mean {errors.mean():5.2f} "
+              f"p95 {np.percentile(errors, 95):5.2f} max {errors.max():6.2f} px")
+
+
+def assign_player_id_loop(center, existing_players, max_distance=50):
+    """Original per-detection ID assignment from yolo.py, kept as the benchmark baseline"""
+    closest_id = -1
+    min_distance = float('inf')
+
+    for player_id, positions in existing_players.items():
+        if positions:
+            last_pos = positions[-1]
+            distance = np.sqrt((center[0] - last_pos[0]) ** 2 + (center[1] - last_pos[1]) ** 2)
+            if distance < max_distance and distance < min_distance:
+                min_distance = distance
+                closest_id = player_id
+
+    return closest_id if closest_id != -1 else max(existing_players.keys(), default=-1) + 1
+
+
+def benchmark_tracking(frames, people, miss_rate=0.05, false_rate=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    truth = player_paths(rng, frames, people, frame_size=(800, 600), max_speed=4.0)
+    detections = []  # Per frame: (points, true player index or -1 for false detections)
+    for positions in truth:
+        seen = np.flatnonzero(rng.random(people) >= miss_rate)
+        points = positions[seen] + rng.normal(0, 1.5, (len(seen), 2))
+        false = rng.random((rng.poisson(false_rate), 2)) * [800, 600]
+        order = rng.permutation(len(seen) + len(false))
+        detections.append((np.vstack([points, false])[order], np.concatenate([seen, np.full(len(false), -1)])[order]))
+
+    def run_loop():
+        positions = {}
+        ids = []
+        for points, _ in detections:
+            frame_ids = []
+            for point in map(tuple, np.rint(points).astype(int).tolist()):
+                player_id = assign_player_id_loop(point, positions)
+                positions.setdefault(player_id, []).append(point)
+                frame_ids.append(player_id)
+            ids.append(frame_ids)
+        return ids
+
+    def run_tracker():
+        player_tracker = PlayerTracker()
+        return [player_tracker.update(points).tolist() for points, _ in detections]
+
+    print(f"{frames} frames, {people} players, {miss_rate:.0%} missed, ~{false_rate} false detections per frame")
+    for name, run in (("loop", run_loop), ("PlayerTracker", run_tracker)):
+        start = time.perf_counter()
+        ids = run()
+        ms = (time.perf_counter() - start) / frames * 1000
+
+        # ID switches: a player detected with a different ID than at its previous detection
+        last_id = {}
+        switches = 0
+        duplicates = 0
+        for (_, players), frame_ids in zip(detections, ids):
+            reported = [i for i in frame_ids if i >= 0]
+            duplicates += len(reported) - len(set(reported))
+            for player, player_id in zip(players.tolist(), frame_ids):
+                if player < 0 or player_id < 0:
+                    continue
+                if player in last_id and last_id[player] != player_id:
+                    switches += 1
+                last_id[player] = player_id
+        print(f"{name:<14}{ms:>8.3f} ms/frame  {switches:>5} ID switches  {duplicates:>5} duplicate IDs  "
+              f"{len({i for frame_ids in ids for i in frame_ids if i >= 0}):>5} IDs used")
+
+
+def heatmap_loop(positions, size=(800, 600), sigma=10):
+    """Original heatmap from visualize_player_data, kept as the benchmark baseline"""
+    heatmap_data = np.zeros(size[::-1])
+    for (x, y) in positions:
+        if 0 <= x < size[0] and 0 <= y < size[1]:
+            heatmap_data[y, x] += 1
+    return gaussian_filter(heatmap_data, sigma=sigma)
+
+
+def benchmark_heatmap(frames, people, size=(800, 600), seed=0):
+    rng = np.random.default_rng(seed)
+    paths = np.rint(player_paths(rng, frames, people, frame_size=size, max_speed=2.0)).astype(np.int16)
+    store = TrackStore()
+    for frame, points in enumerate(paths):
+        store.append(frame, np.arange(people), points, 1.0)
+    engine = HeatmapEngine(store, size)
+    print(f"{frames} frames, {people} players, {len(store)} positions")
+
+    def timed(name, render):
+        start = time.perf_counter()
+        result = render()
+        print(f"{name:<34}{(time.perf_counter() - start) * 1000:>9.2f} ms")
+        return result
+
+    positions = [tuple(p) for p in store.positions(0).tolist()]
+    reference = timed("player, loop + gaussian_filter", lambda: heatmap_loop(positions, size))
+    result = timed("player, engine (cold)", lambda: engine.heatmap(0))
+    timed("player, engine (cached)", lambda: engine.heatmap(0))
+    timed("player, engine, 10-minute window", lambda: engine.heatmap(0, 0, 15000))
+    timed("all players, engine (cold)", lambda: engine.all_players())
+    timed("all players, engine (cached)", lambda: engine.all_players())
+    error = np.abs(result - reference).max() / reference.max()
+    print(f"max difference to gaussian_filter: {error:.2e} of the peak")
+
+
+def benchmark_inference(weights, cfg, batch_sizes, frames, backend=None, target=None,
+                        frame_size=(1280, 720), seed=0):
+    rng = np.random.default_rng(seed)
+    video = [rng.integers(0, 256, (frame_size[1], frame_size[0], 3), dtype=np.uint8) for _ in range(frames)]
+    detector = OpenCVDetector(weights, cfg, backend, target)
+    detector.detect(video[:1])  # Warm up (network setup)
+
+    print(f"{frames} frames of {frame_size[0]}x{frame_size[1]}, backend {backend or 'default'}, "
+          f"target {target or 'default'}")
+    baseline = None
+    for batch_size in batch_sizes:
+        detector.detect(video[:batch_size])  # Warm up this input shape
+        start = time.perf_counter()
+        for i in range(0, frames, batch_size):
+            detector.detect(video[i:i + batch_size])
+        fps = frames / (time.perf_counter() - start)
+        baseline = baseline or fps
+        print(f"batch {batch_size:>3}: {fps:>8.1f} frames/s  ({fps / baseline:.2f}x)")
+
+
+def box_iou(a, b):
+    """IoU matrix of (N, 4) and (M, 4) x, y, w, h boxes"""
+    a, b = a[:, np.newaxis].astype(np.float64), b[np.newaxis].astype(np.float64)
+    w = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    h = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = w * h
+    return intersection / (a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - intersection + 1e-9)
+
+
+def benchmark_detectors(model, weights, cfg, video_path, frames, conf_threshold, seed=0):
+    video = load_frames(video_path, frames, seed)
+
+    configurations = []
+    if weights and cfg:
+        configurations.append(("opencv darknet", dict(detector="opencv", model=weights, cfg=cfg)))
+    if model:
+        configurations.append(("opencv onnx", dict(detector="opencv", model=model)))
+        if onnxruntime is not None:
+            configurations.append(("onnxruntime fp32", dict(detector="onnxruntime", model=model)))
+            configurations.append(("onnxruntime int8", dict(detector="onnxruntime", model=model, int8=True)))
+        else:
+            print("onnxruntime is not installed, skipping its detectors")
+
+    print(f"{len(video)} frames, agreement with {configurations[0][0]}")
+    reference = None
+    for name, options in configurations:
+        detector = create_detector(**options)
+        detector.detect(video[:1])  # Warm up
+        start = time.perf_counter()
+        results = [detector.detect([frame], conf_threshold=conf_threshold)[0] for frame in video]
+        ms = (time.perf_counter() - start) / len(video) * 1000
+        reference = reference or results
+
+        matched = found = expected = 0
+        for (boxes, _, _), (reference_boxes, _, _) in zip(results, reference):
+            found += len(boxes)
+            expected += len(reference_boxes)
+            if len(boxes) and len(reference_boxes):
+                iou = box_iou(reference_boxes, boxes)
+                rows, cols = linear_sum_assignment(-iou)
+                matched += int((iou[rows, cols] >= 0.5).sum())
+        recall = matched / expected if expected else 1.0
+        precision = matched / found if found else 1.0
+        print(f"{name:<18}{ms:>9.2f} ms/frame  {found:>6} detections  "
+              f"recall {recall:6.1%}  precision {precision:6.1%}")
+
+
+def benchmark_transform(frames, people, seed=0):
+    rng = np.random.default_rng(seed)
+    tracker = PitchTracker()
+    tracker.reference_points = np.float32([[300, 250], [980, 250], [40, 650], [1240, 650]])
+    tracker.transform_matrix = tracker.transform_from_homography(np.eye(3))
+    centers = rng.integers(0, [1280, 720], (frames, people, 2)).astype(np.int32)
+    sample = min(frames, 5000)
+
+    start = time.perf_counter()
+    loop = [[tracker.transform_point(center) for center in map(tuple, frame.tolist())] for frame in centers[:sample]]
+    loop_ms = (time.perf_counter() - start) / sample * 1000
+    start = time.perf_counter()
+    batched = [tracker.transform_points(frame) for frame in centers[:sample]]
+    batch_ms = (time.perf_counter() - start) / sample * 1000
+    same = all((np.int32(a) == b.astype(np.int32)).all() for a, b in zip(loop, batched))
+
+    print(f"{sample} frames of {people} detections{'' if same else ' (results differ!)'}")
+    print(f"transform_point per detection  {loop_ms:>8.3f} ms/frame")
+    print(f"transform_points per frame     {batch_ms:>8.3f} ms/frame  ({loop_ms / batch_ms:.1f}x)")
+
+    history = tracker.transform_points(centers)
+    start = time.perf_counter()
+    tracker.inverse_transform_points(history)
+    print(f"inverse_transform_points of {history.shape[0] * history.shape[1]} positions "
+          f"({frames} frames)  {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def load_frames(video_path, frames, seed=0):
+    """The first frames of a video, or random 1280x720 frames"""
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        video = [frame for _, frame in zip(range(frames), read_frames(cap))]
+        cap.release()
+        return video
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(frames)]
+
+
+def benchmark_roi(weights, cfg, video_path, frames, corners, detector_name="opencv", batch_size=4):
+    video = load_frames(video_path, frames)
+    height, width = video[0].shape[:2]
+    tracker = PitchTracker()
+    tracker.set_reference(video[0], corners)
+    tracker.transform_matrix = tracker.transform_from_homography(np.eye(3))
+    region = tracker.pitch_region((width, height))
+    detector = create_detector(**detector_options(detector_name, weights, cfg))
+    print(f"{len(video)} frames of {width}x{height}, {detector_name} detector, pitch region {region} "
+          f"({region[2] * region[3] / (width * height):.0%} of the frame)")
+
+    for name, regions, tiles in (("full frame", None, (1, 1)), ("pitch crop", region, (1, 1)),
+                                 ("pitch tiles 2x1", region, (2, 1)), ("full frame tiles 2x1", None, (2, 1))):
+        detect = lambda batch: detect_regions(detector, batch, [regions] * len(batch), tiles)
+        detect(video[:batch_size])  # Warm up
+        start = time.perf_counter()
+        detections = 0
+        for i in range(0, len(video), batch_size):
+            detections += sum(len(boxes) for boxes, _, _ in detect(video[i:i + batch_size]))
+        fps = len(video) / (time.perf_counter() - start)
+        print(f"{name:<22}{fps:>8.1f} frames/s  {detections:>6} detections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YoloTrack benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    decode_parser = subparsers.add_parser("decode", help="YOLO output decoding per frame")
+    decode_parser.add_argument("--frames", type=int, default=200)
+    decode_parser.add_argument("--people", type=int, default=22)
+
+    homography_parser = subparsers.add_parser("homography", help="camera-to-pitch transform per frame")
+    homography_parser.add_argument("--frames", type=int, default=300)
+    homography_parser.add_argument("--speed", type=float, default=4.0, help="camera pan in pixels per frame")
+
+    schedule_parser = subparsers.add_parser("schedule", help="detection interval against propagation error")
+    schedule_parser.add_argument("--frames", type=int, default=1500)
+    schedule_parser.add_argument("--people", type=int, default=22)
+
+    tracking_parser = subparsers.add_parser("tracking", help="player ID assignment per frame")
+    tracking_parser.add_argument("--frames", type=int, default=1500)
+    tracking_parser.add_argument("--people", type=int, default=25)
+
+    heatmap_parser = subparsers.add_parser("heatmap", help="player heatmap rendering")
+    heatmap_parser.add_argument("--frames", type=int, default=135000)
+    heatmap_parser.add_argument("--people", type=int, default=25)
+
+    inference_parser = subparsers.add_parser("inference", help="YOLO frames/sec per batch size")
+    inference_parser.add_argument("--weights", required=True)
+    inference_parser.add_argument("--cfg", default="", help="Darknet cfg (not needed for ONNX models)")
+    inference_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    inference_parser.add_argument("--frames", type=int, default=64)
+    inference_parser.add_argument("--backend", choices=sorted(DNN_BACKENDS))
+    inference_parser.add_argument("--target", choices=sorted(DNN_TARGETS))
+
+    detectors_parser = subparsers.add_parser("detectors", help="latency and agreement of the detector backends")
+    detectors_parser.add_argument("--model", help="ONNX model for the opencv and onnxruntime detectors")
+    detectors_parser.add_argument("--weights", help="Darknet weights for the opencv detector")
+    detectors_parser.add_argument("--cfg", help="Darknet cfg for the opencv detector")
+    detectors_parser.add_argument("--video", help="take the frames from a video instead of random frames")
+    detectors_parser.add_argument("--frames", type=int, default=32)
+    detectors_parser.add_argument("--conf-threshold", type=float, default=0.5)
+
+    transform_parser = subparsers.add_parser("transform", help="camera-to-pitch point mapping")
+    transform_parser.add_argument("--frames", type=int, default=135000)
+    transform_parser.add_argument("--people", type=int, default=25)
+
+    roi_parser = subparsers.add_parser("roi", help="YOLO on the whole frame against the pitch region")
+    roi_parser.add_argument("--weights", required=True, help="Darknet weights or an ONNX model")
+    roi_parser.add_argument("--cfg", default="", help="Darknet cfg (not needed for ONNX models)")
+    roi_parser.add_argument("--detector", choices=sorted(DETECTORS), default="opencv")
+    roi_parser.add_argument("--video", help="take the frames from a video instead of random frames")
+    roi_parser.add_argument("--frames", type=int, default=32)
+    roi_parser.add_argument("--corners", type=float, nargs=8, default=[300, 250, 980, 250, 40, 650, 1240, 650],
+                            help="pitch corners in the first frame: top-left, top-right, bottom-left, bottom-right")
+
+    args = parser.parse_args()
+    if args.benchmark == "decode":
+        benchmark_decode(args.frames, args.people)
+    elif args.benchmark == "homography":
+        benchmark_homography(args.frames, args.speed)
+    elif args.benchmark == "schedule":
+        benchmark_schedule(args.frames, args.people)
+    elif args.benchmark == "tracking":
+        benchmark_tracking(args.frames, args.people)
+    elif args.benchmark == "heatmap":
+        benchmark_heatmap(args.frames, args.people)
+    elif args.benchmark == "inference":
+        benchmark_inference(args.weights, args.cfg, args.batch_sizes, args.frames, args.backend, args.target)
+    elif args.benchmark == "detectors":
+        if not args.model and not (args.weights and args.cfg):
+            parser.error("detectors needs --model and/or --weights and --cfg")
+        benchmark_detectors(args.model, args.weights, args.cfg, args.video, args.frames, args.conf_threshold)
+    elif args.benchmark == "transform":
+        benchmark_transform(args.frames, args.people)
+    elif args.benchmark == "roi":
+        benchmark_roi(args.weights, args.cfg, args.video, args.frames, np.reshape(args.corners, (4, 2)),
+                      args.detector)
+
+
+if __name__ == "__main__":
+    main()
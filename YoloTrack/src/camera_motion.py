@@ -0,0 +1,147 @@
+"""Incremental camera-motion tracking for PitchTracker
+
+Matching ORB features of every frame against the reference frame is the
+dominant per-frame cost, and it gets less reliable as the camera pans away
+from the reference. CameraMotionTracker instead follows a sparse set of
+corners with pyramidal Lucas-Kanade optical flow and chains the
+frame-to-frame homographies. It re-anchors with ORB only when the flow
+becomes unreliable (too few inliers) or after a maximum number of frames
+(to bound accumulated drift), and then matches against all keyframes at
+once through one LSH index (see feature_index.py), anchoring to the keyframe
+with the most matches instead of the first frame. Frames that re-anchor far
+from every keyframe become new keyframes.
+
+Homographies map frame pixels to reference-frame pixels.
+"""
+import cv2
+import numpy as np
+
+from feature_index import DescriptorIndex
+
+
+class Keyframe:
+    def __init__(self, frame_index, keypoints, descriptors, to_reference, center):
+        self.frame_index = frame_index
+        self.keypoints = keypoints
+        self.points = np.float32([kp.pt for kp in keypoints])
+        self.descriptors = descriptors
+        self.to_reference = to_reference  # Keyframe -> reference homography
+        self.center = center  # Frame center in reference coordinates
+
+
+class CameraMotionTracker:
+    def __init__(self, reference_gray, orb=None, max_corners=400, min_inliers=40,
+                 max_anchor_interval=100, keyframe_distance=150.0, min_match_inliers=10):
+        self.orb = orb or cv2.ORB_create(nfeatures=2000)
+        self.index = DescriptorIndex()  # Descriptors of all keyframes, image i = keyframes[i]
+        self.max_corners = max_corners
+        self.min_inliers = min_inliers  # Fewer optical-flow inliers trigger a re-anchor
+        self.max_anchor_interval = max_anchor_interval  # Frames between forced re-anchors
+        self.keyframe_distance = keyframe_distance  # Reference pixels between keyframe centers
+        self.min_match_inliers = min_match_inliers
+
+        self.frame_size = reference_gray.shape[::-1]
+        self.keyframes = []
+        self.keyframe_centers = np.empty((0, 2), dtype=np.float32)  # For the distance to the nearest keyframe
+        keypoints, descriptors = self.orb.detectAndCompute(reference_gray, None)
+        self.add_keyframe(0, keypoints, descriptors, np.eye(3))
+
+        self.frame_index = 0
+        self.prev_gray = reference_gray
+        self.prev_points = self.detect_corners(reference_gray)
+        self.to_reference = np.eye(3)  # Current frame -> reference
+        self.frames_since_anchor = 0
+        self.anchors = 0  # ORB re-anchors so far (for statistics)
+
+    def frame_center(self, to_reference):
+        """Center of a frame mapped into reference coordinates"""
+        center = np.float32([[[self.frame_size[0] / 2, self.frame_size[1] / 2]]])
+        return cv2.perspectiveTransform(center, to_reference).reshape(2)
+
+    def add_keyframe(self, frame_index, keypoints, descriptors, to_reference):
+        if descriptors is None or len(keypoints) < self.min_match_inliers:
+            return
+        keyframe = Keyframe(frame_index, keypoints, descriptors, to_reference, self.frame_center(to_reference))
+        self.keyframes.append(keyframe)
+        self.index.add(keypoints, descriptors)
+        self.keyframe_centers = np.vstack([self.keyframe_centers, keyframe.center[np.newaxis]])
+
+    def nearest_keyframe(self, to_reference):
+        """Keyframe whose center is closest to where the frame looks (in reference coordinates)"""
+        distances = np.linalg.norm(self.keyframe_centers - self.frame_center(to_reference), axis=1)
+        index = int(np.argmin(distances))
+        return self.keyframes[index], float(distances[index])
+
+    def detect_corners(self, gray):
+        corners = cv2.goodFeaturesToTrack(gray, self.max_corners, 0.01, 8)
+        return corners if corners is not None else np.empty((0, 1, 2), dtype=np.float32)
+
+    def flow_homography(self, gray):
+        """Frame -> previous frame homography from optical flow, and the inlier points of the frame"""
+        if len(self.prev_points) < 4:
+            return None, np.empty((0, 1, 2), dtype=np.float32)
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.prev_points, None,
+                                                     winSize=(21, 21), maxLevel=3)
+        tracked = status.reshape(-1) == 1
+        previous, current = self.prev_points[tracked], points[tracked]
+        if len(current) < 4:
+            return None, current
+        H, mask = cv2.findHomography(current, previous, cv2.RANSAC, 3.0)
+        if H is None:
+            return None, current
+        return H, current[mask.reshape(-1) == 1]
+
+    def anchor(self, gray):
+        """Frame -> reference homography by ORB matching against the keyframes, or None"""
+        keypoints, descriptors = self.orb.detectAndCompute(gray, None)
+        if descriptors is None:
+            return None
+
+        # One search over every keyframe; the keyframe with the most matches wins
+        query, images, train, _ = self.index.match(descriptors)
+        best, votes = self.index.best_image(images)
+        if votes < self.min_match_inliers:
+            return None
+        keyframe = self.keyframes[best]
+        selected = images == best
+        current = np.float32([kp.pt for kp in keypoints])[query[selected]]
+        H, mask = cv2.findHomography(current, keyframe.points[train[selected]], cv2.RANSAC, 5.0)
+        if H is None or mask.sum() < self.min_match_inliers:
+            return None
+
+        to_reference = keyframe.to_reference @ H
+        self.anchors += 1
+        _, distance = self.nearest_keyframe(to_reference)
+        if distance > self.keyframe_distance:
+            self.add_keyframe(self.frame_index, keypoints, descriptors, to_reference)
+        return to_reference
+
+    def update(self, frame):
+        """Frame -> reference homography of the next frame, or None if the camera was lost"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self.frame_index += 1
+        self.frames_since_anchor += 1
+
+        H, inliers = self.flow_homography(gray)
+        predicted = self.to_reference @ H if H is not None else self.to_reference
+
+        to_reference = None
+        if H is None or len(inliers) < self.min_inliers or self.frames_since_anchor >= self.max_anchor_interval:
+            to_reference = self.anchor(gray)
+            if to_reference is not None:
+                self.frames_since_anchor = 0
+        if to_reference is None and H is not None:
+            to_reference = predicted
+        if to_reference is None:
+            # Lost: the pose of this frame is unknown, so the next frame is followed from the
+            # last frame with a known pose, and re-anchors unless the flow recovers
+            self.frames_since_anchor = self.max_anchor_interval
+            return None
+
+        # Keep enough corners to follow: re-detect when many were lost
+        if len(inliers) < self.max_corners // 2:
+            inliers = self.detect_corners(gray)
+        self.prev_gray = gray
+        self.prev_points = inliers.reshape(-1, 1, 2).astype(np.float32)
+        self.to_reference = to_reference
+        return to_reference
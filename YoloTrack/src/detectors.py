@@ -0,0 +1,239 @@
+"""Person detectors for YoloTrack, with interchangeable inference backends
+
+    opencv       cv2.dnn: Darknet (yolov4.weights + yolov4.cfg) or ONNX models,
+                 on any DNN backend/target of the OpenCV build
+    onnxruntime  an exported ONNX model through ONNX Runtime (CPU provider by
+                 default, or e.g. OpenVINOExecutionProvider), optionally with
+                 int8 dynamically quantized weights
+
+All detectors take the same 416x416 blob from cv2.dnn.blobFromImages and
+return the same YOLO output rows (normalized cx, cy, w, h, objectness, class
+scores, as the Darknet YOLO layers produce them; ONNX models must be exported
+with that layout), which go through the same decode_detections and NMS.
+create_detector builds one from plain options, so a detector can be chosen
+per run (and per worker process or thread).
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+def decode_detections(outs, frame_size, conf_threshold=0.5, target_class=0,
+                      score_threshold=0.3, nms_threshold=0.4):
+    """Decode YOLO outputs into NMS-filtered person boxes in one vectorized pass
+
+    outs are the net.forward arrays (rows of cx, cy, w, h, objectness, class
+    scores), frame_size is (width, height). Returns (boxes, confidences,
+    centers): (N, 4) int32 boxes as x, y, w, h, (N,) float32 confidences and
+    (N, 2) int32 box centers, all in frame pixels.
+    """
+    width, height = frame_size
+    detections = outs[0] if len(outs) == 1 else np.concatenate(outs)
+    detections = detections.reshape(-1, detections.shape[-1])
+
+    # Only rows whose target class clears the threshold can pass, so the argmax
+    # over all class scores is computed for those few rows only
+    scores = detections[:, 5:]
+    candidates = np.flatnonzero(scores[:, target_class] > conf_threshold)
+    candidates = candidates[scores[candidates].argmax(axis=1) == target_class]
+    selected = detections[candidates]
+    confidences = scores[candidates, target_class].astype(np.float32)
+
+    # Box centers and sizes to pixels; truncation matches int() on the per-row values
+    center_x = (selected[:, 0] * width).astype(np.int32)
+    center_y = (selected[:, 1] * height).astype(np.int32)
+    w = (selected[:, 2] * width).astype(np.int32)
+    h = (selected[:, 3] * height).astype(np.int32)
+    boxes = np.stack([(center_x - w / 2).astype(np.int32),
+                      (center_y - h / 2).astype(np.int32), w, h], axis=1)
+    centers = np.stack([center_x, center_y], axis=1)
+
+    if len(boxes) == 0:
+        return boxes, confidences, centers
+    indices = np.asarray(cv2.dnn.NMSBoxes(boxes, confidences, score_threshold, nms_threshold),
+                         dtype=np.int64).reshape(-1)
+    return boxes[indices], confidences[indices], centers[indices]
+
+
+# DNN backends and targets by name (those missing from the OpenCV build are left out)
+DNN_BACKENDS = {name: getattr(cv2.dnn, constant) for name, constant in (
+    ("default", "DNN_BACKEND_DEFAULT"), ("opencv", "DNN_BACKEND_OPENCV"),
+    ("inference_engine", "DNN_BACKEND_INFERENCE_ENGINE"), ("cuda", "DNN_BACKEND_CUDA"),
+) if hasattr(cv2.dnn, constant)}
+DNN_TARGETS = {name: getattr(cv2.dnn, constant) for name, constant in (
+    ("cpu", "DNN_TARGET_CPU"), ("opencl", "DNN_TARGET_OPENCL"), ("opencl_fp16", "DNN_TARGET_OPENCL_FP16"),
+    ("cuda", "DNN_TARGET_CUDA"), ("cuda_fp16", "DNN_TARGET_CUDA_FP16"),
+) if hasattr(cv2.dnn, constant)}
+
+
+def load_yolo(weights, cfg, backend=None, target=None):
+    """Load a YOLO net and the names of its output layers; backend/target are DNN_BACKENDS/DNN_TARGETS names"""
+    net = cv2.dnn.readNet(weights, cfg)
+    if backend is not None:
+        net.setPreferableBackend(DNN_BACKENDS[backend])
+    if target is not None:
+        net.setPreferableTarget(DNN_TARGETS[target])
+    output_layers = list(net.getUnconnectedOutLayersNames())
+    return net, output_layers
+
+
+class Detector(ABC):
+    """Shared preprocessing and decoding; subclasses implement forward(blob) -> list of output arrays"""
+    input_size = (416, 416)
+    dynamic_input = False  # Whether the network takes other input sizes (multiples of 32)
+
+    def blob(self, frames, input_size=None):
+        return cv2.dnn.blobFromImages(frames, 0.00392, input_size or self.input_size, (0, 0, 0), True, crop=False)
+
+    @abstractmethod
+    def forward(self, blob):
+        """Output arrays of the network for a blob of frames"""
+
+    def outputs(self, frames, input_size=None):
+        """Raw output rows per frame: a list (one per frame) of lists of (rows, 85) arrays"""
+        outs = self.forward(self.blob(frames, input_size))
+        # (frames, rows, 85) for a batch, (rows, 85) for a single frame on some backends
+        outs = [out.reshape(len(frames), -1, out.shape[-1]) for out in outs]
+        return [[out[i] for out in outs] for i in range(len(frames))]
+
+    def detect(self, frames, input_size=None, **decode_options):
+        """Detect people on several frames in one forward pass; decode_detections' result per frame"""
+        return [decode_detections(outs, (frame.shape[1], frame.shape[0]), **decode_options)
+                for frame, outs in zip(frames, self.outputs(frames, input_size))]
+
+
+class OpenCVDetector(Detector):
+    def __init__(self, model, cfg="", backend=None, target=None, threads=None):
+        if threads:
+            # OpenCV's thread pool is process-wide; all workers of a pipeline set the same value
+            cv2.setNumThreads(threads)
+        self.net, self.output_layers = load_yolo(model, cfg, backend, target)
+        self.dynamic_input = bool(cfg)  # Darknet nets reshape to any input; imported ONNX graphs may not
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward(self.output_layers)
+
+
+class OnnxRuntimeDetector(Detector):
+    def __init__(self, model, int8=False, threads=None, provider="CPUExecutionProvider"):
+        if onnxruntime is None:
+            raise ImportError("The onnxruntime detector needs the onnxruntime package (pip install onnxruntime)")
+        if int8:
+            model = quantized_model(model)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        providers = [provider] if provider == "CPUExecutionProvider" else [provider, "CPUExecutionProvider"]
+        self.session = onnxruntime.InferenceSession(model, options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.dynamic_input = not all(isinstance(d, int) for d in model_input.shape[2:])
+
+    def forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})
+
+
+_quantize_lock = threading.Lock()
+
+
+def quantized_model(model):
+    """Path of the int8 dynamically quantized copy of an ONNX model, created next to it on first use"""
+    quantized = os.path.splitext(model)[0] + ".int8.onnx"
+    with _quantize_lock:
+        if not os.path.isfile(quantized) or os.path.getmtime(quantized) < os.path.getmtime(model):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            # Written under a temporary name, so other processes never load a partial file
+            partial = f"{quantized}.{os.getpid()}.tmp"
+            quantize_dynamic(model, partial, weight_type=QuantType.QInt8)
+            os.replace(partial, quantized)
+    return quantized
+
+
+DETECTORS = {"opencv": OpenCVDetector, "onnxruntime": OnnxRuntimeDetector}
+
+
+def create_detector(detector="opencv", model=None, **options):
+    """Detector from plain options, e.g. create_detector("onnxruntime", "yolov4.onnx", int8=True)"""
+    return DETECTORS[detector](model, **options)
+
+
+def detector_options(detector, model, cfg="", backend=None, target=None, int8=False, threads=None):
+    """create_detector keyword arguments for a detector from command-line or config settings
+
+    threads is the number of inference threads of each detector (see pipeline.threads_per_worker).
+    Raises ValueError for settings the detector would ignore.
+    """
+    if detector not in DETECTORS:
+        raise ValueError(f"Unknown detector: {detector}")
+    if detector == "opencv":
+        if int8:
+            raise ValueError("int8 weights need the onnxruntime detector")
+        return dict(detector=detector, model=model, cfg=cfg or "", backend=backend, target=target,
+                    threads=threads)
+    if backend is not None or target is not None:
+        raise ValueError("DNN backend and target only apply to the opencv detector")
+    return dict(detector=detector, model=model, int8=int8, threads=threads)
+
+
+def region_tiles(region, tiles=(1, 1), overlap=0.15):
+    """Split a region (x, y, w, h) into tiles (columns, rows) that overlap by a fraction of a tile"""
+    x, y, w, h = region
+    columns, rows = tiles
+    tile_w = int(np.ceil(w / (columns - (columns - 1) * overlap)))
+    tile_h = int(np.ceil(h / (rows - (rows - 1) * overlap)))
+    xs = np.linspace(x, x + w - tile_w, columns).astype(int) if columns > 1 else [x]
+    ys = np.linspace(y, y + h - tile_h, rows).astype(int) if rows > 1 else [y]
+    return [(int(tx), int(ty), min(tile_w, w), min(tile_h, h)) for ty in ys for tx in xs]
+
+
+def detect_regions(detector, frames, regions, tiles=(1, 1), overlap=0.15, nms_threshold=0.4):
+    """Detect people only inside a region of each frame, optionally on tiles of it
+
+    regions are (x, y, w, h) per frame, None for the whole frame. The crops
+    (or tiles) of all frames go through the detector in one batch. A single
+    crop keeps the pixel scale of the whole frame when the network takes
+    other input sizes, so a smaller region means a smaller, faster input;
+    tiles each go through at the full network resolution, so players look
+    larger to the network. Results are in frame coordinates, as
+    decode_detections' (boxes, confidences, centers) per frame; duplicates
+    from overlapping tiles are removed with NMS.
+    """
+    crops = []
+    owners = []  # (frame number, tile x, tile y) per crop
+    for i, (frame, region) in enumerate(zip(frames, regions)):
+        region = region or (0, 0, frame.shape[1], frame.shape[0])
+        for tx, ty, tw, th in region_tiles(region, tiles, overlap):
+            crops.append(frame[ty:ty + th, tx:tx + tw])
+            owners.append((i, tx, ty))
+
+    input_size = None
+    if tiles == (1, 1) and detector.dynamic_input:
+        # Input size (multiples of 32) at the whole frame's scale, for the largest crop
+        scales = np.array([(crop.shape[1] / frames[i].shape[1], crop.shape[0] / frames[i].shape[0])
+                           for crop, (i, _, _) in zip(crops, owners)]).max(axis=0)
+        input_size = tuple(max(32, int(np.ceil(side * scale / 32)) * 32)
+                           for side, scale in zip(detector.input_size, scales))
+
+    parts = [[] for _ in frames]
+    for (i, tx, ty), (boxes, confidences, centers) in zip(owners, detector.detect(crops, input_size)):
+        parts[i].append((boxes + [tx, ty, 0, 0], confidences, centers + [tx, ty]))
+
+    results = []
+    for frame_parts in parts:
+        boxes = np.concatenate([p[0] for p in frame_parts]).astype(np.int32)
+        confidences = np.concatenate([p[1] for p in frame_parts])
+        centers = np.concatenate([p[2] for p in frame_parts]).astype(np.int32)
+        if len(frame_parts) > 1 and len(boxes):
+            keep = np.asarray(cv2.dnn.NMSBoxes(boxes, confidences, 0.0, nms_threshold), dtype=np.int64).reshape(-1)
+            boxes, confidences, centers = boxes[keep], confidences[keep], centers[keep]
+        results.append((boxes, confidences, centers))
+    return results
@@ -0,0 +1,102 @@
+"""Prebuilt LSH index over ORB descriptors of the reference frame and keyframes
+
+Brute-force Hamming matching compares every descriptor of a frame with
+every descriptor of every reference image, and sorting all matches in
+Python adds to that. DescriptorIndex builds a FLANN LSH index once (and
+extends it when keyframes are added), finds the nearest neighbours of each
+query descriptor, keeps those that pass Lowe's ratio test and selects the
+best matches with np.argpartition, all on arrays.
+
+The ratio test is applied within each indexed image: overlapping keyframes
+contain the same scene points, so across images the second-nearest
+neighbour of a descriptor is usually the same point in another keyframe,
+and a global ratio test would reject exactly the matches that are most
+reliable. A query descriptor can therefore match several images (once
+each), and every image gets the votes of all the points it shares with the
+query.
+"""
+import cv2
+import numpy as np
+
+
+FLANN_INDEX_LSH = 6
+
+
+class DescriptorIndex:
+    def __init__(self, table_number=6, key_size=12, multi_probe_level=1, checks=50, max_neighbours=8):
+        self.max_neighbours = max_neighbours  # Neighbours searched per descriptor (with several images)
+        self.index_params = dict(algorithm=FLANN_INDEX_LSH, table_number=table_number,
+                                 key_size=key_size, multi_probe_level=multi_probe_level)
+        self.search_params = dict(checks=checks)
+        self.matcher = cv2.FlannBasedMatcher(self.index_params, self.search_params)
+        self.images = []  # Per indexed image: (points (N, 2) float32, descriptors)
+
+    def __len__(self):
+        return len(self.images)
+
+    def add(self, keypoints, descriptors):
+        """Index the ORB features of one more image; returns its image index"""
+        points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+        self.images.append((points, descriptors))
+        self.matcher.add([descriptors])
+        self.matcher.train()
+        return len(self.images) - 1
+
+    def copy(self):
+        """Independent index over the same images, for use in another thread"""
+        index = DescriptorIndex.__new__(DescriptorIndex)
+        index.max_neighbours = self.max_neighbours
+        index.index_params = self.index_params
+        index.search_params = self.search_params
+        index.matcher = cv2.FlannBasedMatcher(self.index_params, self.search_params)
+        index.images = list(self.images)
+        if index.images:
+            index.matcher.add([descriptors for _, descriptors in index.images])
+            index.matcher.train()
+        return index
+
+    def match(self, descriptors, ratio=0.75, max_matches=None):
+        """Ratio-test matches of query descriptors against all indexed images
+
+        Returns (query_indices, image_indices, train_indices, distances) as
+        arrays, best max_matches (all by default) in no particular order; a
+        query index appears at most once per image.
+        """
+        empty = (np.empty(0, np.int32),) * 3 + (np.empty(0, np.float32),)
+        if descriptors is None or not self.images or len(descriptors) < 2:
+            return empty
+
+        # Enough neighbours that the second-nearest in an image is usually among them
+        k = min(len(self.images) + 1, self.max_neighbours)
+        neighbours = np.array([(m.queryIdx, m.imgIdx, m.trainIdx, m.distance, row[-1].distance)
+                               for row in self.matcher.knnMatch(descriptors, k=k) if len(row) >= 2
+                               for m in row], dtype=np.float32).reshape(-1, 5)
+        # (LSH may return fewer than two neighbours; those rows cannot pass the ratio test)
+        if not len(neighbours):
+            return empty
+
+        # Neighbours are sorted by distance per query, so in each (query, image) group
+        # the first is the best match and the next one its second-nearest neighbour
+        group = neighbours[:, 0].astype(np.int64) * len(self.images) + neighbours[:, 1].astype(np.int64)
+        order = np.argsort(group, kind='stable')
+        starts = np.flatnonzero(np.r_[True, group[order][1:] != group[order][:-1]])
+        best = order[starts]
+        has_second = np.r_[starts[1:], len(order)] - starts > 1
+        # Without a second neighbour in the image, it is at least as far as the query's last neighbour
+        second_distance = neighbours[best, 4]
+        second_distance[has_second] = neighbours[order[starts[has_second] + 1], 3]
+
+        table = neighbours[best]
+        table = table[table[:, 3] < ratio * second_distance]
+        if max_matches is not None and len(table) > max_matches:
+            table = table[np.argpartition(table[:, 3], max_matches - 1)[:max_matches]]
+        return (table[:, 0].astype(np.int32), table[:, 1].astype(np.int32),
+                table[:, 2].astype(np.int32), table[:, 3])
+
+    def best_image(self, image_indices):
+        """Indexed image with the most matches (votes), and its vote count"""
+        if len(image_indices) == 0:
+            return None, 0
+        votes = np.bincount(image_indices, minlength=len(self.images))
+        best = int(np.argmax(votes))
+        return best, int(votes[best])
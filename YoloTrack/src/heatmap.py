@@ -0,0 +1,100 @@
+"""Heatmaps of player positions from a TrackStore
+
+Positions in a frame window are binned with np.bincount on the per-player
+views of the store (each player's frames are sorted, so the window is a
+np.searchsorted slice) and blurred with a separable float32 Gaussian. The
+blur is linear, so heatmaps of several players (all players, a team) bin the
+windowed positions of all of them in a single np.bincount and blur once.
+Binned counts are cached for single players, blurred heatmaps per player set
+and window; the cache key includes the number of
+records of the players, so results computed while the store still grows
+are recomputed when new positions arrive. Each cache is bounded by the size
+of the arrays it holds (an 800x600 float32 map is 1.9 MB).
+
+Teams come from a JSON roster of team name -> player IDs (load_teams).
+"""
+import json
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def load_teams(path):
+    """Team name -> player IDs from a JSON roster, e.g. {"Home": [0, 3, 4], "Away": [1, 2]}"""
+    with open(path) as f:
+        roster = json.load(f)
+    return {str(name): [int(player_id) for player_id in ids] for name, ids in roster.items()}
+
+
+class HeatmapEngine:
+    def __init__(self, store, size=(800, 600), sigma=10.0, teams=None, cache_bytes=64 * 1024 ** 2):
+        self.store = store
+        self.size = size  # Pitch (width, height) in pixels
+        self.sigma = sigma
+        self.teams = dict(teams or {})  # Team name -> player IDs
+        self.cache_bytes = cache_bytes  # Per cache; the newest entry is always kept
+        self._counts = OrderedDict()  # (player_id, start, end, records) -> float32 counts
+        self._heatmaps = OrderedDict()  # (player_ids, start, end, records) -> float32 heatmap
+
+        # Same kernel as scipy.ndimage.gaussian_filter (truncated at 4 sigma, reflected borders)
+        radius = int(4.0 * sigma + 0.5)
+        self.kernel = cv2.getGaussianKernel(2 * radius + 1, sigma, cv2.CV_32F)
+
+    def _cached(self, cache, key, compute):
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = compute()
+            # All entries of a cache have the pitch's size
+            while len(cache) > 1 and len(cache) * value.nbytes > self.cache_bytes:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return value
+
+    def window(self, player_id, start=None, end=None):
+        """Positions of a player in frames [start, end) (a view of the store)"""
+        frames = self.store.frames(player_id)
+        first = 0 if start is None else np.searchsorted(frames, start)
+        last = len(frames) if end is None else np.searchsorted(frames, end)
+        return self.store.positions(player_id)[first:last]
+
+    def bin(self, positions):
+        """Positions per pitch pixel, (height, width) float32"""
+        width, height = self.size
+        x, y = positions[:, 0].astype(np.int64), positions[:, 1].astype(np.int64)
+        inside = (0 <= x) & (x < width) & (0 <= y) & (y < height)
+        binned = np.bincount(y[inside] * width + x[inside], minlength=width * height)
+        return binned.astype(np.float32).reshape(height, width)
+
+    def counts(self, player_id, start=None, end=None):
+        """Positions per pitch pixel of a player, (height, width) float32"""
+        key = (player_id, start, end, len(self.store.frames(player_id)))
+        return self._cached(self._counts, key, lambda: self.bin(self.window(player_id, start, end)))
+
+    def blur(self, counts):
+        return cv2.sepFilter2D(counts, cv2.CV_32F, self.kernel, self.kernel, borderType=cv2.BORDER_REFLECT)
+
+    def heatmap(self, player_ids, start=None, end=None):
+        """Blurred heatmap of one player ID or of several (summed), in frames [start, end)"""
+        if np.isscalar(player_ids):
+            player_ids = (player_ids,)
+        player_ids = tuple(sorted(i for i in set(player_ids) if i in self.store))
+
+        def compute():
+            if len(player_ids) == 1:
+                return self.blur(self.counts(player_ids[0], start, end))
+            windows = [self.window(player_id, start, end) for player_id in player_ids]
+            return self.blur(self.bin(np.concatenate(windows) if windows else np.empty((0, 2))))
+        key = (player_ids, start, end, sum(len(self.store.frames(i)) for i in player_ids))
+        return self._cached(self._heatmaps, key, compute)
+
+    def all_players(self, start=None, end=None):
+        return self.heatmap(self.store.ids(), start, end)
+
+    def team(self, name, start=None, end=None):
+        return self.heatmap(self.teams[name], start, end)
+
+    def clear(self):
+        self._counts.clear()
+        self._heatmaps.clear()
@@ -0,0 +1,242 @@
+"""Staged, multi-threaded frame pipeline for YoloTrack
+
+    decode thread -> inference worker pool -> tracker thread -> renderer
+
+An optional schedule(index, frame) -> bool, called by the decode thread in
+frame order, tells the workers on which frames to run the detector (see
+scheduler.py). Workers take up to batch_size frames at a time (those
+already waiting, without blocking for more), so the detector can run on them
+in one batched forward pass.
+
+Stages are connected by bounded queues, so a slow stage applies back
+pressure instead of letting frames pile up in memory. Inference workers
+finish frames out of order; the tracker puts them back in frame order with a
+reorder buffer before tracking. The decoder only runs a bounded number of
+frames ahead of the tracker (queue_size + workers * batch_size), so a worker
+stalled on one frame cannot fill the reorder buffer without limit. The renderer runs in the calling thread
+(OpenCV windows must be driven from there).
+
+OpenCV releases the GIL in video decoding, ORB, homography estimation and
+DNN inference, so the stages really do run in parallel.
+
+Every inference worker loads its own network (about 250 MB for YOLOv4), so
+memory grows with the number of workers, and the DNN of each worker runs on
+its own threads: the default is a small pool (DEFAULT_WORKERS), and
+threads_per_worker splits the cores between the workers of all processes.
+"""
+import os
+import time
+import queue
+import threading
+
+
+_DONE = object()  # End-of-stream marker passed down the queues
+DEFAULT_WORKERS = 2  # Inference workers when not given; each one holds a network
+
+
+def threads_per_worker(workers, processes=1):
+    """Inference threads per worker, so that the workers of all processes share the cores"""
+    return max(1, (os.cpu_count() or 1) // (workers * processes))
+
+
+class StageStats:
+    """Items processed and time spent working (not waiting) by one stage"""
+    def __init__(self, name, threads=1):
+        self.name = name
+        self.threads = threads
+        self.count = 0
+        self.busy = 0.0  # Seconds, summed over the stage's threads
+        self._lock = threading.Lock()
+
+    def add(self, seconds, count=1):
+        with self._lock:
+            self.count += count
+            self.busy += seconds
+
+    @property
+    def throughput(self):
+        """Items per second the stage could sustain on its own"""
+        return self.count * self.threads / self.busy if self.busy > 0 else float('inf')
+
+
+def read_frames(cap):
+    """Yield the frames of an opened cv2.VideoCapture"""
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        yield frame
+
+
+class FramePipeline:
+    def __init__(self, frames, make_processor, track, render=None, workers=None, queue_size=8, schedule=None,
+                 batch_size=1):
+        """
+        frames: iterable of frames (e.g. read_frames(cap))
+        make_processor: called once per worker thread, returns process(frames, detects) -> results,
+            one result per frame of the batch (up to batch_size frames); per-thread state such
+            as a DNN net lives in its closure
+        schedule: schedule(index, frame) -> detect, called in frame order (None: always detect)
+        track: track(index, frame, result) -> tracked, called in frame order
+        render: render(index, frame, tracked) -> False to stop, None/True to go on
+        """
+        self.frames = frames
+        self.make_processor = make_processor
+        self.track = track
+        self.render = render
+        self.workers = workers or DEFAULT_WORKERS
+        self.queue_size = queue_size
+        self.schedule = schedule
+        self.batch_size = batch_size
+        self.stop_event = threading.Event()
+        self.stats = [StageStats("decode"), StageStats("inference", self.workers),
+                      StageStats("tracking"), StageStats("render")]
+        self.wall_time = 0.0
+        self.errors = []
+        # Frames decoded but not yet tracked; bounds the reorder buffer
+        self._in_flight = threading.Semaphore(queue_size + self.workers * batch_size)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _put(self, q, item):
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _guard(self, stage):
+        """Run a stage's thread body; an exception stops the whole pipeline"""
+        def run():
+            try:
+                stage()
+            except Exception as e:
+                print(f"Error in pipeline stage: {str(e)}")
+                self.errors.append(e)
+                self.stop()
+        return run
+
+    def _decode(self, frame_queue):
+        stats = self.stats[0]
+        frames = iter(self.frames)
+        index = 0
+        while not self.stop_event.is_set():
+            if not self._in_flight.acquire(timeout=0.1):
+                continue
+            start = time.perf_counter()
+            frame = next(frames, None)
+            if frame is None:
+                break
+            detect = self.schedule(index, frame) if self.schedule is not None else True
+            stats.add(time.perf_counter() - start)
+            if not self._put(frame_queue, (index, frame, detect)):
+                break
+            index += 1
+        for _ in range(self.workers):
+            self._put(frame_queue, _DONE)
+
+    def _infer(self, frame_queue, result_queue):
+        stats = self.stats[1]
+        process = self.make_processor()
+        done = False
+        while not done:
+            batch = []
+            while len(batch) < self.batch_size:
+                # Wait for the first frame only: a worker that waited for a full batch
+                # while holding the next frame to track could stall the pipeline
+                if not batch:
+                    item = self._get(frame_queue)
+                else:
+                    try:
+                        item = frame_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            if not batch:
+                break
+            start = time.perf_counter()
+            results = process([frame for _, frame, _ in batch], [detect for _, _, detect in batch])
+            stats.add(time.perf_counter() - start, len(batch))
+            if not all(self._put(result_queue, (index, frame, result))
+                       for (index, frame, _), result in zip(batch, results)):
+                break
+        self._put(result_queue, _DONE)
+
+    def _track(self, result_queue, render_queue):
+        stats = self.stats[2]
+        pending = {}  # Reorder buffer: frame index -> (frame, result)
+        next_index = 0
+        finished_workers = 0
+        while finished_workers < self.workers:
+            item = self._get(result_queue)
+            if item is _DONE:
+                finished_workers += 1
+                continue
+            index, frame, result = item
+            pending[index] = (frame, result)
+            while next_index in pending:
+                frame, result = pending.pop(next_index)
+                self._in_flight.release()
+                start = time.perf_counter()
+                tracked = self.track(next_index, frame, result)
+                stats.add(time.perf_counter() - start)
+                if not self._put(render_queue, (next_index, frame, tracked)):
+                    return
+                next_index += 1
+        self._put(render_queue, _DONE)
+
+    def run(self):
+        """Process all frames (or until render returns False); returns the stage statistics"""
+        frame_queue = queue.Queue(self.queue_size)
+        result_queue = queue.Queue(self.queue_size)
+        render_queue = queue.Queue(self.queue_size)
+        threads = [threading.Thread(target=self._guard(lambda: self._decode(frame_queue)), daemon=True)]
+        threads += [threading.Thread(target=self._guard(lambda: self._infer(frame_queue, result_queue)), daemon=True)
+                    for _ in range(self.workers)]
+        threads.append(threading.Thread(target=self._guard(lambda: self._track(result_queue, render_queue)),
+                                        daemon=True))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        stats = self.stats[3]
+        while True:
+            item = self._get(render_queue)
+            if item is _DONE:
+                break
+            index, frame, tracked = item
+            render_start = time.perf_counter()
+            keep_going = self.render(index, frame, tracked) if self.render is not None else True
+            stats.add(time.perf_counter() - render_start)
+            if keep_going is False:
+                break
+
+        self.stop()
+        for thread in threads:
+            thread.join()
+        self.wall_time = time.perf_counter() - start
+        return self.stats
+
+    def report(self):
+        """Per-stage throughput and overall fps"""
+        frames = self.stats[3].count
+        lines = [f"{frames} frames in {self.wall_time:.1f} s ({frames / max(self.wall_time, 1e-9):.1f} fps), "
+                 f"{self.workers} inference workers"]
+        for stats in self.stats:
+            lines.append(f"  {stats.name:<10}{stats.count:>7} items  busy {stats.busy:>7.2f} s  "
+                         f"{stats.throughput:>8.1f} items/s")
+        return "\n".join(lines)
@@ -0,0 +1,136 @@
+"""Multi-player tracker: Kalman prediction and optimal assignment
+
+Every track is a constant-velocity Kalman filter on pitch coordinates
+(x, y, vx, vy). Each frame all tracks are predicted at once, the cost matrix
+between predicted positions and detections is built in one broadcast, and
+scipy.optimize.linear_sum_assignment picks the assignment with the smallest
+total distance, so two detections can never take the same player. Pairs
+farther apart than max_distance are not assigned.
+
+Unassigned detections start new tentative tracks, which get an ID once
+they are confirmed by min_hits detections; until then their detections are
+reported with ID -1. A track dies after max_misses frames without a
+detection; tentative tracks (usually false detections) die at their first
+miss.
+"""
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+# State transition of the constant-velocity filter (one frame per step); positions are measured
+F = np.array([[1, 0, 1, 0],
+              [0, 1, 0, 1],
+              [0, 0, 1, 0],
+              [0, 0, 0, 1]], dtype=np.float64)
+
+
+class PlayerTracker:
+    def __init__(self, max_distance=50.0, max_misses=25, min_hits=3,
+                 process_noise=0.5, measurement_noise=3.0, initial_velocity_noise=10.0):
+        self.max_distance = max_distance  # Pitch pixels between a prediction and its detection
+        self.max_misses = max_misses
+        self.min_hits = min_hits
+
+        # Acceleration noise (pixels/frame^2) drives position and velocity together
+        G = np.array([[0.5, 0], [0, 0.5], [1, 0], [0, 1]])
+        self.Q = G @ G.T * process_noise ** 2
+        self.R = np.eye(2) * measurement_noise ** 2
+        self.P0 = np.diag([measurement_noise ** 2, measurement_noise ** 2,
+                           initial_velocity_noise ** 2, initial_velocity_noise ** 2])
+
+        # One row per live track; tentative tracks have ID -1
+        self.ids = np.empty(0, dtype=np.int64)
+        self.states = np.empty((0, 4))
+        self.covariances = np.empty((0, 4, 4))
+        self.hits = np.empty(0, dtype=np.int64)
+        self.misses = np.empty(0, dtype=np.int64)
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def predict(self):
+        """Advance every track by one frame"""
+        self.states = self.states @ F.T
+        self.covariances = F @ self.covariances @ F.T + self.Q
+
+    @property
+    def positions(self):
+        """Current (predicted or updated) positions of the live tracks, (N, 2)"""
+        return self.states[:, :2]
+
+    def update(self, points):
+        """Track the detections of the next frame; returns the track ID of each point, (M,)
+
+        points are (M, 2) pitch coordinates; points of tentative tracks get -1.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.predict()
+
+        # Optimal assignment on the gated distance matrix
+        rows = cols = np.empty(0, dtype=np.int64)
+        if len(self.ids) and len(points):
+            cost = np.linalg.norm(self.positions[:, np.newaxis] - points[np.newaxis], axis=2)
+            gated = cost > self.max_distance
+            cost[gated] = self.max_distance * 1e3  # Feasible, but never preferred to a gated-in pair
+            rows, cols = linear_sum_assignment(cost)
+            keep = ~gated[rows, cols]
+            rows, cols = rows[keep], cols[keep]
+
+        if len(rows):
+            self.correct(rows, points[cols])
+        missed = np.ones(len(self.ids), dtype=bool)
+        missed[rows] = False
+        self.misses[missed] += 1
+        self.misses[rows] = 0
+        self.hits[rows] += 1
+
+        # Confirmed tracks get the next free IDs
+        confirmed = np.flatnonzero((self.ids < 0) & (self.hits >= self.min_hits))
+        self.ids[confirmed] = np.arange(self.next_id, self.next_id + len(confirmed))
+        self.next_id += len(confirmed)
+
+        point_ids = np.full(len(points), -1, dtype=np.int64)
+        point_ids[cols] = self.ids[rows]
+        assigned = np.zeros(len(points), dtype=bool)
+        assigned[cols] = True
+
+        # Track death: missed too long, or missed before being confirmed
+        alive = (self.misses <= self.max_misses) & ~(missed & (self.ids < 0))
+        self.keep(alive)
+
+        # Track birth for the unassigned detections
+        point_ids[~assigned] = self.birth(points[~assigned])
+        return point_ids
+
+    def correct(self, rows, measurements):
+        """Kalman update of the tracks at rows with their assigned measurements"""
+        P = self.covariances[rows]
+        S = P[:, :2, :2] + self.R
+        K = P[:, :, :2] @ np.linalg.inv(S)  # (n, 4, 2)
+        innovation = measurements - self.states[rows, :2]
+        self.states[rows] += np.einsum('nij,nj->ni', K, innovation)
+        self.covariances[rows] = P - K @ P[:, :2, :]
+
+    def keep(self, mask):
+        self.ids = self.ids[mask]
+        self.states = self.states[mask]
+        self.covariances = self.covariances[mask]
+        self.hits = self.hits[mask]
+        self.misses = self.misses[mask]
+
+    def birth(self, points):
+        """Start a track at each point; returns their IDs (-1 while tentative)"""
+        n = len(points)
+        ids = np.full(n, -1, dtype=np.int64)
+        if self.min_hits <= 1:
+            ids = np.arange(self.next_id, self.next_id + n)
+            self.next_id += n
+        states = np.zeros((n, 4))
+        states[:, :2] = points
+        self.ids = np.concatenate([self.ids, ids])
+        self.states = np.vstack([self.states, states])
+        self.covariances = np.concatenate([self.covariances, np.broadcast_to(self.P0, (n, 4, 4))])
+        self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int64)])
+        self.misses = np.concatenate([self.misses, np.zeros(n, dtype=np.int64)])
+        return ids
@@ -0,0 +1,142 @@
+"""Adaptive YOLO inference scheduling with motion propagation in between
+
+Players move only a few pixels between frames at 25-50 fps, so running the
+detector on every frame is mostly wasted work. InferenceScheduler runs it
+on a frame when any of these holds:
+
+- interval frames have passed since the last detection,
+- the image changed a lot since the last detected frame (mean absolute
+  difference of small grey thumbnails above motion_threshold; cuts, fast
+  pans),
+- the propagated tracks became too uncertain (a player predicted more than
+  uncertainty_threshold pixels from where it was last detected).
+
+On the frames in between, the centers of the last detection are moved with
+a constant-velocity model estimated from the last two detections.
+
+should_detect is called in frame order by the decode stage, propagate in
+frame order by the tracking stage; the tracking stage asks for the next
+detection when the uncertainty gets too high (it lands a few frames later,
+as many as are queued between the two stages), or when a frame scheduled
+for detection comes back without detections (e.g. its camera-to-pitch
+transform failed).
+"""
+import threading
+
+import cv2
+import numpy as np
+
+
+class InferenceScheduler:
+    def __init__(self, interval=5, motion_threshold=12.0, uncertainty_threshold=15.0,
+                 max_match_distance=50.0, thumbnail_size=(64, 36)):
+        self.interval = interval
+        self.motion_threshold = motion_threshold  # Mean absolute grey difference, 0-255
+        self.uncertainty_threshold = uncertainty_threshold  # Camera pixels of extrapolated motion
+        self.max_match_distance = max_match_distance  # Camera pixels between detections of a player
+        self.thumbnail_size = thumbnail_size
+
+        # Decode stage
+        self.last_detected_index = None
+        self.last_thumbnail = None
+        self.detection_requested = threading.Event()
+        self.scheduled = set()  # Frames scheduled for detection that the tracking stage has not seen yet
+        self.scheduled_lock = threading.Lock()
+        self.reasons = {"interval": 0, "motion": 0, "uncertainty": 0, "lost": 0}
+        self.frames = 0
+
+        # Tracking stage
+        self.centers = np.empty((0, 2), dtype=np.float32)  # Last detected centers
+        self.velocities = np.empty((0, 2), dtype=np.float32)  # Pixels per frame
+        self.confidences = np.empty(0, dtype=np.float32)
+        self.detection_index = None
+        self.uncertainty = 0.0
+        self.max_uncertainty = 0.0
+        self.requested_reason = "uncertainty"  # Why detection_requested was set
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+
+    def should_detect(self, index, frame):
+        """Whether to run the detector on this frame (call in frame order)"""
+        self.frames += 1
+        thumbnail = self.thumbnail(frame)
+        reason = None
+        if self.last_detected_index is None or index - self.last_detected_index >= self.interval:
+            reason = "interval"
+        elif self.detection_requested.is_set():
+            reason = self.requested_reason
+        elif cv2.absdiff(thumbnail, self.last_thumbnail).mean() > self.motion_threshold:
+            reason = "motion"
+        if reason is None:
+            return False
+
+        self.reasons[reason] += 1
+        self.detection_requested.clear()
+        self.last_detected_index = index
+        self.last_thumbnail = thumbnail
+        with self.scheduled_lock:
+            self.scheduled.add(index)
+        return True
+
+    def propagate(self, index, centers=None, confidences=None):
+        """Centers and confidences of a frame (call in frame order)
+
+        Detected frames pass their centers, which also update the motion
+        model; skipped frames pass None and get the predicted centers. A frame
+        that was scheduled for detection but comes back without centers (or
+        is dropped: call propagate(index) for it anyway) asks for a detection
+        on the next frame, so stale centers are not propagated until the next
+        interval.
+        """
+        with self.scheduled_lock:
+            scheduled = index in self.scheduled
+            self.scheduled.discard(index)
+        if scheduled and centers is None:
+            self.request_detection("lost")
+        if centers is not None:
+            self.update_motion(index, np.asarray(centers, dtype=np.float32).reshape(-1, 2),
+                               np.asarray(confidences, dtype=np.float32).reshape(-1))
+            return centers, confidences
+        if self.detection_index is None:
+            return np.empty((0, 2), dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        frames = index - self.detection_index
+        displacement = self.velocities * frames
+        self.uncertainty = float(np.linalg.norm(displacement, axis=1).max(initial=0.0))
+        self.max_uncertainty = max(self.max_uncertainty, self.uncertainty)
+        if self.uncertainty > self.uncertainty_threshold:
+            self.request_detection("uncertainty")
+        return np.rint(self.centers + displacement).astype(np.int32), self.confidences
+
+    def request_detection(self, reason):
+        """Ask the decode stage to run the detector on its next frame"""
+        if not self.detection_requested.is_set():
+            self.requested_reason = reason
+            self.detection_requested.set()
+
+    def update_motion(self, index, centers, confidences):
+        """Velocities of the new detections from their nearest predecessors"""
+        velocities = np.zeros_like(centers)
+        if self.detection_index is not None and len(centers) and len(self.centers):
+            frames = index - self.detection_index
+            predicted = self.centers + self.velocities * frames
+            distances = np.linalg.norm(centers[:, np.newaxis] - predicted[np.newaxis], axis=2)
+            nearest = distances.argmin(axis=1)
+            matched = distances[np.arange(len(centers)), nearest] < self.max_match_distance
+            velocities[matched] = (centers[matched] - self.centers[nearest[matched]]) / frames
+        self.centers = centers
+        self.velocities = velocities
+        self.confidences = confidences
+        self.detection_index = index
+        self.uncertainty = 0.0
+
+    def report(self):
+        """Detector runs per reason and the share of frames skipped"""
+        detected = sum(self.reasons.values())
+        skipped = self.frames - detected
+        reasons = ", ".join(f"{count} {reason}" for reason, count in self.reasons.items())
+        return (f"Detector ran on {detected} of {self.frames} frames ({reasons}); "
+                f"{skipped} propagated ({skipped / max(self.frames, 1):.0%}), "
+                f"max uncertainty {self.max_uncertainty:.1f} px")
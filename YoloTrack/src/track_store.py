@@ -0,0 +1,202 @@
+"""Compact storage of player tracks, on disk and in memory
+
+Tracks are stored as fixed-size binary records (TRACK_DTYPE), one per
+player per frame, appended in frame order. A file is a plain array of
+records without a header, so it can be streamed while a video is processed
+and read back in one call with read_tracks (or np.memmap for large files).
+
+In memory, TrackStore keeps the same fields as columns in compact dtypes,
+partitioned by player: every ID has its own preallocated arrays that grow
+by doubling, so the track of one player is a view, never a copy. It can be
+saved to and loaded from .npz, and built from a (memory-mapped) track file.
+"""
+import os
+
+import numpy as np
+
+
+# 12 bytes per record; pitch coordinates are pixels of PitchTracker.OUTPUT_SIZE
+TRACK_DTYPE = np.dtype([
+    ('frame', '<u4'),
+    ('id', '<u2'),
+    ('x', '<i2'),
+    ('y', '<i2'),
+    ('confidence', '<f2'),
+])
+
+
+class TrackWriter:
+    """Append per-frame track arrays to a file through a fixed in-memory buffer"""
+    def __init__(self, path, buffer_records=65536):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.buffer = np.empty(buffer_records, dtype=TRACK_DTYPE)
+        self.size = 0  # Records in the buffer
+        self.count = 0  # Records written in total
+
+    def append(self, frame, ids, points, confidences):
+        """Add the players of one frame: ids (N,), points (N, 2) pitch pixels, confidences (N,)"""
+        n = len(ids)
+        if n == 0:
+            return
+        if self.size + n > len(self.buffer):
+            self.flush()
+            if n > len(self.buffer):
+                self.buffer = np.empty(n, dtype=TRACK_DTYPE)
+        points = np.asarray(points).reshape(-1, 2)
+        rows = self.buffer[self.size:self.size + n]
+        rows['frame'] = frame
+        rows['id'] = ids
+        rows['x'] = points[:, 0]
+        rows['y'] = points[:, 1]
+        rows['confidence'] = confidences
+        self.size += n
+        self.count += n
+
+    def flush(self):
+        self.buffer[:self.size].tofile(self.file)
+        self.size = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_tracks(path, mmap=False):
+    """All records of a track file (memory-mapped instead of read when mmap is True)"""
+    if mmap:
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=TRACK_DTYPE)  # np.memmap cannot map an empty file
+        return np.memmap(path, dtype=TRACK_DTYPE, mode='r')
+    return np.fromfile(path, dtype=TRACK_DTYPE)
+
+
+class PlayerColumns:
+    """Growable columns of one player: frame (N,), position (N, 2) pitch pixels, confidence (N,)"""
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.frame = np.empty(capacity, dtype=TRACK_DTYPE['frame'])
+        self.position = np.empty((capacity, 2), dtype=TRACK_DTYPE['x'])
+        self.confidence = np.empty(capacity, dtype=TRACK_DTYPE['confidence'])
+
+    def reserve(self, size):
+        if size <= len(self.frame):
+            return
+        capacity = max(size, 2 * len(self.frame))
+        for name in ('frame', 'position', 'confidence'):
+            column = getattr(self, name)
+            grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, frame, x, y, confidence):
+        if self.size == len(self.frame):
+            self.reserve(self.size + 1)
+        i = self.size
+        self.frame[i] = frame
+        self.position[i] = x, y
+        self.confidence[i] = confidence
+        self.size += 1
+
+    def extend(self, frames, positions, confidences):
+        n = len(frames)
+        self.reserve(self.size + n)
+        self.frame[self.size:self.size + n] = frames
+        self.position[self.size:self.size + n] = positions
+        self.confidence[self.size:self.size + n] = confidences
+        self.size += n
+
+
+class TrackStore:
+    """In-memory tracks by player; append has the same signature as TrackWriter.append"""
+    def __init__(self, capacity=256):
+        self.capacity = capacity  # Initial rows per player
+        self.players = {}  # Player ID -> PlayerColumns
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, player_id):
+        return player_id in self.players
+
+    def ids(self):
+        return sorted(self.players)
+
+    def append(self, frame, ids, points, confidences):
+        """Add the players of one frame: ids (N,), points (N, 2) pitch pixels, confidences (N,)"""
+        points = np.asarray(points).reshape(-1, 2).tolist()
+        confidences = np.broadcast_to(np.asarray(confidences, dtype=np.float32), len(points)).tolist()
+        for player_id, (x, y), confidence in zip(np.asarray(ids).tolist(), points, confidences):
+            columns = self.players.get(player_id)
+            if columns is None:
+                columns = self.players[player_id] = PlayerColumns(self.capacity)
+            columns.add(frame, x, y, confidence)
+        self.count += len(points)
+
+    def frames(self, player_id):
+        """Frames in which a player was tracked (a view)"""
+        columns = self.players[player_id]
+        return columns.frame[:columns.size]
+
+    def positions(self, player_id):
+        """(N, 2) pitch positions of a player (a view)"""
+        columns = self.players[player_id]
+        return columns.position[:columns.size]
+
+    def confidences(self, player_id):
+        columns = self.players[player_id]
+        return columns.confidence[:columns.size]
+
+    def records(self):
+        """All tracks as TRACK_DTYPE records in frame order (a copy)"""
+        records = np.empty(self.count, dtype=TRACK_DTYPE)
+        start = 0
+        for player_id, columns in self.players.items():
+            rows = records[start:start + columns.size]
+            rows['frame'] = columns.frame[:columns.size]
+            rows['id'] = player_id
+            rows['x'] = columns.position[:columns.size, 0]
+            rows['y'] = columns.position[:columns.size, 1]
+            rows['confidence'] = columns.confidence[:columns.size]
+            start += columns.size
+        return records[np.argsort(records['frame'], kind='stable')]
+
+    @classmethod
+    def from_records(cls, records):
+        """Store from TRACK_DTYPE records, e.g. read_tracks(path, mmap=True)"""
+        store = cls()
+        ids = records['id']
+        order = np.argsort(ids, kind='stable')  # Keeps each player's records in frame order
+        bounds = np.flatnonzero(np.diff(ids[order])) + 1
+        for group in np.split(order, bounds) if len(order) else []:
+            rows = records[group]
+            columns = PlayerColumns(len(rows))
+            columns.extend(rows['frame'], np.stack([rows['x'], rows['y']], axis=1), rows['confidence'])
+            store.players[int(rows['id'][0])] = columns
+            store.count += len(rows)
+        return store
+
+    def save(self, path, compressed=True):
+        """Write the tracks as an .npz of frame, id, x, y and confidence columns"""
+        records = self.records()
+        save = np.savez_compressed if compressed else np.savez
+        save(path, **{name: records[name] for name in TRACK_DTYPE.names})
+
+    @classmethod
+    def load(cls, path):
+        """Store from an .npz written by save, or from a .tracks record file"""
+        if not str(path).endswith('.npz'):
+            return cls.from_records(read_tracks(path, mmap=True))
+        with np.load(path) as data:
+            records = np.empty(len(data['frame']), dtype=TRACK_DTYPE)
+            for name in TRACK_DTYPE.names:
+                records[name] = data[name]
+        return cls.from_records(records)
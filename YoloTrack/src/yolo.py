@@ -1,9 +1,17 @@
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
-from collections import defaultdict
-from scipy.ndimage import gaussian_filter
 import os
+import sys
+import argparse
+from pipeline import DEFAULT_WORKERS, FramePipeline, read_frames, threads_per_worker
+from camera_motion import CameraMotionTracker
+from feature_index import DescriptorIndex
+from scheduler import InferenceScheduler
+from player_tracker import PlayerTracker
+from track_store import TrackStore
+from heatmap import HeatmapEngine, load_teams
+from detectors import DETECTORS, DNN_BACKENDS, DNN_TARGETS, create_detector, detect_regions, detector_options
 
 
 class PitchTracker:
@@ -15,16 +23,38 @@ class PitchTracker:
         self.reference_features = None
         self.reference_frame = None
         self.orb = cv2.ORB_create(nfeatures=2000)
-        self.bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        self.reference_index = None  # LSH index over the reference descriptors, built once per reference
         self.transform_matrix = None
+        self.motion_params = None  # CameraMotionTracker parameters when incremental tracking is enabled
+        self.motion_tracker = None
 
-    def initialize_reference(self, frame):
-        """Initialize reference frame with feature points"""
+    def set_reference(self, frame, points):
+        """Initialize reference frame and pitch corners without a GUI
+
+        points are the 4 pitch corners in the frame: top-left, top-right,
+        bottom-left, bottom-right.
+        """
         self.reference_frame = frame.copy()
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         keypoints, descriptors = self.orb.detectAndCompute(gray, None)
         self.reference_features = (keypoints, descriptors)
+        self.reference_index = DescriptorIndex()
+        if descriptors is not None:
+            self.reference_index.add(keypoints, descriptors)
+        self.reference_points = np.float32(points).reshape(4, 2)
+        if self.motion_params is not None:
+            self.enable_motion_tracking(**self.motion_params)
+
+    def enable_motion_tracking(self, **params):
+        """Follow the camera with optical flow from frame to frame (in frame order) instead of
+        matching every frame against the reference; see CameraMotionTracker for params"""
+        self.motion_params = params
+        if self.reference_frame is not None:
+            gray = cv2.cvtColor(self.reference_frame, cv2.COLOR_BGR2GRAY)
+            self.motion_tracker = CameraMotionTracker(gray, **params)
 
+    def initialize_reference(self, frame):
+        """Initialize reference frame with feature points"""
         print("\nPitch Corner Selection Instructions:")
         print("Select 4 points that form a rectangle on the pitch:")
         print("1. Top-Left corner of visible pitch area")
@@ -53,33 +83,64 @@ class PitchTracker:
                 return False
 
         cv2.destroyAllWindows()
-        self.reference_points = np.float32(points)
+        self.set_reference(frame, points)
         return True
 
     def update_transform(self, frame):
-        """Update transformation matrix based on feature matching"""
-        if self.reference_features is None:
+        """Update transformation matrix based on feature matching (or camera motion tracking)"""
+        if self.motion_tracker is not None:
+            H = self.motion_tracker.update(frame)
+            transform_matrix = self.transform_from_homography(H) if H is not None else None
+        else:
+            transform_matrix = self.compute_transform(frame)
+        if transform_matrix is None:
             return False
+        self.transform_matrix = transform_matrix
+        return True
+
+    def apply_transform(self, frame, transform_matrix):
+        """Use a matrix computed by a pipeline worker; with motion tracking the workers
+        compute none and the camera is followed here, in frame order"""
+        if transform_matrix is None:
+            return self.update_transform(frame)
+        self.transform_matrix = transform_matrix
+        return True
+
+    def compute_transform(self, frame, orb=None, index=None):
+        """Camera-to-pitch matrix of a frame, or None; does not change the tracker
+
+        Pipeline workers pass their own orb and copy of the reference index, so
+        several frames can be processed at once against the shared reference.
+        """
+        if self.reference_features is None:
+            return None
+        orb = orb or self.orb
+        index = index or self.reference_index
 
         try:
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            keypoints, descriptors = self.orb.detectAndCompute(gray, None)
+            keypoints, descriptors = orb.detectAndCompute(gray, None)
             if descriptors is None:
-                return False
-
-            matches = self.bf.match(self.reference_features[1], descriptors)
-            matches = sorted(matches, key=lambda x: x.distance)
-            good_matches = matches[:30]
+                return None
 
-            if len(good_matches) < 10:
-                return False
+            # Best 30 ratio-test matches of the frame against the reference
+            query, _, train, _ = index.match(descriptors, max_matches=30)
+            if len(query) < 10:
+                return None
 
-            ref_pts = np.float32([self.reference_features[0][m.queryIdx].pt for m in good_matches])
-            curr_pts = np.float32([keypoints[m.trainIdx].pt for m in good_matches])
+            ref_pts = index.images[0][0][train]
+            curr_pts = np.float32([kp.pt for kp in keypoints])[query]
             H, mask = cv2.findHomography(curr_pts, ref_pts, cv2.RANSAC, 5.0)
             if H is None:
-                return False
+                return None
+            return self.transform_from_homography(H)
+        except Exception as e:
+            print(f"Error in update_transform: {str(e)}")
+            return None
 
+    def transform_from_homography(self, H):
+        """Camera-to-pitch matrix from a frame -> reference frame homography"""
+        try:
             ref_corners = self.reference_points
             dst_corners = np.float32([
                 [0, 0],
@@ -93,27 +154,67 @@ class PitchTracker:
                 np.linalg.inv(H)
             ).reshape(-1, 2)
 
-            self.transform_matrix = cv2.getPerspectiveTransform(
+            return cv2.getPerspectiveTransform(
                 transformed_corners,
                 dst_corners
             )
-            return True
         except Exception as e:
-            print(f"Error in update_transform: {str(e)}")
-            return False
+            print(f"Error in transform_from_homography: {str(e)}")
+            return None
 
-    def transform_point(self, point):
-        """Transform a point using current transformation matrix"""
-        if self.transform_matrix is None:
+    def pitch_region(self, frame_size, transform_matrix=None, margin=0.1):
+        """Bounding box (x, y, w, h) of the pitch in a frame of frame_size (width, height), or None
+
+        The pitch corners are mapped into the frame with the inverse of the
+        camera-to-pitch matrix; the box is grown by margin (a fraction of its
+        size, for players whose body sticks out of the pitch) and clipped to
+        the frame.
+        """
+        transform_matrix = self.transform_matrix if transform_matrix is None else transform_matrix
+        if transform_matrix is None:
+            return None
+        width, height = frame_size
+        corners = self.inverse_transform_points([[0, 0], [self.OUTPUT_SIZE[0], 0],
+                                                 [0, self.OUTPUT_SIZE[1]], [self.OUTPUT_SIZE[0], self.OUTPUT_SIZE[1]]],
+                                                transform_matrix)
+        if not np.isfinite(corners).all():
             return None
+        (x0, y0), (x1, y1) = corners.min(axis=0), corners.max(axis=0)
+        pad_x, pad_y = (x1 - x0) * margin, (y1 - y0) * margin
+        x0, y0 = max(int(x0 - pad_x), 0), max(int(y0 - pad_y), 0)
+        x1, y1 = min(int(np.ceil(x1 + pad_x)), width), min(int(np.ceil(y1 + pad_y)), height)
+        if x1 - x0 < 32 or y1 - y0 < 32:
+            return None
+        return x0, y0, x1 - x0, y1 - y0
 
-        try:
-            point_h = np.array([[[point[0], point[1]]]], dtype=np.float32)
-            transformed = cv2.perspectiveTransform(point_h, self.transform_matrix)
-            return (int(transformed[0][0][0]), int(transformed[0][0][1]))
-        except Exception as e:
-            print(f"Error in transform_point: {str(e)}")
+    def transform_points(self, points, transform_matrix=None):
+        """Camera pixels to pitch pixels for any number of points in one call
+
+        points is array-like of shape (..., 2), e.g. all detection centers of a
+        frame or a whole track history; returns float32 of the same shape, or
+        None when there is no transformation matrix.
+        """
+        transform_matrix = self.transform_matrix if transform_matrix is None else transform_matrix
+        if transform_matrix is None:
+            return None
+        points = np.asarray(points, dtype=np.float32)
+        if points.size == 0:
+            return points.reshape(-1, 2) if points.ndim < 2 else points
+        return cv2.perspectiveTransform(points.reshape(-1, 1, 2), transform_matrix).reshape(points.shape)
+
+    def inverse_transform_points(self, points, transform_matrix=None):
+        """Pitch pixels back to camera pixels, the inverse of transform_points"""
+        transform_matrix = self.transform_matrix if transform_matrix is None else transform_matrix
+        if transform_matrix is None:
+            return None
+        return self.transform_points(points, np.linalg.inv(transform_matrix))
+
+    def transform_point(self, point, transform_matrix=None):
+        """Transform a point using current transformation matrix (or the one given)"""
+        transformed = self.transform_points([point], transform_matrix)
+        if transformed is None:
             return None
+        return (int(transformed[0][0]), int(transformed[0][1]))
 
 
 def draw_2d_pitch(size=(800, 600)):
@@ -132,91 +233,210 @@ def draw_2d_pitch(size=(800, 600)):
     return pitch
 
 
-def assign_player_id(center, existing_players, max_distance=50):
-    """Assign player ID based on proximity to previous positions"""
-    closest_id = -1
-    min_distance = float('inf')
-
-    for player_id, positions in existing_players.items():
-        if positions:
-            last_pos = positions[-1]
-            distance = np.sqrt((center[0] - last_pos[0]) ** 2 + (center[1] - last_pos[1]) ** 2)
-            if distance < max_distance and distance < min_distance:
-                min_distance = distance
-                closest_id = player_id
-
-    return closest_id if closest_id != -1 else max(existing_players.keys(), default=-1) + 1
-
-
-def visualize_player_data(player_positions, player_colors, tracker):
-    """Visualize player tracking data"""
-    if not player_positions:
+def assign_players(tracker, centers, player_tracker, store=None, frame=None, confidences=None):
+    """Map detection centers to the pitch and give each a track ID
+
+    Points inside the pitch go through player_tracker (a PlayerTracker) and,
+    if a store is given (TrackStore or TrackWriter), are appended to it as
+    frame `frame` with their confidences. Returns [(center, player_id,
+    pitch_point)].
+    """
+    centers = np.asarray(centers).reshape(-1, 2)
+    transformed = tracker.transform_points(centers)
+    if transformed is None:
+        transformed = np.empty((0, 2), np.float32)
+        centers = centers[:0]
+
+    # Truncated to pitch pixels, as int() did per point; keep points within pitch bounds
+    points = transformed.astype(np.int32)
+    within = ((0 <= points[:, 0]) & (points[:, 0] <= tracker.OUTPUT_SIZE[0]) &
+              (0 <= points[:, 1]) & (points[:, 1] <= tracker.OUTPUT_SIZE[1]))
+    inside = list(zip(map(tuple, centers[within].tolist()), map(tuple, points[within].tolist())))
+    inside_confidences = (np.asarray(confidences)[within].tolist() if confidences is not None
+                          else [1.0] * len(inside))
+
+    # Assign player IDs for the whole frame at once; unconfirmed tracks (-1) are left out
+    player_ids = player_tracker.update([point for _, point in inside]).tolist()
+    tracked = []
+    tracked_confidences = []
+    for (center, point), player_id, confidence in zip(inside, player_ids, inside_confidences):
+        if player_id >= 0:
+            tracked.append((center, player_id, point))
+            tracked_confidences.append(confidence)
+    if store is not None and tracked:
+        store.append(frame, [player_id for _, player_id, _ in tracked],
+                     [point for _, _, point in tracked], tracked_confidences)
+    return tracked
+
+
+def visualize_player_data(store, player_colors, tracker, engine=None, teams=None):
+    """Visualize player tracking data (a TrackStore)
+
+    Asks for a player ID, "all" or a team name (teams: team name -> player
+    IDs, see heatmap.load_teams), optionally followed by a frame window
+    (start end); heatmaps come from a cached HeatmapEngine.
+    """
+    if not len(store):
         print("No tracking data available")
         return
+    engine = engine or HeatmapEngine(store, tracker.OUTPUT_SIZE, teams=teams)
+    pitch_img = cv2.cvtColor(draw_2d_pitch(tracker.OUTPUT_SIZE), cv2.COLOR_BGR2RGB)
 
-    print("\nAvailable Player IDs:", list(player_positions.keys()))
+    print("\nAvailable Player IDs:", store.ids())
+    if engine.teams:
+        print("Teams:", ", ".join(engine.teams))
     while True:
         try:
-            selected_id = int(input("Enter Player ID to visualize (or -1 to exit): "))
-            if selected_id == -1:
+            request = input("Enter Player ID, 'all' or a team name to visualize, optionally with a frame "
+                            "window 'start end' (or -1 to exit): ").split()
+            if not request:
+                continue
+            if request[0] == "-1":
                 break
-            if selected_id in player_positions:
-                # Create figure with subplots
-                fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-                # Plot movement trail
-                pitch_img = draw_2d_pitch(tracker.OUTPUT_SIZE)
-                ax1.imshow(cv2.cvtColor(pitch_img, cv2.COLOR_BGR2RGB))
-                positions = np.array(player_positions[selected_id])
-                ax1.plot(positions[:, 0], positions[:, 1], '-o',
-                         color=np.array(player_colors[selected_id]) / 255.0,
-                         linewidth=2, markersize=4)
-                ax1.set_title(f"Player {selected_id} Movement Trail")
-
-                # Plot heatmap
-                heatmap_data = np.zeros(tracker.OUTPUT_SIZE[::-1])
-                for (x, y) in player_positions[selected_id]:
-                    if 0 <= x < tracker.OUTPUT_SIZE[0] and 0 <= y < tracker.OUTPUT_SIZE[1]:
-                        heatmap_data[y, x] += 1
-
-                heatmap_data = gaussian_filter(heatmap_data, sigma=10)
-                ax2.imshow(cv2.cvtColor(pitch_img, cv2.COLOR_BGR2RGB))
-                heatmap = ax2.imshow(heatmap_data, alpha=0.6, cmap='hot')
-                plt.colorbar(heatmap, ax=ax2)
-                ax2.set_title(f"Player {selected_id} Heatmap")
-
-                plt.tight_layout()
-                plt.show()
+            start, end = (int(request[1]), int(request[2])) if len(request) >= 3 else (None, None)
+            if request[0] == "all":
+                selected_ids, title = store.ids(), "All Players"
+            elif request[0] in engine.teams:
+                selected_ids = [i for i in engine.teams[request[0]] if i in store]
+                title = f"Team {request[0]}"
+                if not selected_ids:
+                    print("No tracked players in this team")
+                    continue
             else:
-                print("Invalid player ID")
+                selected = int(request[0])
+                if selected not in store:
+                    print("Invalid player ID")
+                    continue
+                selected_ids, title = [selected], f"Player {selected}"
+            if start is not None:
+                title += f" (frames {start}-{end})"
+
+            # Create figure with subplots
+            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+            # Plot movement trails (markers thinned out on long trails)
+            ax1.imshow(pitch_img)
+            for player_id in selected_ids:
+                positions = engine.window(player_id, start, end)
+                ax1.plot(positions[:, 0], positions[:, 1], '-o',
+                         color=np.array(player_colors.get(player_id, (255, 255, 0))) / 255.0,
+                         linewidth=2, markersize=4, markevery=max(1, len(positions) // 500))
+            ax1.set_title(f"{title} Movement Trail")
+
+            # Plot heatmap
+            heatmap_data = engine.heatmap(selected_ids, start, end)
+            ax2.imshow(pitch_img)
+            heatmap = ax2.imshow(heatmap_data, alpha=0.6, cmap='hot')
+            plt.colorbar(heatmap, ax=ax2)
+            ax2.set_title(f"{title} Heatmap")
+
+            plt.tight_layout()
+            plt.show()
         except ValueError:
             print("Please enter a valid number")
 
 
-def format_tracking_data(player_positions, player_colors):
-    """Format tracking data for export"""
+def format_tracking_data(store, player_colors):
+    """Format tracking data for export: TRACK_DTYPE records in frame order and player colors"""
     return {
-        'positions': dict(player_positions),
+        'tracks': store.records(),
         'colors': {str(k): [int(c) for c in v] for k, v in player_colors.items()}
     }
 
 
-def main():
-    # Define paths to YOLO files
-    yolo_weights = r"C:\Users\ayema\yolo project\yolov4.weights"
-    yolo_cfg = r"C:\Users\ayema\yolo project\yolov4.cfg"
+def frame_processor_factory(tracker, options, roi=False, tiles=(1, 1)):
+    """make_processor for FramePipeline: every inference worker gets its own detector, ORB and reference index
+
+    options are create_detector keyword arguments (see detector_options).
+    With roi, YOLO only sees the pitch's bounding box in the frame (from the
+    frame's transform, or the latest one when the camera is followed in the
+    tracking stage), split into tiles (columns, rows); see detect_regions.
+
+    The processor runs YOLO on the frames of a batch in one forward pass and
+    returns per frame (transform_matrix, centers, confidences), or None
+    when the camera-to-pitch transform cannot be computed for the frame. With
+    motion tracking the camera must be followed in frame order, so the
+    workers leave transform_matrix None for PitchTracker.apply_transform.
+    Frames the scheduler skips (detect False) get None centers and
+    confidences, for InferenceScheduler.propagate.
+    """
+    def make_processor():
+        detector = create_detector(**options)
+        orb = cv2.ORB_create(nfeatures=2000)
+        index = tracker.reference_index.copy() if tracker.reference_index is not None else None
+
+        def process(frames, detects):
+            results = []
+            for frame, detect in zip(frames, detects):
+                # Update transformation matrix
+                transform_matrix = None
+                if tracker.motion_tracker is None:
+                    transform_matrix = tracker.compute_transform(frame, orb, index)
+                    if transform_matrix is None:
+                        results.append(None)
+                        continue
+                results.append((transform_matrix, None, None))
+
+            # One forward pass for the frames that need detections
+            batch = [i for i, detect in enumerate(detects) if detect and results[i] is not None]
+            if batch:
+                if roi or tiles != (1, 1):
+                    regions = [tracker.pitch_region((frames[i].shape[1], frames[i].shape[0]), results[i][0])
+                               if roi else None for i in batch]
+                    detections = detect_regions(detector, [frames[i] for i in batch], regions, tiles)
+                else:
+                    detections = detector.detect([frames[i] for i in batch])
+                for i, (boxes, confidences, centers) in zip(batch, detections):
+                    results[i] = (results[i][0], centers, confidences)
+            return results
+        return process
+    return make_processor
+
+
+def main(argv=None):
+    # Paths to the YOLO files and the video (headless processing of many videos: batch.py)
+    parser = argparse.ArgumentParser(description="Interactive football player tracking")
+    parser.add_argument("--weights", default=r"C:\Users\ayema\yolo project\yolov4.weights",
+                        help="Darknet weights, or an ONNX model")
+    parser.add_argument("--cfg", default=r"C:\Users\ayema\yolo project\yolov4.cfg",
+                        help="Darknet cfg (ignored for ONNX models)")
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default="opencv", help="inference backend")
+    parser.add_argument("--int8", action="store_true", help="int8-quantized weights (onnxruntime detector)")
+    parser.add_argument("--video", default=r"C:\Users\ayema\yolo project\D35bd9041_1 (25).mp4")
+    parser.add_argument("--no-camera-motion", action="store_true",
+                        help="match every frame against the reference instead of following the camera")
+    parser.add_argument("--detect-interval", type=int, default=1,
+                        help="run YOLO at least every N frames and propagate the players in between (1: every frame)")
+    parser.add_argument("--motion-threshold", type=float, default=12.0,
+                        help="mean grey-level change since the last detection that forces a detection")
+    parser.add_argument("--uncertainty-threshold", type=float, default=15.0,
+                        help="pixels of propagated player motion that force a detection")
+    parser.add_argument("--batch-size", type=int, default=1, help="frames per YOLO forward pass")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="inference workers (each loads its own network)")
+    parser.add_argument("--backend", choices=sorted(DNN_BACKENDS), help="OpenCV DNN backend")
+    parser.add_argument("--target", choices=sorted(DNN_TARGETS), help="OpenCV DNN target")
+    parser.add_argument("--roi", action="store_true", help="run YOLO only on the pitch's bounding box")
+    parser.add_argument("--tiles", type=int, nargs=2, default=(1, 1), metavar=("COLUMNS", "ROWS"),
+                        help="split the pitch region (or the frame) into tiles for YOLO")
+    parser.add_argument("--save-tracks", help="save the tracks as .npz (see track_store.TrackStore)")
+    parser.add_argument("--teams", help="JSON roster of team name -> player IDs, for team heatmaps")
+    args = parser.parse_args(argv)
+    yolo_weights = args.weights
+    yolo_cfg = args.cfg
     # Check YOLO files
-    if not os.path.isfile(yolo_weights) or not os.path.isfile(yolo_cfg):
+    onnx_model = yolo_weights.endswith(".onnx")
+    if not os.path.isfile(yolo_weights) or not (onnx_model or os.path.isfile(yolo_cfg)):
         raise FileNotFoundError("YOLO files not found")
-
-    # Load YOLO
-    print("Loading YOLO model...")
-    net = cv2.dnn.readNet(yolo_weights, yolo_cfg)
-    layer_names = net.getLayerNames()
-    output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers().flatten()]
+    try:
+        options = detector_options(args.detector, yolo_weights, "" if onnx_model else yolo_cfg,
+                                   args.backend, args.target, args.int8, threads_per_worker(args.workers))
+    except ValueError as e:
+        parser.error(str(e))
+    teams = load_teams(args.teams) if args.teams else None
 
     # Initialize video capture
-    video_path = r"C:\Users\ayema\yolo project\D35bd9041_1 (25).mp4"
+    video_path = args.video
     cap = cv2.VideoCapture(video_path)
 
     if not cap.isOpened():
@@ -224,6 +444,8 @@ def main():
 
     # Initialize tracker
     tracker = PitchTracker()
+    if not args.no_camera_motion:
+        tracker.enable_motion_tracking()
 
     # Read first frame for initialization
     ret, first_frame = cap.read()
@@ -233,90 +455,47 @@ def main():
     # Initialize tracker with first frame
     if not tracker.initialize_reference(first_frame):
         print("Initialization cancelled")
-        return
+        return 0
 
     # Initialize tracking variables
-    player_positions = defaultdict(list)
+    store = TrackStore()
     player_colors = {}
-    player_ids = [i for i in range(5)]  # Assign 5 stable player IDs
-    frame_count = 0
-
-    # Create window for camera view
-    cv2.namedWindow('Camera View')
+    player_tracker = PlayerTracker()
+    exit_requested = []
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    make_processor = frame_processor_factory(tracker, options, args.roi, tuple(args.tiles))
+    scheduler = None
+    if args.detect_interval > 1:
+        scheduler = InferenceScheduler(args.detect_interval, args.motion_threshold, args.uncertainty_threshold)
 
-        # Update transformation matrix
-        transform_success = tracker.update_transform(frame)
-        if not transform_success:
+    def track(frame_count, frame, result):
+        """Assign player IDs in frame order; returns [(center, player_id)]"""
+        if result is None or not tracker.apply_transform(frame, result[0]):
             print(f"Failed to update transform for frame {frame_count}")
-            continue
-
-        height, width = frame.shape[:2]
-        blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-        net.setInput(blob)
-        outs = net.forward(output_layers)
-
-        # Process detections
-        boxes = []
-        confidences = []
-        centers = []
-
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-
-                if confidence > 0.5 and class_id == 0:  # Only detect people
-                    center_x = int(detection[0] * width)
-                    center_y = int(detection[1] * height)
-                    w = int(detection[2] * width)
-                    h = int(detection[3] * height)
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    centers.append((center_x, center_y))
-
-        indices = cv2.dnn.NMSBoxes(boxes, confidences, 0.3, 0.4)
-
-        if len(indices) > 0:
-            for i in indices.flatten():
-                center = centers[i]
-                transformed_point = tracker.transform_point(center)
-
-                if transformed_point is None:
-                    continue
-
-                # Check if point is within pitch bounds
-                if (0 <= transformed_point[0] <= tracker.OUTPUT_SIZE[0] and
-                        0 <= transformed_point[1] <= tracker.OUTPUT_SIZE[1]):
-
-                    # Assign player ID
-                    if len(player_ids) > 0:
-                        player_id = player_ids.pop(0)
-                    else:
-                        player_id = assign_player_id(transformed_point, player_positions)
-
-                    # Generate color for new players
-                    if player_id not in player_colors:
-                        player_colors[player_id] = tuple(np.random.randint(0, 255, 3).tolist())
-
-                    color = player_colors[player_id]
-
-                    # Store current position
-                    player_positions[player_id].append(transformed_point)
-
-                    # Draw on camera view
-                    cv2.circle(frame, center, 5, color, -1)
-                    cv2.putText(frame, f"Player {player_id}",
-                                (center[0], center[1] - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            if scheduler is not None:
+                scheduler.propagate(frame_count)  # Asks for a new detection if this frame's was lost
+            return None
+        transform_matrix, centers, confidences = result
+        if scheduler is not None:
+            centers, confidences = scheduler.propagate(frame_count, centers, confidences)
+
+        tracked = assign_players(tracker, centers, player_tracker, store, frame_count + 1, confidences)
+        for center, player_id, transformed_point in tracked:
+            # Generate color for new players
+            if player_id not in player_colors:
+                player_colors[player_id] = tuple(np.random.randint(0, 255, 3).tolist())
+        return tracked
+
+    def render(frame_count, frame, tracked):
+        """Draw the players on the camera view; False stops the pipeline"""
+        if tracked is None:
+            return True
+        for center, player_id, transformed_point in tracked:
+            color = player_colors[player_id]
+            cv2.circle(frame, center, 5, color, -1)
+            cv2.putText(frame, f"Player {player_id}",
+                        (center[0], center[1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
         # Show camera view
         cv2.imshow('Camera View', frame)
@@ -324,22 +503,44 @@ def main():
         key = cv2.waitKey(1) & 0xFF
         if key == ord('z'):  # Break loop if 'z' is pressed
             print("Video stopped. Proceeding to player selection.")
-            break
+            return False
         elif key == ord('q'):  # Exit entirely if 'q' is pressed
             print("Exiting program.")
-            cap.release()
-            cv2.destroyAllWindows()
-            return
+            exit_requested.append(True)
+            return False
+        return True
 
-        frame_count += 1
+    # Create window for camera view
+    cv2.namedWindow('Camera View')
+
+    # Decoding, inference (homography + YOLO), tracking and rendering run as parallel stages
+    print("Loading YOLO model...")
+    pipeline = FramePipeline(read_frames(cap), make_processor, track, render, workers=args.workers,
+                             schedule=scheduler.should_detect if scheduler is not None else None,
+                             batch_size=args.batch_size)
+    pipeline.run()
+    print(pipeline.report())
+    if scheduler is not None:
+        print(scheduler.report())
 
     cap.release()
     cv2.destroyAllWindows()
+    if pipeline.errors:
+        # A failed stage leaves an empty or partial store: nothing to save or show
+        for error in pipeline.errors:
+            print(f"error: {error}")
+        print("Processing failed; tracks were not saved")
+        return 1
+    if exit_requested:
+        return 0
 
     # Format and visualize the tracking data after video processing
-    tracking_data = format_tracking_data(player_positions, player_colors)
-    visualize_player_data(player_positions, player_colors, tracker)
+    tracking_data = format_tracking_data(store, player_colors)
+    if args.save_tracks:
+        store.save(args.save_tracks)
+    visualize_player_data(store, player_colors, tracker, teams=teams)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file